@@ -0,0 +1,57 @@
+const Fish = require('../models/fish.model');
+const Bug = require('../models/bug.model');
+const { parseAvailabilityBits, availabilityMask, matchesAvailability } = require('../utils/availability.util');
+const { log } = require('../utils/logger.util');
+
+const AVAILABILITY_CACHE_TTL = 60 * 1000;
+const AVAILABILITY_TYPES = ['fish', 'bug'];
+
+let availabilityCatalog = null;
+let availabilityLoadedAt = 0;
+
+const loadAvailabilityCatalog = async () => {
+    if (availabilityCatalog && Date.now() - availabilityLoadedAt < AVAILABILITY_CACHE_TTL) {
+        return availabilityCatalog;
+    }
+
+    const fields = 'name location rarity availability_bits';
+    const [fishes, bugs] = await Promise.all([
+        Fish.find({ availability_bits: { $exists: true } }).select(fields).lean(),
+        Bug.find({ availability_bits: { $exists: true } }).select(fields).lean()
+    ]);
+
+    const toEntry = (type) => (creature) => ({
+        type,
+        _id: creature._id,
+        name: creature.name,
+        location: creature.location,
+        rarity: creature.rarity,
+        north: parseAvailabilityBits(creature.availability_bits.north),
+        south: parseAvailabilityBits(creature.availability_bits.south)
+    });
+
+    availabilityCatalog = fishes.map(toEntry('fish')).concat(bugs.map(toEntry('bug')));
+    availabilityLoadedAt = Date.now();
+    log(`Availability catalog loaded: ${availabilityCatalog.length} creatures`, 'info');
+
+    return availabilityCatalog;
+};
+
+const getAvailableCreatures = async (hemisphere, range = {}, options = {}) => {
+    try {
+        const catalog = await loadAvailabilityCatalog();
+        const mask = availabilityMask(range);
+        const types = options.types && options.types.length > 0 ? options.types : AVAILABILITY_TYPES;
+
+        return catalog
+            .filter(entry => types.includes(entry.type) && matchesAvailability(entry[hemisphere], mask, options.match))
+            .map(({ type, _id, name, location, rarity }) => ({ type, _id, name, location, rarity }));
+    } catch (error) {
+        throw error;
+    }
+};
+
+module.exports = {
+    AVAILABILITY_TYPES,
+    getAvailableCreatures,
+};
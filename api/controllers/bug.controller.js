@@ -24,6 +24,8 @@ const getBugList = async (filters = {}) => {
             weather: bug.weather,
             price: bug.price,
             rarity: bug.rarity,
+            placeholders: bug.placeholders,
+            image_hashes: bug.image_hashes,
             createdAt: bug.createdAt,
             updatedAt: bug.updatedAt
         }));
@@ -1,6 +1,7 @@
 const BugImage = require('../models/bugImage.model');
 const Bug = require('../models/bug.model');
 const { log } = require('../utils/logger.util');
+const { resolveImageAsset, attachImageData } = require('./imageAsset.controller');
 const { getRedisClient } = require('../utils/redis.util');
 const mongoose = require('mongoose');
 
@@ -17,7 +18,7 @@ const getBugImage = async (bugId, imageType) => {
 
         const cachedImage = await redis.get(cacheKey);
         if (cachedImage) {
-            return JSON.parse(cachedImage);
+            return attachImageData(JSON.parse(cachedImage));
         }
 
         const image = await BugImage.findOne({
@@ -30,13 +31,13 @@ const getBugImage = async (bugId, imageType) => {
         }
 
         await redis.setEx(cacheKey, IMAGE_CACHE_TTL, JSON.stringify(image));
-        return image;
+        return attachImageData(image);
     } catch (error) {
         throw error;
     }
 };
 
-const uploadBugImage = async (bugId, imageType, imageData) => {
+const uploadBugImage = async (bugId, imageType, imageData, placeholder = null, expectedHash = null) => {
     try {
         if (!mongoose.Types.ObjectId.isValid(bugId)) {
             throw new Error('Bug not found');
@@ -47,15 +48,16 @@ const uploadBugImage = async (bugId, imageType, imageData) => {
             throw new Error('Bug not found');
         }
 
-        const sizeInBytes = Math.floor((imageData.length - 'data:image/png;base64,'.length) * 0.75);
+        const { hash, size } = await resolveImageAsset(imageData, expectedHash);
 
         const image = await BugImage.findOneAndUpdate(
             { bug_id: bugId, image_type: imageType },
             {
                 bug_id: bugId,
                 image_type: imageType,
-                image_data: imageData,
-                size: sizeInBytes
+                size,
+                hash,
+                $unset: { image_data: 1 }
             },
             {
                 upsert: true,
@@ -64,6 +66,12 @@ const uploadBugImage = async (bugId, imageType, imageData) => {
             }
         );
 
+        const entityUpdate = { [`image_hashes.${imageType}`]: hash };
+        if (placeholder) {
+            entityUpdate[`placeholders.${imageType}`] = placeholder;
+        }
+        await Bug.updateOne({ _id: bugId }, { $set: entityUpdate });
+
         const redis = getRedisClient();
         const cacheKey = `bug_image:${bugId}:${imageType}`;
         await redis.del(cacheKey);
@@ -95,6 +103,8 @@ const deleteBugImage = async (bugId, imageType) => {
             throw new Error('Image not found');
         }
 
+        await Bug.updateOne({ _id: bugId }, { $unset: { [`placeholders.${imageType}`]: 1, [`image_hashes.${imageType}`]: 1 } });
+
         const redis = getRedisClient();
         const cacheKey = `bug_image:${bugId}:${imageType}`;
         await redis.del(cacheKey);
@@ -124,9 +134,29 @@ const getBugImages = async (bugId) => {
     }
 };
 
+const getBugImageHashes = async () => {
+    try {
+        const images = await BugImage.find({ hash: { $exists: true } })
+            .select('bug_id image_type hash')
+            .lean();
+
+        const hashes = {};
+        for (const image of images) {
+            const bugId = image.bug_id.toString();
+            hashes[bugId] = hashes[bugId] || {};
+            hashes[bugId][image.image_type] = image.hash;
+        }
+
+        return hashes;
+    } catch (error) {
+        throw error;
+    }
+};
+
 module.exports = {
     getBugImage,
     uploadBugImage,
     deleteBugImage,
-    getBugImages
+    getBugImages,
+    getBugImageHashes
 };
\ No newline at end of file
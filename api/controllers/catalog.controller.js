@@ -0,0 +1,199 @@
+const crypto = require('crypto');
+const mongoose = require('mongoose');
+const CatalogArtifact = require('../models/catalogArtifact.model');
+const CatalogChange = require('../models/catalogChange.model');
+const CatalogVersion = require('../models/catalogVersion.model');
+const Villager = require('../models/villager.model');
+const Fish = require('../models/fish.model');
+const Bug = require('../models/bug.model');
+const Fossil = require('../models/fossil.model');
+const User = require('../models/user.model');
+const { log } = require('../utils/logger.util');
+const { withRedisLock } = require('../utils/redis.util');
+
+const CATALOG_PUBLISH_LOCK = 'lock:catalog:publish';
+const CATALOG_PUBLISH_LOCK_TTL = 30000;
+
+const getCatalogArtifact = async (name) => {
+    try {
+        const artifact = await CatalogArtifact.findOne({ name });
+
+        if (!artifact) {
+            throw new Error('Artifact not found');
+        }
+
+        return artifact;
+    } catch (error) {
+        throw error;
+    }
+};
+
+const getCatalogArtifactEtag = async (name) => {
+    try {
+        const artifact = await CatalogArtifact.findOne({ name }).select('etag').lean();
+        return artifact ? artifact.etag : null;
+    } catch (error) {
+        throw error;
+    }
+};
+
+const putCatalogArtifact = async (name, contentType, data, encoding = 'utf8', contentEncoding = null) => {
+    try {
+        const buffer = Buffer.from(data, encoding);
+        const etag = `"${crypto.createHash('sha256').update(buffer).digest('hex').slice(0, 32)}"`;
+
+        const artifact = await CatalogArtifact.findOneAndUpdate(
+            { name },
+            {
+                name,
+                content_type: contentType,
+                content_encoding: contentEncoding,
+                data: buffer,
+                size: buffer.length,
+                etag,
+                updatedAt: new Date()
+            },
+            { new: true, upsert: true, runValidators: true, setDefaultsOnInsert: true }
+        );
+
+        log(`Catalog artifact stored: ${name} (${buffer.length} bytes)`, 'info');
+        return artifact;
+    } catch (error) {
+        throw error;
+    }
+};
+
+const CATALOG_MODELS = {
+    villager: Villager,
+    fish: Fish,
+    bug: Bug,
+    fossil: Fossil
+};
+
+const getCatalogVersion = async () => {
+    try {
+        const catalogVersion = await CatalogVersion.findById('catalog').lean();
+        return catalogVersion ? catalogVersion.version : 0;
+    } catch (error) {
+        throw error;
+    }
+};
+
+const recordCatalogChanges = async (changes) => {
+    try {
+        for (const change of changes) {
+            if (!CATALOG_MODELS[change.type] || !mongoose.Types.ObjectId.isValid(change.id)) {
+                throw new Error('Invalid catalog change');
+            }
+        }
+
+        // Publishers take turns so versions are published in order, each only once its entries are
+        // stored; clients then never sync past a version whose changes are not readable yet
+        const version = await withRedisLock(CATALOG_PUBLISH_LOCK, CATALOG_PUBLISH_LOCK_TTL, async () => {
+            const nextVersion = (await getCatalogVersion()) + 1;
+
+            await CatalogChange.insertMany(changes.map(change => ({
+                version: nextVersion,
+                entity_type: change.type,
+                entity_id: change.id,
+                image_types: change.images || []
+            })));
+
+            await CatalogVersion.updateOne(
+                { _id: 'catalog' },
+                { $max: { version: nextVersion }, $set: { updatedAt: new Date() } },
+                { upsert: true }
+            );
+
+            return nextVersion;
+        });
+
+        log(`Catalog version ${version}: ${changes.length} changes`, 'info');
+        return version;
+    } catch (error) {
+        throw error;
+    }
+};
+
+const getCatalogChanges = async (since) => {
+    try {
+        const version = await getCatalogVersion();
+        const entries = await CatalogChange.find({ version: { $gt: since } }).sort({ version: 1 }).lean();
+
+        const changedIds = {};
+        const images = new Set();
+        for (const entry of entries) {
+            const id = entry.entity_id.toString();
+            (changedIds[entry.entity_type] = changedIds[entry.entity_type] || new Set()).add(id);
+            for (const imageType of entry.image_types) {
+                images.add(`${entry.entity_type}:${id}:${imageType}`);
+            }
+        }
+
+        const changes = {};
+        const deleted = {};
+        for (const [type, Model] of Object.entries(CATALOG_MODELS)) {
+            const ids = [...(changedIds[type] || [])];
+            const records = ids.length > 0 ? await Model.find({ _id: { $in: ids } }) : [];
+            const found = new Set(records.map(record => record._id.toString()));
+
+            changes[type] = records.map(record => record.toJSON());
+            deleted[type] = ids.filter(id => !found.has(id));
+        }
+
+        return { version, since, changes, deleted, images: [...images] };
+    } catch (error) {
+        throw error;
+    }
+};
+
+const DEMAND_CATEGORIES = ['villagers', 'fish', 'bugs', 'fossils'];
+
+// Per-name counts of user likes and, for villagers, island residents and favorites
+const getCatalogDemand = async (category) => {
+    try {
+        const demand = {};
+        const entry = (name) => (demand[name] = demand[name] || { likes: 0, residents: 0, favorites: 0 });
+
+        const likes = await User.aggregate([
+            { $unwind: '$island.likes' },
+            { $match: { 'island.likes.category': category } },
+            { $group: { _id: '$island.likes.name', count: { $sum: 1 } } }
+        ]);
+        for (const like of likes) {
+            entry(like._id).likes = like.count;
+        }
+
+        if (category === 'villagers') {
+            const residents = await User.aggregate([
+                { $unwind: '$island.residents' },
+                {
+                    $group: {
+                        _id: '$island.residents.name',
+                        count: { $sum: 1 },
+                        favorites: { $sum: { $cond: ['$island.residents.favorite', 1, 0] } }
+                    }
+                }
+            ]);
+            for (const resident of residents) {
+                entry(resident._id).residents = resident.count;
+                entry(resident._id).favorites = resident.favorites;
+            }
+        }
+
+        return { category, demand };
+    } catch (error) {
+        throw error;
+    }
+};
+
+module.exports = {
+    DEMAND_CATEGORIES,
+    getCatalogDemand,
+    getCatalogVersion,
+    recordCatalogChanges,
+    getCatalogChanges,
+    getCatalogArtifact,
+    getCatalogArtifactEtag,
+    putCatalogArtifact,
+};
@@ -21,6 +21,8 @@ const getFishList = async (filters = {}) => {
             location: fish.location,
             price: fish.price,
             rarity: fish.rarity,
+            placeholders: fish.placeholders,
+            image_hashes: fish.image_hashes,
             createdAt: fish.createdAt,
             updatedAt: fish.updatedAt
         }));
@@ -1,6 +1,7 @@
 const FishImage = require('../models/fishImage.model');
 const Fish = require('../models/fish.model');
 const { log } = require('../utils/logger.util');
+const { resolveImageAsset, attachImageData } = require('./imageAsset.controller');
 const { getRedisClient } = require('../utils/redis.util');
 const mongoose = require('mongoose');
 
@@ -17,7 +18,7 @@ const getFishImage = async (fishId, imageType) => {
 
         const cachedImage = await redis.get(cacheKey);
         if (cachedImage) {
-            return JSON.parse(cachedImage);
+            return attachImageData(JSON.parse(cachedImage));
         }
 
         const image = await FishImage.findOne({
@@ -30,13 +31,13 @@ const getFishImage = async (fishId, imageType) => {
         }
 
         await redis.setEx(cacheKey, IMAGE_CACHE_TTL, JSON.stringify(image));
-        return image;
+        return attachImageData(image);
     } catch (error) {
         throw error;
     }
 };
 
-const uploadFishImage = async (fishId, imageType, imageData) => {
+const uploadFishImage = async (fishId, imageType, imageData, placeholder = null, expectedHash = null) => {
     try {
         if (!mongoose.Types.ObjectId.isValid(fishId)) {
             throw new Error('Fish not found');
@@ -47,15 +48,16 @@ const uploadFishImage = async (fishId, imageType, imageData) => {
             throw new Error('Fish not found');
         }
 
-        const sizeInBytes = Math.floor((imageData.length - 'data:image/png;base64,'.length) * 0.75);
+        const { hash, size } = await resolveImageAsset(imageData, expectedHash);
 
         const image = await FishImage.findOneAndUpdate(
             { fish_id: fishId, image_type: imageType },
             {
                 fish_id: fishId,
                 image_type: imageType,
-                image_data: imageData,
-                size: sizeInBytes
+                size,
+                hash,
+                $unset: { image_data: 1 }
             },
             {
                 upsert: true,
@@ -64,6 +66,12 @@ const uploadFishImage = async (fishId, imageType, imageData) => {
             }
         );
 
+        const entityUpdate = { [`image_hashes.${imageType}`]: hash };
+        if (placeholder) {
+            entityUpdate[`placeholders.${imageType}`] = placeholder;
+        }
+        await Fish.updateOne({ _id: fishId }, { $set: entityUpdate });
+
         const redis = getRedisClient();
         const cacheKey = `fish_image:${fishId}:${imageType}`;
         await redis.del(cacheKey);
@@ -95,6 +103,8 @@ const deleteFishImage = async (fishId, imageType) => {
             throw new Error('Image not found');
         }
 
+        await Fish.updateOne({ _id: fishId }, { $unset: { [`placeholders.${imageType}`]: 1, [`image_hashes.${imageType}`]: 1 } });
+
         const redis = getRedisClient();
         const cacheKey = `fish_image:${fishId}:${imageType}`;
         await redis.del(cacheKey);
@@ -124,9 +134,29 @@ const getFishImages = async (fishId) => {
     }
 };
 
+const getFishImageHashes = async () => {
+    try {
+        const images = await FishImage.find({ hash: { $exists: true } })
+            .select('fish_id image_type hash')
+            .lean();
+
+        const hashes = {};
+        for (const image of images) {
+            const fishId = image.fish_id.toString();
+            hashes[fishId] = hashes[fishId] || {};
+            hashes[fishId][image.image_type] = image.hash;
+        }
+
+        return hashes;
+    } catch (error) {
+        throw error;
+    }
+};
+
 module.exports = {
     getFishImage,
     uploadFishImage,
     deleteFishImage,
-    getFishImages
+    getFishImages,
+    getFishImageHashes
 };
\ No newline at end of file
@@ -1,5 +1,6 @@
 const Fossil = require('../models/fossil.model');
 const { log } = require('../utils/logger.util');
+const { decodePartKeys } = require('../utils/image.util');
 
 const getFossilList = async (filters = {}) => {
     try {
@@ -18,6 +19,8 @@ const getFossilList = async (filters = {}) => {
             parts: fossil.parts,
             total_price: fossil.total_price,
             parts_count: fossil.parts_count,
+            placeholders: decodePartKeys(fossil.placeholders),
+            image_hashes: decodePartKeys(fossil.image_hashes),
             createdAt: fossil.createdAt,
             updatedAt: fossil.updatedAt
         }));
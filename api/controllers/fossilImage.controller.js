@@ -1,6 +1,8 @@
 const FossilImage = require('../models/fossilImage.model');
 const Fossil = require('../models/fossil.model');
 const { log } = require('../utils/logger.util');
+const { resolveImageAsset, attachImageData } = require('./imageAsset.controller');
+const { encodePartKey } = require('../utils/image.util');
 
 const getFossilImage = async (fossilId, partName) => {
     try {
@@ -18,13 +20,13 @@ const getFossilImage = async (fossilId, partName) => {
             throw new Error('Image not found');
         }
 
-        return image;
+        return attachImageData(image);
     } catch (error) {
         throw error;
     }
 };
 
-const uploadFossilImage = async (fossilId, partName, imageData) => {
+const uploadFossilImage = async (fossilId, partName, imageData, placeholder = null, expectedHash = null) => {
     try {
         const fossil = await Fossil.findById(fossilId);
         if (!fossil) {
@@ -36,8 +38,13 @@ const uploadFossilImage = async (fossilId, partName, imageData) => {
             throw new Error('Part not found in fossil');
         }
 
-        const base64Data = imageData.replace(/^data:image\/png;base64,/, '');
-        const imageSize = Buffer.from(base64Data, 'base64').length;
+        const { hash, size: imageSize } = await resolveImageAsset(imageData, expectedHash);
+
+        const entityUpdate = { [`image_hashes.${encodePartKey(partName)}`]: hash };
+        if (placeholder) {
+            entityUpdate[`placeholders.${encodePartKey(partName)}`] = placeholder;
+        }
+        await Fossil.updateOne({ _id: fossilId }, { $set: entityUpdate });
 
         const existingImage = await FossilImage.findOne({
             fossil_id: fossilId,
@@ -45,8 +52,9 @@ const uploadFossilImage = async (fossilId, partName, imageData) => {
         });
 
         if (existingImage) {
-            existingImage.image_data = imageData;
+            existingImage.image_data = undefined;
             existingImage.size = imageSize;
+            existingImage.hash = hash;
             await existingImage.save();
 
             log(`Fossil image updated: ${fossilId} - ${partName}`, 'info');
@@ -56,8 +64,8 @@ const uploadFossilImage = async (fossilId, partName, imageData) => {
         const newImage = new FossilImage({
             fossil_id: fossilId,
             part_name: partName,
-            image_data: imageData,
-            size: imageSize
+            size: imageSize,
+            hash
         });
 
         await newImage.save();
@@ -85,6 +93,8 @@ const deleteFossilImage = async (fossilId, partName) => {
             throw new Error('Image not found');
         }
 
+        await Fossil.updateOne({ _id: fossilId }, { $unset: { [`placeholders.${encodePartKey(partName)}`]: 1, [`image_hashes.${encodePartKey(partName)}`]: 1 } });
+
         log(`Fossil image deleted: ${fossilId} - ${partName}`, 'info');
         return { message: 'Fossil image deleted successfully' };
     } catch (error) {
@@ -92,8 +102,28 @@ const deleteFossilImage = async (fossilId, partName) => {
     }
 };
 
+const getFossilImageHashes = async () => {
+    try {
+        const images = await FossilImage.find({ hash: { $exists: true } })
+            .select('fossil_id part_name hash')
+            .lean();
+
+        const hashes = {};
+        for (const image of images) {
+            const fossilId = image.fossil_id.toString();
+            hashes[fossilId] = hashes[fossilId] || {};
+            hashes[fossilId][image.part_name] = image.hash;
+        }
+
+        return hashes;
+    } catch (error) {
+        throw error;
+    }
+};
+
 module.exports = {
     getFossilImage,
     uploadFossilImage,
     deleteFossilImage,
+    getFossilImageHashes,
 };
@@ -0,0 +1,106 @@
+const ImageAsset = require('../models/imageAsset.model');
+const { log } = require('../utils/logger.util');
+const { getRedisClient } = require('../utils/redis.util');
+const { decodeImageData, hashImageBytes } = require('../utils/image.util');
+
+const IMAGE_ASSET_CACHE_TTL = 3600;
+
+const findMissingImageAssets = async (hashes) => {
+    try {
+        const existing = await ImageAsset.find({ hash: { $in: hashes } }).select('hash').lean();
+        const existingHashes = new Set(existing.map(asset => asset.hash));
+
+        return [...new Set(hashes)].filter(hash => !existingHashes.has(hash));
+    } catch (error) {
+        throw error;
+    }
+};
+
+const putImageAsset = async (imageData, expectedHash = null) => {
+    try {
+        const imageBytes = decodeImageData(imageData);
+        const hash = hashImageBytes(imageBytes);
+        if (expectedHash && expectedHash !== hash) {
+            throw new Error('Image hash mismatch');
+        }
+
+        // Content-addressed: an existing asset with this hash already holds these bytes
+        const asset = await ImageAsset.findOneAndUpdate(
+            { hash },
+            { $setOnInsert: { hash, image_data: imageData, size: imageBytes.length } },
+            { upsert: true, new: true, runValidators: true }
+        ).select('hash size createdAt');
+
+        log(`Image asset stored: ${hash} (${imageBytes.length} bytes)`, 'info');
+        return asset;
+    } catch (error) {
+        throw error;
+    }
+};
+
+const getImageAsset = async (hash) => {
+    try {
+        const asset = await ImageAsset.findOne({ hash }).select('hash size createdAt');
+
+        if (!asset) {
+            throw new Error('Image asset not found');
+        }
+
+        return asset;
+    } catch (error) {
+        throw error;
+    }
+};
+
+const getImageAssetData = async (hash) => {
+    try {
+        const redis = getRedisClient();
+        const cacheKey = `image_asset:${hash}`;
+
+        const cachedData = await redis.get(cacheKey);
+        if (cachedData) {
+            return cachedData;
+        }
+
+        const asset = await ImageAsset.findOne({ hash }).select('image_data').lean();
+        if (!asset) {
+            throw new Error('Image not found');
+        }
+
+        await redis.setEx(cacheKey, IMAGE_ASSET_CACHE_TTL, asset.image_data);
+        return asset.image_data;
+    } catch (error) {
+        throw error;
+    }
+};
+
+// Store uploaded bytes as a shared asset, or reference an asset uploaded earlier by hash
+const resolveImageAsset = async (imageData, hash) => {
+    try {
+        const asset = imageData ? await putImageAsset(imageData, hash) : await getImageAsset(hash);
+        return { hash: asset.hash, size: asset.size };
+    } catch (error) {
+        throw error;
+    }
+};
+
+// Per-entity image records point at a shared asset; fill in the bytes for readers
+const attachImageData = async (image) => {
+    try {
+        if (!image.image_data && image.hash) {
+            image.image_data = await getImageAssetData(image.hash);
+        }
+        return image;
+    } catch (error) {
+        throw error;
+    }
+};
+
+module.exports = {
+    findMissingImageAssets,
+    putImageAsset,
+    getImageAsset,
+    getImageAssetData,
+    resolveImageAsset,
+    attachImageData
+};
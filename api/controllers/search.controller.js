@@ -0,0 +1,140 @@
+const { getCatalogArtifact, getCatalogArtifactEtag } = require('./catalog.controller');
+const { foldText, splitRuns, queryTerms } = require('../utils/search.util');
+const { log } = require('../utils/logger.util');
+
+const SEARCH_INDEX_ARTIFACT = 'search-index';
+const SEARCH_INDEX_CHECK_INTERVAL = 30 * 1000;
+const SEARCH_TYPES = ['villager', 'fish', 'bug', 'fossil'];
+
+let searchIndex = null;
+let searchIndexEtag = null;
+let searchIndexCheckedAt = 0;
+
+const prepareSearchIndex = (raw) => {
+    const docs = raw.docs.map(doc => {
+        const texts = Object.values(doc.name).concat(doc.aliases || []).map(foldText);
+        return {
+            ...doc,
+            folded: texts,
+            words: texts.flatMap(splitRuns)
+        };
+    });
+
+    return { ...raw, docs };
+};
+
+const loadSearchIndex = async () => {
+    const now = Date.now();
+    if (searchIndex && now - searchIndexCheckedAt < SEARCH_INDEX_CHECK_INTERVAL) {
+        return searchIndex;
+    }
+
+    searchIndexCheckedAt = now;
+    const etag = await getCatalogArtifactEtag(SEARCH_INDEX_ARTIFACT);
+
+    if (!etag) {
+        searchIndex = null;
+        searchIndexEtag = null;
+        return null;
+    }
+
+    if (etag !== searchIndexEtag) {
+        const artifact = await getCatalogArtifact(SEARCH_INDEX_ARTIFACT);
+        searchIndex = prepareSearchIndex(JSON.parse(artifact.data.toString('utf8')));
+        searchIndexEtag = artifact.etag;
+        log(`Search index loaded: ${searchIndex.docs.length} documents`, 'info');
+    }
+
+    return searchIndex;
+};
+
+const intersect = (left, right) => {
+    const result = [];
+    let i = 0;
+    let j = 0;
+    while (i < left.length && j < right.length) {
+        if (left[i] === right[j]) {
+            result.push(left[i]);
+            i++;
+            j++;
+        } else if (left[i] < right[j]) {
+            i++;
+        } else {
+            j++;
+        }
+    }
+    return result;
+};
+
+const matchesRuns = (doc, runs) => runs.every(run =>
+    doc.words.some(word => word.startsWith(run)) || doc.folded.some(text => text.includes(run))
+);
+
+const scoreDoc = (doc, folded) => {
+    if (doc.folded.includes(folded)) {
+        return 0;
+    }
+    if (doc.folded.some(text => text.startsWith(folded))) {
+        return 1;
+    }
+    return 2;
+};
+
+const searchCatalog = async (query, options = {}) => {
+    try {
+        const index = await loadSearchIndex();
+        if (!index) {
+            throw new Error('Search index not available');
+        }
+
+        const folded = foldText(query).trim();
+        const runs = splitRuns(folded);
+        if (runs.length === 0) {
+            return [];
+        }
+
+        let candidates = null;
+        for (const run of runs) {
+            for (const term of queryTerms(run, index.max_prefix)) {
+                const postings = index.terms[term] || [];
+                candidates = candidates === null ? postings : intersect(candidates, postings);
+                if (candidates.length === 0) {
+                    return [];
+                }
+            }
+        }
+
+        const types = options.types && options.types.length > 0 ? options.types : SEARCH_TYPES;
+        const limit = options.limit || 20;
+
+        return candidates
+            .map(position => index.docs[position])
+            .filter(doc => types.includes(doc.type) && matchesRuns(doc, runs))
+            .map(doc => ({ doc, score: scoreDoc(doc, folded) }))
+            .sort((a, b) => a.score - b.score || a.doc.name.en.localeCompare(b.doc.name.en))
+            .slice(0, limit)
+            .map(({ doc, score }) => ({
+                type: doc.type,
+                _id: doc._id,
+                name: doc.name,
+                score
+            }));
+    } catch (error) {
+        throw error;
+    }
+};
+
+const searchCatalogIds = async (query, type) => {
+    try {
+        const results = await searchCatalog(query, { types: [type], limit: Number.MAX_SAFE_INTEGER });
+        return results.map(result => result._id);
+    } catch (error) {
+        throw error;
+    }
+};
+
+module.exports = {
+    SEARCH_TYPES,
+    searchCatalog,
+    searchCatalogIds,
+};
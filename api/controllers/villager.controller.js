@@ -1,7 +1,21 @@
 const Villager = require('../models/villager.model');
 const VillagerImage = require('../models/villagerImage.model');
+const { searchCatalogIds } = require('./search.controller');
 const { log } = require('../utils/logger.util');
 
+const searchVillagerIds = async (search) => {
+    try {
+        return await searchCatalogIds(search, 'villager');
+    } catch (error) {
+        if (error.message !== 'Search index not available') {
+            throw error;
+        }
+
+        const pattern = new RegExp(search.replace(/[.*+?^${}()|[\]\\]/g, '\\$&'), 'i');
+        const villagers = await Villager.find({ 'name.en': pattern }).select('_id');
+        return villagers.map(villager => villager._id);
+    }
+};
 
 const getVillagerList = async (filters = {}) => {
     try {
@@ -19,6 +33,9 @@ const getVillagerList = async (filters = {}) => {
         if (filters.islander !== undefined) {
             query.islander = filters.islander;
         }
+        if (filters.search) {
+            query._id = { $in: await searchVillagerIds(filters.search) };
+        }
 
         const villagers = await Villager.find(query).sort({ 'name.en': 1 });
 
@@ -32,6 +49,8 @@ const getVillagerList = async (filters = {}) => {
             birthday_date: villager.birthday_date,
             popularity_rank: villager.popularity_rank,
             ready: villager.ready,
+            placeholders: villager.placeholders,
+            image_hashes: villager.image_hashes,
             createdAt: villager.createdAt,
             updatedAt: villager.updatedAt
         }));
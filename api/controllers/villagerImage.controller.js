@@ -1,6 +1,7 @@
 const VillagerImage = require('../models/villagerImage.model');
 const Villager = require('../models/villager.model');
 const { log } = require('../utils/logger.util');
+const { resolveImageAsset, attachImageData } = require('./imageAsset.controller');
 const { getRedisClient } = require('../utils/redis.util');
 const mongoose = require('mongoose');
 
@@ -17,7 +18,7 @@ const getVillagerImage = async (villagerId, imageType) => {
 
         const cachedImage = await redis.get(cacheKey);
         if (cachedImage) {
-            return JSON.parse(cachedImage);
+            return attachImageData(JSON.parse(cachedImage));
         }
 
         const image = await VillagerImage.findOne({
@@ -30,13 +31,13 @@ const getVillagerImage = async (villagerId, imageType) => {
         }
 
         await redis.setEx(cacheKey, IMAGE_CACHE_TTL, JSON.stringify(image));
-        return image;
+        return attachImageData(image);
     } catch (error) {
         throw error;
     }
 };
 
-const uploadVillagerImage = async (villagerId, imageType, imageData) => {
+const uploadVillagerImage = async (villagerId, imageType, imageData, placeholder = null, expectedHash = null) => {
     try {
         if (!mongoose.Types.ObjectId.isValid(villagerId)) {
             throw new Error('Villager not found');
@@ -47,15 +48,16 @@ const uploadVillagerImage = async (villagerId, imageType, imageData) => {
             throw new Error('Villager not found');
         }
 
-        const sizeInBytes = Math.floor((imageData.length - 'data:image/png;base64,'.length) * 0.75);
+        const { hash, size } = await resolveImageAsset(imageData, expectedHash);
 
         const image = await VillagerImage.findOneAndUpdate(
             { villager_id: villagerId, image_type: imageType },
             {
                 villager_id: villagerId,
                 image_type: imageType,
-                image_data: imageData,
-                size: sizeInBytes
+                size,
+                hash,
+                $unset: { image_data: 1 }
             },
             {
                 upsert: true,
@@ -64,6 +66,12 @@ const uploadVillagerImage = async (villagerId, imageType, imageData) => {
             }
         );
 
+        const entityUpdate = { [`image_hashes.${imageType}`]: hash };
+        if (placeholder) {
+            entityUpdate[`placeholders.${imageType}`] = placeholder;
+        }
+        await Villager.updateOne({ _id: villagerId }, { $set: entityUpdate });
+
         const redis = getRedisClient();
         const cacheKey = `villager_image:${villagerId}:${imageType}`;
         await redis.del(cacheKey);
@@ -95,6 +103,8 @@ const deleteVillagerImage = async (villagerId, imageType) => {
             throw new Error('Image not found');
         }
 
+        await Villager.updateOne({ _id: villagerId }, { $unset: { [`placeholders.${imageType}`]: 1, [`image_hashes.${imageType}`]: 1 } });
+
         const redis = getRedisClient();
         const cacheKey = `villager_image:${villagerId}:${imageType}`;
         await redis.del(cacheKey);
@@ -124,9 +134,29 @@ const getVillagerImages = async (villagerId) => {
     }
 };
 
+const getVillagerImageHashes = async () => {
+    try {
+        const images = await VillagerImage.find({ hash: { $exists: true } })
+            .select('villager_id image_type hash')
+            .lean();
+
+        const hashes = {};
+        for (const image of images) {
+            const villagerId = image.villager_id.toString();
+            hashes[villagerId] = hashes[villagerId] || {};
+            hashes[villagerId][image.image_type] = image.hash;
+        }
+
+        return hashes;
+    } catch (error) {
+        throw error;
+    }
+};
+
 module.exports = {
     getVillagerImage,
     uploadVillagerImage,
     deleteVillagerImage,
-    getVillagerImages
+    getVillagerImages,
+    getVillagerImageHashes
 };
\ No newline at end of file
@@ -44,6 +44,8 @@ app.use('/villager', require('./routes/villager.route'));
 app.use('/fish', require('./routes/fish.route'));
 app.use('/bug', require('./routes/bug.route'));
 app.use('/fossil', require('./routes/fossil.route'));
+app.use('/catalog', require('./routes/catalog.route'));
+app.use('/search', require('./routes/search.route'));
 log('Routes imported');
 app.listen(process.env.PORT || 3010, () => {
     log('Server running on port ' + process.env.PORT || 3010);
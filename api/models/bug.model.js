@@ -72,6 +72,16 @@ const BugSchema = new mongoose.Schema({
         type: mongoose.Schema.Types.Mixed,
         default: {}
     },
+    availability_bits: {
+        north: {
+            type: String,
+            match: /^[0-9a-f]{72}$/
+        },
+        south: {
+            type: String,
+            match: /^[0-9a-f]{72}$/
+        }
+    },
     rarity: {
         type: String,
         required: true,
@@ -79,6 +89,14 @@ const BugSchema = new mongoose.Schema({
         trim: true,
         default: 'common'
     },
+    placeholders: {
+        type: mongoose.Schema.Types.Mixed,
+        default: {}
+    },
+    image_hashes: {
+        type: mongoose.Schema.Types.Mixed,
+        default: {}
+    },
     createdAt: {
         type: Date,
         default: Date.now
@@ -110,7 +128,10 @@ BugSchema.set('toJSON', {
             weather: ret.weather,
             price: ret.price,
             availability: ret.availability,
+            availability_bits: ret.availability_bits,
             rarity: ret.rarity,
+            placeholders: ret.placeholders,
+            image_hashes: ret.image_hashes,
             createdAt: ret.createdAt,
             updatedAt: ret.updatedAt
         };
@@ -0,0 +1,62 @@
+const mongoose = require('mongoose');
+
+const CatalogArtifactSchema = new mongoose.Schema({
+    name: {
+        type: String,
+        required: true,
+        unique: true,
+        trim: true,
+        match: /^[a-z0-9][a-z0-9._-]*$/
+    },
+    content_type: {
+        type: String,
+        required: true
+    },
+    content_encoding: {
+        type: String,
+        enum: ['gzip'],
+        default: null
+    },
+    data: {
+        type: Buffer,
+        required: true
+    },
+    size: {
+        type: Number,
+        required: true
+    },
+    etag: {
+        type: String,
+        required: true
+    },
+    createdAt: {
+        type: Date,
+        default: Date.now
+    },
+    updatedAt: {
+        type: Date,
+        default: Date.now
+    }
+});
+
+CatalogArtifactSchema.pre('save', function(next) {
+    this.updatedAt = new Date();
+    next();
+});
+
+CatalogArtifactSchema.set('toJSON', {
+    transform: function(doc, ret) {
+        return {
+            _id: ret._id,
+            name: ret.name,
+            content_type: ret.content_type,
+            content_encoding: ret.content_encoding,
+            size: ret.size,
+            etag: ret.etag,
+            createdAt: ret.createdAt,
+            updatedAt: ret.updatedAt
+        };
+    }
+});
+
+module.exports = mongoose.model('CatalogArtifact', CatalogArtifactSchema);
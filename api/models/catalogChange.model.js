@@ -0,0 +1,31 @@
+const mongoose = require('mongoose');
+
+const CatalogChangeSchema = new mongoose.Schema({
+    version: {
+        type: Number,
+        required: true,
+        min: 1
+    },
+    entity_type: {
+        type: String,
+        required: true,
+        enum: ['villager', 'fish', 'bug', 'fossil']
+    },
+    entity_id: {
+        type: mongoose.Schema.Types.ObjectId,
+        required: true
+    },
+    image_types: {
+        type: [String],
+        default: []
+    },
+    createdAt: {
+        type: Date,
+        default: Date.now
+    }
+});
+
+CatalogChangeSchema.index({ version: 1 });
+CatalogChangeSchema.index({ entity_type: 1, entity_id: 1 });
+
+module.exports = mongoose.model('CatalogChange', CatalogChangeSchema);
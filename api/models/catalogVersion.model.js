@@ -0,0 +1,19 @@
+const mongoose = require('mongoose');
+
+const CatalogVersionSchema = new mongoose.Schema({
+    _id: {
+        type: String,
+        default: 'catalog'
+    },
+    version: {
+        type: Number,
+        required: true,
+        default: 0
+    },
+    updatedAt: {
+        type: Date,
+        default: Date.now
+    }
+});
+
+module.exports = mongoose.model('CatalogVersion', CatalogVersionSchema);
@@ -66,12 +66,30 @@ const FishSchema = new mongoose.Schema({
         type: mongoose.Schema.Types.Mixed,
         default: {}
     },
+    availability_bits: {
+        north: {
+            type: String,
+            match: /^[0-9a-f]{72}$/
+        },
+        south: {
+            type: String,
+            match: /^[0-9a-f]{72}$/
+        }
+    },
     rarity: {
         type: String,
         required: true,
         enum: ['common', 'uncommon', 'rare'],
         trim: true
     },
+    placeholders: {
+        type: mongoose.Schema.Types.Mixed,
+        default: {}
+    },
+    image_hashes: {
+        type: mongoose.Schema.Types.Mixed,
+        default: {}
+    },
     createdAt: {
         type: Date,
         default: Date.now
@@ -100,7 +118,10 @@ FishSchema.set('toJSON', {
             location: ret.location,
             price: ret.price,
             availability: ret.availability,
+            availability_bits: ret.availability_bits,
             rarity: ret.rarity,
+            placeholders: ret.placeholders,
+            image_hashes: ret.image_hashes,
             createdAt: ret.createdAt,
             updatedAt: ret.updatedAt
         };
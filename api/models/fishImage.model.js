@@ -13,7 +13,6 @@ const FishImageSchema = new mongoose.Schema({
     },
     image_data: {
         type: String,
-        required: true,
         validate: {
             validator: function(v) {
                 return /^data:image\/png;base64,[A-Za-z0-9+/]+={0,2}$/.test(v);
@@ -25,6 +24,10 @@ const FishImageSchema = new mongoose.Schema({
         type: Number,
         required: true
     },
+    hash: {
+        type: String,
+        match: /^[0-9a-f]{32}$/
+    },
     createdAt: {
         type: Date,
         default: Date.now
@@ -50,6 +53,7 @@ FishImageSchema.set('toJSON', {
             image_type: ret.image_type,
             image_data: ret.image_data,
             size: ret.size,
+            hash: ret.hash,
             createdAt: ret.createdAt,
             updatedAt: ret.updatedAt
         };
@@ -1,4 +1,5 @@
 const mongoose = require('mongoose');
+const { decodePartKeys } = require('../utils/image.util');
 
 const FossilSchema = new mongoose.Schema({
     name: {
@@ -50,6 +51,14 @@ const FossilSchema = new mongoose.Schema({
         required: true,
         min: 1
     },
+    placeholders: {
+        type: mongoose.Schema.Types.Mixed,
+        default: {}
+    },
+    image_hashes: {
+        type: mongoose.Schema.Types.Mixed,
+        default: {}
+    },
     createdAt: {
         type: Date,
         default: Date.now
@@ -79,6 +88,8 @@ FossilSchema.set('toJSON', {
             parts: ret.parts,
             total_price: ret.total_price,
             parts_count: ret.parts_count,
+            placeholders: decodePartKeys(ret.placeholders),
+            image_hashes: decodePartKeys(ret.image_hashes),
             createdAt: ret.createdAt,
             updatedAt: ret.updatedAt
         };
@@ -12,13 +12,16 @@ const FossilImageSchema = new mongoose.Schema({
         trim: true
     },
     image_data: {
-        type: String,
-        required: true
+        type: String
     },
     size: {
         type: Number,
         required: true
     },
+    hash: {
+        type: String,
+        match: /^[0-9a-f]{32}$/
+    },
     createdAt: {
         type: Date,
         default: Date.now
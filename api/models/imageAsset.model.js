@@ -0,0 +1,41 @@
+const mongoose = require('mongoose');
+
+const ImageAssetSchema = new mongoose.Schema({
+    hash: {
+        type: String,
+        required: true,
+        unique: true,
+        match: /^[0-9a-f]{32}$/
+    },
+    image_data: {
+        type: String,
+        required: true,
+        validate: {
+            validator: function(v) {
+                return /^data:image\/png;base64,[A-Za-z0-9+/]+={0,2}$/.test(v);
+            },
+            message: 'Image must be a valid Base64 PNG format'
+        }
+    },
+    size: {
+        type: Number,
+        required: true
+    },
+    createdAt: {
+        type: Date,
+        default: Date.now
+    }
+});
+
+ImageAssetSchema.set('toJSON', {
+    transform: function(doc, ret) {
+        return {
+            _id: ret._id,
+            hash: ret.hash,
+            size: ret.size,
+            createdAt: ret.createdAt
+        };
+    }
+});
+
+module.exports = mongoose.model('ImageAsset', ImageAssetSchema);
@@ -132,6 +132,14 @@ const VillagerSchema = new mongoose.Schema({
         default: 'unranked',
         enum: ['S+', 'S', 'A', 'B', 'C', 'D', 'E', 'F', 'G', 'unranked']
     },
+    placeholders: {
+        type: mongoose.Schema.Types.Mixed,
+        default: {}
+    },
+    image_hashes: {
+        type: mongoose.Schema.Types.Mixed,
+        default: {}
+    },
     createdAt: {
         type: Date,
         default: Date.now
@@ -174,6 +182,8 @@ VillagerSchema.set('toJSON', {
             debut: ret.debut,
             appearances: ret.appearances,
             popularity_rank: ret.popularity_rank,
+            placeholders: ret.placeholders,
+            image_hashes: ret.image_hashes,
             createdAt: ret.createdAt,
             updatedAt: ret.updatedAt
         };
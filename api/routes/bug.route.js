@@ -13,8 +13,12 @@ const {
     getBugImage,
     uploadBugImage,
     deleteBugImage,
+    getBugImageHashes,
 } = require('../controllers/bugImage.controller');
 const { log } = require('../utils/logger.util');
+const { sendImage, sendHashedImage } = require('../utils/image.util');
+
+const PLACEHOLDER_MAX_LENGTH = 4096;
 
 router.get('/', async (req, res) => {
         try {
@@ -68,6 +72,8 @@ router.post('/',
         check('weather').isIn(['any', 'rain']).withMessage('Weather must be one of: any, rain'),
         check('price.shop').isNumeric().withMessage('Shop price must be a number'),
         check('price.flick').isNumeric().withMessage('Flick price must be a number'),
+        check('availability_bits.north').optional().matches(/^[0-9a-f]{72}$/).withMessage('North availability bits must be 72 hex digits'),
+        check('availability_bits.south').optional().matches(/^[0-9a-f]{72}$/).withMessage('South availability bits must be 72 hex digits'),
         check('rarity').optional().isIn(['very_common', 'common', 'uncommon', 'rare']).withMessage('Rarity must be one of: very_common, common, uncommon, rare')
     ],
     async (req, res) => {
@@ -102,6 +108,8 @@ router.put('/:id',
         check('weather').optional().isIn(['any', 'rain']).withMessage('Weather must be one of: any, rain'),
         check('price.shop').optional().isNumeric().withMessage('Shop price must be a number'),
         check('price.flick').optional().isNumeric().withMessage('Flick price must be a number'),
+        check('availability_bits.north').optional().matches(/^[0-9a-f]{72}$/).withMessage('North availability bits must be 72 hex digits'),
+        check('availability_bits.south').optional().matches(/^[0-9a-f]{72}$/).withMessage('South availability bits must be 72 hex digits'),
         check('rarity').optional().isIn(['very_common', 'common', 'uncommon', 'rare']).withMessage('Rarity must be one of: very_common, common, uncommon, rare')
     ],
     async (req, res) => {
@@ -150,6 +158,20 @@ router.delete('/:id',
     }
 );
 
+router.get('/img/hashes', async (req, res) => {
+    try {
+        const hashes = await getBugImageHashes();
+
+        res.status(200).json({
+            message: 'Bug image hashes retrieved successfully',
+            hashes
+        });
+    } catch (error) {
+        log(`Error retrieving bug image hashes: ${error.message}`, 'error');
+        res.status(500).json({ message: 'Internal server error' });
+    }
+});
+
 router.get('/:id/img/:type', async (req, res) => {
     try {
         const { id, type } = req.params;
@@ -177,14 +199,73 @@ router.get('/:id/img/:type', async (req, res) => {
     }
 });
 
+router.get('/:id/img/:type/raw', async (req, res) => {
+    try {
+        const { id, type } = req.params;
+
+        if (!['full', 'small'].includes(type)) {
+            return res.status(400).json({
+                message: 'Type must be one of: full, small'
+            });
+        }
+
+        const image = await getBugImage(id, type);
+        sendImage(req, res, image);
+    } catch (error) {
+        log(`Error retrieving bug image: ${error.message}`, 'error');
+
+        if (error.message === 'Bug not found' || error.message === 'Image not found') {
+            return res.status(404).json({ message: error.message });
+        }
+
+        res.status(500).json({ message: 'Internal server error' });
+    }
+});
+
+router.get('/:id/img/:type/:hash.png', async (req, res) => {
+    try {
+        const { id, type } = req.params;
+
+        if (!['full', 'small'].includes(type)) {
+            return res.status(400).json({
+                message: 'Type must be one of: full, small'
+            });
+        }
+
+        const image = await getBugImage(id, type);
+        sendHashedImage(req, res, image, `${req.baseUrl}/${id}/img/${type}`);
+    } catch (error) {
+        log(`Error retrieving bug image: ${error.message}`, 'error');
+
+        if (error.message === 'Bug not found' || error.message === 'Image not found') {
+            return res.status(404).json({ message: error.message });
+        }
+
+        res.status(500).json({ message: 'Internal server error' });
+    }
+});
+
 router.post('/:id/img/:type',
     authMiddleware(['bug:write']),
     [
         check('image_data')
+            .if((value, { req }) => !req.body.hash)
             .notEmpty()
-            .withMessage('Image data is required')
+            .withMessage('Image data is required unless a stored asset hash is given'),
+        check('image_data')
+            .optional()
             .matches(/^data:image\/png;base64,[A-Za-z0-9+/]+={0,2}$/)
-            .withMessage('Image must be a valid Base64 PNG format')
+            .withMessage('Image must be a valid Base64 PNG format'),
+        check('placeholder')
+            .optional()
+            .isLength({ max: PLACEHOLDER_MAX_LENGTH })
+            .withMessage(`Placeholder must be at most ${PLACEHOLDER_MAX_LENGTH} characters`)
+            .matches(/^data:image\/png;base64,[A-Za-z0-9+/]+={0,2}$/)
+            .withMessage('Placeholder must be a valid Base64 PNG format'),
+        check('hash')
+            .optional()
+            .matches(/^[0-9a-f]{32}$/)
+            .withMessage('Hash must be 32 lowercase hex characters')
     ],
     async (req, res) => {
         const bodyError = validationResult(req);
@@ -194,7 +275,7 @@ router.post('/:id/img/:type',
 
         try {
             const { id, type } = req.params;
-            const { image_data } = req.body;
+            const { image_data, placeholder, hash } = req.body;
 
             if (!['full', 'small'].includes(type)) {
                 return res.status(400).json({
@@ -202,7 +283,7 @@ router.post('/:id/img/:type',
                 });
             }
 
-            const image = await uploadBugImage(id, type, image_data);
+            const image = await uploadBugImage(id, type, image_data, placeholder, hash);
 
             res.status(200).json({
                 message: 'Bug image uploaded successfully',
@@ -211,6 +292,10 @@ router.post('/:id/img/:type',
         } catch (error) {
             log(`Error uploading bug image: ${error.message}`, 'error');
 
+            if (error.message === 'Image hash mismatch' || error.message === 'Image asset not found') {
+                return res.status(400).json({ message: error.message });
+            }
+
             if (error.message === 'Bug not found') {
                 return res.status(404).json({ message: error.message });
             }
@@ -0,0 +1,374 @@
+const router = require('express').Router();
+const zlib = require('zlib');
+const { check, validationResult } = require('express-validator');
+const { authMiddleware } = require('../middlewares/auth.middleware');
+const {
+    getCatalogArtifact,
+    getCatalogArtifactEtag,
+    putCatalogArtifact,
+    getCatalogVersion,
+    recordCatalogChanges,
+    getCatalogChanges,
+    DEMAND_CATEGORIES,
+    getCatalogDemand,
+} = require('../controllers/catalog.controller');
+const {
+    AVAILABILITY_TYPES,
+    getAvailableCreatures,
+} = require('../controllers/availability.controller');
+const {
+    findMissingImageAssets,
+    putImageAsset,
+} = require('../controllers/imageAsset.controller');
+const { log } = require('../utils/logger.util');
+
+const ARTIFACT_NAME_PATTERN = /^[a-z0-9][a-z0-9._-]*$/;
+const BUNDLE_ARTIFACT = 'catalog-bundle';
+const SPRITE_TYPES = ['villager', 'fish', 'bug'];
+const IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable';
+
+const sendArtifact = (req, res, artifact, cacheControl = 'public, max-age=0, must-revalidate') => {
+    res.set('ETag', artifact.etag);
+    res.set('Cache-Control', cacheControl);
+    res.set('Vary', 'Accept-Encoding');
+
+    if (req.headers['if-none-match'] === artifact.etag) {
+        return res.status(304).end();
+    }
+
+    res.status(200).type(artifact.content_type);
+
+    if (artifact.content_encoding === 'gzip') {
+        if (!req.acceptsEncodings('gzip')) {
+            return res.send(zlib.gunzipSync(artifact.data));
+        }
+        res.set('Content-Encoding', 'gzip');
+    }
+
+    res.send(artifact.data);
+};
+
+router.get('/artifact/:name', async (req, res) => {
+    try {
+        const { name } = req.params;
+
+        if (!ARTIFACT_NAME_PATTERN.test(name)) {
+            return res.status(400).json({ message: 'Invalid artifact name' });
+        }
+
+        const artifact = await getCatalogArtifact(name);
+        sendArtifact(req, res, artifact);
+    } catch (error) {
+        log(`Error retrieving catalog artifact: ${error.message}`, 'error');
+
+        if (error.message === 'Artifact not found') {
+            return res.status(404).json({ message: error.message });
+        }
+
+        res.status(500).json({ message: 'Internal server error' });
+    }
+});
+
+router.get('/bundle', async (req, res) => {
+    try {
+        const etag = await getCatalogArtifactEtag(BUNDLE_ARTIFACT);
+
+        if (etag && req.headers['if-none-match'] === etag) {
+            res.set('ETag', etag);
+            res.set('Cache-Control', 'public, max-age=0, must-revalidate');
+            return res.status(304).end();
+        }
+
+        const artifact = await getCatalogArtifact(BUNDLE_ARTIFACT);
+        sendArtifact(req, res, artifact);
+    } catch (error) {
+        log(`Error retrieving catalog bundle: ${error.message}`, 'error');
+
+        if (error.message === 'Artifact not found') {
+            return res.status(404).json({ message: 'Catalog bundle not found' });
+        }
+
+        res.status(500).json({ message: 'Internal server error' });
+    }
+});
+
+router.get('/sprites/:type', [
+    check('type').isIn(SPRITE_TYPES).withMessage(`Type must be one of: ${SPRITE_TYPES.join(', ')}`)
+], async (req, res) => {
+    const paramError = validationResult(req);
+    if (!paramError.isEmpty()) {
+        return res.status(400).json({ errors: paramError.array() });
+    }
+
+    try {
+        const artifact = await getCatalogArtifact(`sprites-${req.params.type}.json`);
+        sendArtifact(req, res, artifact);
+    } catch (error) {
+        log(`Error retrieving sprite map: ${error.message}`, 'error');
+
+        if (error.message === 'Artifact not found') {
+            return res.status(404).json({ message: 'Sprite map not found' });
+        }
+
+        res.status(500).json({ message: 'Internal server error' });
+    }
+});
+
+router.get('/sprites/:type/:index.png', [
+    check('type').isIn(SPRITE_TYPES).withMessage(`Type must be one of: ${SPRITE_TYPES.join(', ')}`),
+    check('index').isInt({ min: 0 }).withMessage('Index must be a non-negative integer')
+], async (req, res) => {
+    const paramError = validationResult(req);
+    if (!paramError.isEmpty()) {
+        return res.status(400).json({ errors: paramError.array() });
+    }
+
+    try {
+        const { type, index } = req.params;
+        const artifact = await getCatalogArtifact(`sprites-${type}-${parseInt(index)}.png`);
+
+        // Atlas URLs in the sprite map carry the content hash, so a matching ?v= never changes
+        if (req.query.v && `"${req.query.v}"` === artifact.etag) {
+            return sendArtifact(req, res, artifact, IMMUTABLE_CACHE_CONTROL);
+        }
+
+        sendArtifact(req, res, artifact);
+    } catch (error) {
+        log(`Error retrieving sprite atlas: ${error.message}`, 'error');
+
+        if (error.message === 'Artifact not found') {
+            return res.status(404).json({ message: 'Sprite atlas not found' });
+        }
+
+        res.status(500).json({ message: 'Internal server error' });
+    }
+});
+
+router.put('/artifact/:name',
+    authMiddleware(['catalog:write']),
+    [
+        check('name').matches(ARTIFACT_NAME_PATTERN).withMessage('Invalid artifact name'),
+        check('content_type').isString().notEmpty().withMessage('Content type is required'),
+        check('encoding').optional().isIn(['utf8', 'base64']).withMessage('Encoding must be utf8 or base64'),
+        check('content_encoding').optional({ nullable: true }).isIn(['gzip']).withMessage('Content encoding must be gzip'),
+        check('data').isString().notEmpty().withMessage('Data is required')
+    ],
+    async (req, res) => {
+        const bodyError = validationResult(req);
+        if (!bodyError.isEmpty()) {
+            return res.status(400).json({ errors: bodyError.array() });
+        }
+
+        try {
+            const { name } = req.params;
+            const { content_type, content_encoding, encoding, data } = req.body;
+
+            const artifact = await putCatalogArtifact(name, content_type, data, encoding || 'utf8', content_encoding || null);
+
+            res.status(200).json({
+                message: 'Catalog artifact stored successfully',
+                artifact
+            });
+        } catch (error) {
+            log(`Error storing catalog artifact: ${error.message}`, 'error');
+            res.status(500).json({ message: 'Internal server error' });
+        }
+    }
+);
+
+router.post('/assets/missing',
+    authMiddleware(['catalog:write']),
+    [
+        check('hashes').isArray({ min: 1, max: 1000 }).withMessage('Hashes must be an array of 1 to 1000 items'),
+        check('hashes.*').matches(/^[0-9a-f]{32}$/).withMessage('Hashes must be 32 lowercase hex characters')
+    ],
+    async (req, res) => {
+        const bodyError = validationResult(req);
+        if (!bodyError.isEmpty()) {
+            return res.status(400).json({ errors: bodyError.array() });
+        }
+
+        try {
+            const missing = await findMissingImageAssets(req.body.hashes);
+
+            res.status(200).json({
+                message: 'Missing image assets retrieved successfully',
+                missing
+            });
+        } catch (error) {
+            log(`Error checking image assets: ${error.message}`, 'error');
+            res.status(500).json({ message: 'Internal server error' });
+        }
+    }
+);
+
+router.put('/assets/:hash',
+    authMiddleware(['catalog:write']),
+    [
+        check('hash').matches(/^[0-9a-f]{32}$/).withMessage('Hash must be 32 lowercase hex characters'),
+        check('image_data')
+            .notEmpty()
+            .withMessage('Image data is required')
+            .matches(/^data:image\/png;base64,[A-Za-z0-9+/]+={0,2}$/)
+            .withMessage('Image must be a valid Base64 PNG format')
+    ],
+    async (req, res) => {
+        const bodyError = validationResult(req);
+        if (!bodyError.isEmpty()) {
+            return res.status(400).json({ errors: bodyError.array() });
+        }
+
+        try {
+            const asset = await putImageAsset(req.body.image_data, req.params.hash);
+
+            res.status(200).json({
+                message: 'Image asset stored successfully',
+                asset
+            });
+        } catch (error) {
+            log(`Error storing image asset: ${error.message}`, 'error');
+
+            if (error.message === 'Image hash mismatch') {
+                return res.status(400).json({ message: error.message });
+            }
+
+            res.status(500).json({ message: 'Internal server error' });
+        }
+    }
+);
+
+router.get('/version', async (req, res) => {
+    try {
+        const version = await getCatalogVersion();
+
+        res.status(200).json({
+            message: 'Catalog version retrieved successfully',
+            version
+        });
+    } catch (error) {
+        log(`Error retrieving catalog version: ${error.message}`, 'error');
+        res.status(500).json({ message: 'Internal server error' });
+    }
+});
+
+router.post('/version',
+    authMiddleware(['catalog:write']),
+    [
+        check('changes').isArray({ min: 1 }).withMessage('Changes must be a non-empty array'),
+        check('changes.*.type').isIn(['villager', 'fish', 'bug', 'fossil']).withMessage('Change type must be villager, fish, bug or fossil'),
+        check('changes.*.id').isMongoId().withMessage('Change id must be a valid ID'),
+        check('changes.*.images').optional().isArray().withMessage('Change images must be an array')
+    ],
+    async (req, res) => {
+        const bodyError = validationResult(req);
+        if (!bodyError.isEmpty()) {
+            return res.status(400).json({ errors: bodyError.array() });
+        }
+
+        try {
+            const version = await recordCatalogChanges(req.body.changes);
+
+            res.status(201).json({
+                message: 'Catalog version created successfully',
+                version
+            });
+        } catch (error) {
+            log(`Error recording catalog changes: ${error.message}`, 'error');
+
+            if (error.message === 'Invalid catalog change') {
+                return res.status(400).json({ message: error.message });
+            }
+
+            if (error.message === 'Lock not acquired') {
+                return res.status(503).json({ message: 'Catalog is being published, retry shortly' });
+            }
+
+            res.status(500).json({ message: 'Internal server error' });
+        }
+    }
+);
+
+router.get('/changes', [
+    check('since').isInt({ min: 0 }).withMessage('Since must be a non-negative catalog version')
+], async (req, res) => {
+    const queryError = validationResult(req);
+    if (!queryError.isEmpty()) {
+        return res.status(400).json({ errors: queryError.array() });
+    }
+
+    try {
+        const result = await getCatalogChanges(parseInt(req.query.since));
+
+        res.status(200).json({
+            message: 'Catalog changes retrieved successfully',
+            ...result
+        });
+    } catch (error) {
+        log(`Error retrieving catalog changes: ${error.message}`, 'error');
+        res.status(500).json({ message: 'Internal server error' });
+    }
+});
+
+router.get('/demand',
+    authMiddleware(['catalog:write']),
+    [
+        check('category').isIn(DEMAND_CATEGORIES).withMessage(`Category must be one of: ${DEMAND_CATEGORIES.join(', ')}`)
+    ],
+    async (req, res) => {
+        const queryError = validationResult(req);
+        if (!queryError.isEmpty()) {
+            return res.status(400).json({ errors: queryError.array() });
+        }
+
+        try {
+            const result = await getCatalogDemand(req.query.category);
+
+            res.status(200).json({
+                message: 'Catalog demand retrieved successfully',
+                ...result
+            });
+        } catch (error) {
+            log(`Error retrieving catalog demand: ${error.message}`, 'error');
+            res.status(500).json({ message: 'Internal server error' });
+        }
+    }
+);
+
+router.get('/available', [
+    check('hemisphere').isIn(['north', 'south']).withMessage('Hemisphere must be north or south'),
+    check(['month', 'month_from', 'month_to']).optional().isInt({ min: 1, max: 12 }).withMessage('Months must be between 1 and 12'),
+    check(['hour', 'hour_from', 'hour_to']).optional().isInt({ min: 0, max: 23 }).withMessage('Hours must be between 0 and 23'),
+    check('match').optional().isIn(['any', 'all']).withMessage('Match must be any or all'),
+    check('type').optional().isIn(AVAILABILITY_TYPES).withMessage(`Type must be one of: ${AVAILABILITY_TYPES.join(', ')}`)
+], async (req, res) => {
+    const queryError = validationResult(req);
+    if (!queryError.isEmpty()) {
+        return res.status(400).json({ errors: queryError.array() });
+    }
+
+    try {
+        const { hemisphere, month, hour, month_from, month_to, hour_from, hour_to, match, type } = req.query;
+        const range = {
+            monthFrom: parseInt(month ?? month_from ?? 1),
+            monthTo: parseInt(month ?? month_to ?? 12),
+            hourFrom: parseInt(hour ?? hour_from ?? 0),
+            hourTo: parseInt(hour ?? hour_to ?? 23)
+        };
+
+        const creatures = await getAvailableCreatures(hemisphere, range, {
+            types: type ? [type] : undefined,
+            match
+        });
+
+        res.status(200).json({
+            message: 'Available creatures retrieved successfully',
+            count: creatures.length,
+            creatures
+        });
+    } catch (error) {
+        log(`Error retrieving available creatures: ${error.message}`, 'error');
+        res.status(500).json({ message: 'Internal server error' });
+    }
+});
+
+module.exports = router;
@@ -13,8 +13,12 @@ const {
     getFishImage,
     uploadFishImage,
     deleteFishImage,
+    getFishImageHashes,
 } = require('../controllers/fishImage.controller');
 const { log } = require('../utils/logger.util');
+const { sendImage, sendHashedImage } = require('../utils/image.util');
+
+const PLACEHOLDER_MAX_LENGTH = 4096;
 
 router.get('/', async (req, res) => {
         try {
@@ -67,6 +71,8 @@ router.post('/',
         check('price.cj').isInt({ min: 0 }).withMessage('CJ price must be a non-negative integer'),
         check('price.shop').isInt({ min: 0 }).withMessage('Shop price must be a non-negative integer'),
         check('rarity').isIn(['common', 'uncommon', 'rare']).withMessage('Rarity must be common, uncommon, or rare'),
+        check('availability_bits.north').optional().matches(/^[0-9a-f]{72}$/).withMessage('North availability bits must be 72 hex digits'),
+        check('availability_bits.south').optional().matches(/^[0-9a-f]{72}$/).withMessage('South availability bits must be 72 hex digits'),
         check('availability.north').optional().isObject().withMessage('North availability must be an object'),
         check('availability.south').optional().isObject().withMessage('South availability must be an object')
     ],
@@ -102,6 +108,8 @@ router.put('/:id',
         check('price.cj').optional().isInt({ min: 0 }).withMessage('CJ price must be a non-negative integer'),
         check('price.shop').optional().isInt({ min: 0 }).withMessage('Shop price must be a non-negative integer'),
         check('rarity').optional().isIn(['common', 'uncommon', 'rare']).withMessage('Rarity must be common, uncommon, or rare'),
+        check('availability_bits.north').optional().matches(/^[0-9a-f]{72}$/).withMessage('North availability bits must be 72 hex digits'),
+        check('availability_bits.south').optional().matches(/^[0-9a-f]{72}$/).withMessage('South availability bits must be 72 hex digits'),
         check('availability.north').optional().isObject().withMessage('North availability must be an object'),
         check('availability.south').optional().isObject().withMessage('South availability must be an object')
     ],
@@ -151,6 +159,20 @@ router.delete('/:id',
     }
 );
 
+router.get('/img/hashes', async (req, res) => {
+    try {
+        const hashes = await getFishImageHashes();
+
+        res.status(200).json({
+            message: 'Fish image hashes retrieved successfully',
+            hashes
+        });
+    } catch (error) {
+        log(`Error retrieving fish image hashes: ${error.message}`, 'error');
+        res.status(500).json({ message: 'Internal server error' });
+    }
+});
+
 router.get('/:id/img/:type', async (req, res) => {
     try {
         const { id, type } = req.params;
@@ -178,14 +200,73 @@ router.get('/:id/img/:type', async (req, res) => {
     }
 });
 
+router.get('/:id/img/:type/raw', async (req, res) => {
+    try {
+        const { id, type } = req.params;
+
+        if (!['full', 'small'].includes(type)) {
+            return res.status(400).json({
+                message: 'Type must be one of: full, small'
+            });
+        }
+
+        const image = await getFishImage(id, type);
+        sendImage(req, res, image);
+    } catch (error) {
+        log(`Error retrieving fish image: ${error.message}`, 'error');
+
+        if (error.message === 'Fish not found' || error.message === 'Image not found') {
+            return res.status(404).json({ message: error.message });
+        }
+
+        res.status(500).json({ message: 'Internal server error' });
+    }
+});
+
+router.get('/:id/img/:type/:hash.png', async (req, res) => {
+    try {
+        const { id, type } = req.params;
+
+        if (!['full', 'small'].includes(type)) {
+            return res.status(400).json({
+                message: 'Type must be one of: full, small'
+            });
+        }
+
+        const image = await getFishImage(id, type);
+        sendHashedImage(req, res, image, `${req.baseUrl}/${id}/img/${type}`);
+    } catch (error) {
+        log(`Error retrieving fish image: ${error.message}`, 'error');
+
+        if (error.message === 'Fish not found' || error.message === 'Image not found') {
+            return res.status(404).json({ message: error.message });
+        }
+
+        res.status(500).json({ message: 'Internal server error' });
+    }
+});
+
 router.post('/:id/img/:type',
     authMiddleware(['fish:write']),
     [
         check('image_data')
+            .if((value, { req }) => !req.body.hash)
             .notEmpty()
-            .withMessage('Image data is required')
+            .withMessage('Image data is required unless a stored asset hash is given'),
+        check('image_data')
+            .optional()
             .matches(/^data:image\/png;base64,[A-Za-z0-9+/]+={0,2}$/)
-            .withMessage('Image must be a valid Base64 PNG format')
+            .withMessage('Image must be a valid Base64 PNG format'),
+        check('placeholder')
+            .optional()
+            .isLength({ max: PLACEHOLDER_MAX_LENGTH })
+            .withMessage(`Placeholder must be at most ${PLACEHOLDER_MAX_LENGTH} characters`)
+            .matches(/^data:image\/png;base64,[A-Za-z0-9+/]+={0,2}$/)
+            .withMessage('Placeholder must be a valid Base64 PNG format'),
+        check('hash')
+            .optional()
+            .matches(/^[0-9a-f]{32}$/)
+            .withMessage('Hash must be 32 lowercase hex characters')
     ],
     async (req, res) => {
         const bodyError = validationResult(req);
@@ -195,7 +276,7 @@ router.post('/:id/img/:type',
 
         try {
             const { id, type } = req.params;
-            const { image_data } = req.body;
+            const { image_data, placeholder, hash } = req.body;
 
             if (!['full', 'small'].includes(type)) {
                 return res.status(400).json({
@@ -203,7 +284,7 @@ router.post('/:id/img/:type',
                 });
             }
 
-            const image = await uploadFishImage(id, type, image_data);
+            const image = await uploadFishImage(id, type, image_data, placeholder, hash);
 
             res.status(200).json({
                 message: 'Fish image uploaded successfully',
@@ -212,6 +293,10 @@ router.post('/:id/img/:type',
         } catch (error) {
             log(`Error uploading fish image: ${error.message}`, 'error');
 
+            if (error.message === 'Image hash mismatch' || error.message === 'Image asset not found') {
+                return res.status(400).json({ message: error.message });
+            }
+
             if (error.message === 'Fish not found') {
                 return res.status(404).json({ message: error.message });
             }
@@ -13,8 +13,12 @@ const {
     getFossilImage,
     uploadFossilImage,
     deleteFossilImage,
+    getFossilImageHashes,
 } = require('../controllers/fossilImage.controller');
 const { log } = require('../utils/logger.util');
+const { sendImage, sendHashedImage } = require('../utils/image.util');
+
+const PLACEHOLDER_MAX_LENGTH = 4096;
 
 router.get('/', async (req, res) => {
         try {
@@ -150,6 +154,20 @@ router.delete('/:id',
     }
 );
 
+router.get('/img/hashes', async (req, res) => {
+    try {
+        const hashes = await getFossilImageHashes();
+
+        res.status(200).json({
+            message: 'Fossil image hashes retrieved successfully',
+            hashes
+        });
+    } catch (error) {
+        log(`Error retrieving fossil image hashes: ${error.message}`, 'error');
+        res.status(500).json({ message: 'Internal server error' });
+    }
+});
+
 router.get('/:id/img/:partName', async (req, res) => {
     try {
         const { id, partName } = req.params;
@@ -171,14 +189,61 @@ router.get('/:id/img/:partName', async (req, res) => {
     }
 });
 
+router.get('/:id/img/:partName/raw', async (req, res) => {
+    try {
+        const { id, partName } = req.params;
+
+        const image = await getFossilImage(id, partName);
+        sendImage(req, res, image);
+    } catch (error) {
+        log(`Error retrieving fossil image: ${error.message}`, 'error');
+
+        if (error.message === 'Fossil not found' || error.message === 'Image not found') {
+            return res.status(404).json({ message: error.message });
+        }
+
+        res.status(500).json({ message: 'Internal server error' });
+    }
+});
+
+router.get('/:id/img/:partName/:hash.png', async (req, res) => {
+    try {
+        const { id, partName } = req.params;
+
+        const image = await getFossilImage(id, partName);
+        sendHashedImage(req, res, image, `${req.baseUrl}/${id}/img/${partName}`);
+    } catch (error) {
+        log(`Error retrieving fossil image: ${error.message}`, 'error');
+
+        if (error.message === 'Fossil not found' || error.message === 'Image not found') {
+            return res.status(404).json({ message: error.message });
+        }
+
+        res.status(500).json({ message: 'Internal server error' });
+    }
+});
+
 router.post('/:id/img/:partName',
     authMiddleware(['fossil:write']),
     [
         check('image_data')
+            .if((value, { req }) => !req.body.hash)
             .notEmpty()
-            .withMessage('Image data is required')
+            .withMessage('Image data is required unless a stored asset hash is given'),
+        check('image_data')
+            .optional()
+            .matches(/^data:image\/png;base64,[A-Za-z0-9+/]+={0,2}$/)
+            .withMessage('Image must be a valid Base64 PNG format'),
+        check('placeholder')
+            .optional()
+            .isLength({ max: PLACEHOLDER_MAX_LENGTH })
+            .withMessage(`Placeholder must be at most ${PLACEHOLDER_MAX_LENGTH} characters`)
             .matches(/^data:image\/png;base64,[A-Za-z0-9+/]+={0,2}$/)
-            .withMessage('Image must be a valid Base64 PNG format')
+            .withMessage('Placeholder must be a valid Base64 PNG format'),
+        check('hash')
+            .optional()
+            .matches(/^[0-9a-f]{32}$/)
+            .withMessage('Hash must be 32 lowercase hex characters')
     ],
     async (req, res) => {
         const bodyError = validationResult(req);
@@ -188,9 +253,9 @@ router.post('/:id/img/:partName',
 
         try {
             const { id, partName } = req.params;
-            const { image_data } = req.body;
+            const { image_data, placeholder, hash } = req.body;
 
-            const image = await uploadFossilImage(id, partName, image_data);
+            const image = await uploadFossilImage(id, partName, image_data, placeholder, hash);
 
             res.status(200).json({
                 message: 'Fossil image uploaded successfully',
@@ -199,6 +264,10 @@ router.post('/:id/img/:partName',
         } catch (error) {
             log(`Error uploading fossil image: ${error.message}`, 'error');
 
+            if (error.message === 'Image hash mismatch' || error.message === 'Image asset not found') {
+                return res.status(400).json({ message: error.message });
+            }
+
             if (error.message === 'Fossil not found') {
                 return res.status(404).json({ message: error.message });
             }
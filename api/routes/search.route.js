@@ -0,0 +1,38 @@
+const router = require('express').Router();
+const { check, validationResult } = require('express-validator');
+const { SEARCH_TYPES, searchCatalog } = require('../controllers/search.controller');
+const { log } = require('../utils/logger.util');
+
+router.get('/', [
+    check('q').isString().trim().notEmpty().isLength({ max: 64 }).withMessage('Query must be between 1 and 64 characters'),
+    check('type').optional().isIn(SEARCH_TYPES).withMessage(`Type must be one of: ${SEARCH_TYPES.join(', ')}`),
+    check('limit').optional().isInt({ min: 1, max: 100 }).withMessage('Limit must be between 1 and 100')
+], async (req, res) => {
+    const queryError = validationResult(req);
+    if (!queryError.isEmpty()) {
+        return res.status(400).json({ errors: queryError.array() });
+    }
+
+    try {
+        const results = await searchCatalog(req.query.q, {
+            types: req.query.type ? [req.query.type] : undefined,
+            limit: req.query.limit ? parseInt(req.query.limit) : undefined
+        });
+
+        res.status(200).json({
+            message: 'Search completed successfully',
+            count: results.length,
+            results
+        });
+    } catch (error) {
+        log(`Error searching catalog: ${error.message}`, 'error');
+
+        if (error.message === 'Search index not available') {
+            return res.status(503).json({ message: error.message });
+        }
+
+        res.status(500).json({ message: 'Internal server error' });
+    }
+});
+
+module.exports = router;
@@ -13,8 +13,12 @@ const {
     getVillagerImage,
     uploadVillagerImage,
     deleteVillagerImage,
+    getVillagerImageHashes,
 } = require('../controllers/villagerImage.controller');
 const { log } = require('../utils/logger.util');
+const { sendImage, sendHashedImage } = require('../utils/image.util');
+
+const PLACEHOLDER_MAX_LENGTH = 4096;
 
 router.get('/', async (req, res) => {
         try {
@@ -158,6 +162,20 @@ router.delete('/:id',
     }
 );
 
+router.get('/img/hashes', async (req, res) => {
+    try {
+        const hashes = await getVillagerImageHashes();
+
+        res.status(200).json({
+            message: 'Villager image hashes retrieved successfully',
+            hashes
+        });
+    } catch (error) {
+        log(`Error retrieving villager image hashes: ${error.message}`, 'error');
+        res.status(500).json({ message: 'Internal server error' });
+    }
+});
+
 router.get('/:id/img/:type', async (req, res) => {
     try {
         const { id, type } = req.params;
@@ -185,14 +203,73 @@ router.get('/:id/img/:type', async (req, res) => {
     }
 });
 
+router.get('/:id/img/:type/raw', async (req, res) => {
+    try {
+        const { id, type } = req.params;
+
+        if (!['full', 'small', 'interior', 'exterior', 'shape', 'roof', 'siding', 'door'].includes(type)) {
+            return res.status(400).json({
+                message: 'Type must be one of: full, small, interior, exterior, shape, roof, siding, door'
+            });
+        }
+
+        const image = await getVillagerImage(id, type);
+        sendImage(req, res, image);
+    } catch (error) {
+        log(`Error retrieving villager image: ${error.message}`, 'error');
+
+        if (error.message === 'Villager not found' || error.message === 'Image not found') {
+            return res.status(404).json({ message: error.message });
+        }
+
+        res.status(500).json({ message: 'Internal server error' });
+    }
+});
+
+router.get('/:id/img/:type/:hash.png', async (req, res) => {
+    try {
+        const { id, type } = req.params;
+
+        if (!['full', 'small', 'interior', 'exterior', 'shape', 'roof', 'siding', 'door'].includes(type)) {
+            return res.status(400).json({
+                message: 'Type must be one of: full, small, interior, exterior, shape, roof, siding, door'
+            });
+        }
+
+        const image = await getVillagerImage(id, type);
+        sendHashedImage(req, res, image, `${req.baseUrl}/${id}/img/${type}`);
+    } catch (error) {
+        log(`Error retrieving villager image: ${error.message}`, 'error');
+
+        if (error.message === 'Villager not found' || error.message === 'Image not found') {
+            return res.status(404).json({ message: error.message });
+        }
+
+        res.status(500).json({ message: 'Internal server error' });
+    }
+});
+
 router.post('/:id/img/:type',
     authMiddleware(['villager:write']),
     [
         check('image_data')
+            .if((value, { req }) => !req.body.hash)
             .notEmpty()
-            .withMessage('Image data is required')
+            .withMessage('Image data is required unless a stored asset hash is given'),
+        check('image_data')
+            .optional()
             .matches(/^data:image\/png;base64,[A-Za-z0-9+/]+={0,2}$/)
-            .withMessage('Image must be a valid Base64 PNG format')
+            .withMessage('Image must be a valid Base64 PNG format'),
+        check('placeholder')
+            .optional()
+            .isLength({ max: PLACEHOLDER_MAX_LENGTH })
+            .withMessage(`Placeholder must be at most ${PLACEHOLDER_MAX_LENGTH} characters`)
+            .matches(/^data:image\/png;base64,[A-Za-z0-9+/]+={0,2}$/)
+            .withMessage('Placeholder must be a valid Base64 PNG format'),
+        check('hash')
+            .optional()
+            .matches(/^[0-9a-f]{32}$/)
+            .withMessage('Hash must be 32 lowercase hex characters')
     ],
     async (req, res) => {
         const bodyError = validationResult(req);
@@ -202,7 +279,7 @@ router.post('/:id/img/:type',
 
         try {
             const { id, type } = req.params;
-            const { image_data } = req.body;
+            const { image_data, placeholder, hash } = req.body;
 
             if (!['full', 'small', 'interior', 'exterior', 'shape', 'roof', 'siding', 'door'].includes(type)) {
                 return res.status(400).json({
@@ -210,7 +287,7 @@ router.post('/:id/img/:type',
                 });
             }
 
-            const image = await uploadVillagerImage(id, type, image_data);
+            const image = await uploadVillagerImage(id, type, image_data, placeholder, hash);
 
             res.status(200).json({
                 message: 'Villager image uploaded successfully',
@@ -219,6 +296,10 @@ router.post('/:id/img/:type',
         } catch (error) {
             log(`Error uploading villager image: ${error.message}`, 'error');
 
+            if (error.message === 'Image hash mismatch' || error.message === 'Image asset not found') {
+                return res.status(400).json({ message: error.message });
+            }
+
             if (error.message === 'Villager not found') {
                 return res.status(404).json({ message: error.message });
             }
@@ -0,0 +1,37 @@
+// Bit month_index * 24 + hour of each hemisphere matrix, as packed by populate/availability.py
+
+const HOURS = 24;
+const MONTHS = 12;
+
+const parseAvailabilityBits = (hex) => (hex ? BigInt(`0x${hex}`) : 0n);
+
+const wrappingRange = (from, to, size) => {
+    const values = [];
+    let value = from;
+    while (true) {
+        values.push(value);
+        if (value === to) {
+            return values;
+        }
+        value = (value + 1) % size;
+    }
+};
+
+const availabilityMask = ({ monthFrom = 1, monthTo = MONTHS, hourFrom = 0, hourTo = HOURS - 1 } = {}) => {
+    let hours = 0n;
+    for (const hour of wrappingRange(hourFrom, hourTo, HOURS)) {
+        hours |= 1n << BigInt(hour);
+    }
+
+    let mask = 0n;
+    for (const month of wrappingRange(monthFrom - 1, monthTo - 1, MONTHS)) {
+        mask |= hours << BigInt(month * HOURS);
+    }
+    return mask;
+};
+
+const matchesAvailability = (bits, mask, match = 'any') => (
+    match === 'all' ? (bits & mask) === mask : (bits & mask) !== 0n
+);
+
+module.exports = { HOURS, MONTHS, parseAvailabilityBits, availabilityMask, matchesAvailability };
@@ -0,0 +1,63 @@
+const crypto = require('crypto');
+
+const IMAGE_DATA_PREFIX = 'data:image/png;base64,';
+const REVALIDATE_CACHE_CONTROL = 'public, max-age=0, must-revalidate';
+const IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable';
+
+const decodeImageData = (imageData) => Buffer.from(imageData.slice(IMAGE_DATA_PREFIX.length), 'base64');
+
+const hashImageBytes = (buffer) => crypto.createHash('sha256').update(buffer).digest('hex').slice(0, 32);
+
+// Images stored before hashes were recorded get theirs computed on read
+const getImageHash = (image) => image.hash || hashImageBytes(decodeImageData(image.image_data));
+
+// Fossil part names ("T. rex skull") key the per-part image maps; MongoDB field names can't contain
+// dots or start with $, so those characters are stored as their full-width forms
+const encodePartKey = (partName) => partName.replace(/\./g, '\uFF0E').replace(/^\$/, '\uFF04');
+
+const decodePartKeys = (map) => {
+    if (!map) {
+        return map;
+    }
+
+    const decoded = {};
+    for (const [key, value] of Object.entries(map)) {
+        decoded[key.replace(/\uFF0E/g, '.').replace(/^\uFF04/, '$')] = value;
+    }
+    return decoded;
+};
+
+const sendImage = (req, res, image, cacheControl = REVALIDATE_CACHE_CONTROL) => {
+    const etag = `"${getImageHash(image)}"`;
+
+    res.set('ETag', etag);
+    res.set('Cache-Control', cacheControl);
+
+    if (req.headers['if-none-match'] === etag) {
+        return res.status(304).end();
+    }
+
+    res.status(200).type('image/png').send(decodeImageData(image.image_data));
+};
+
+// Serve the image under its content-hash URL, or redirect a stale hash to the current one
+const sendHashedImage = (req, res, image, currentUrl) => {
+    const hash = getImageHash(image);
+
+    if (req.params.hash !== hash) {
+        res.set('Cache-Control', REVALIDATE_CACHE_CONTROL);
+        return res.redirect(302, `${currentUrl}/${hash}.png`);
+    }
+
+    sendImage(req, res, image, IMMUTABLE_CACHE_CONTROL);
+};
+
+module.exports = {
+    decodeImageData,
+    hashImageBytes,
+    getImageHash,
+    encodePartKey,
+    decodePartKeys,
+    sendImage,
+    sendHashedImage
+};
@@ -1,3 +1,4 @@
+const crypto = require('crypto');
 const redis = require('redis');
 const { log } = require('./logger.util');
 
@@ -32,4 +33,27 @@ const getRedisClient = () => {
     return redisClient;
 };
 
-module.exports = { initRedis, getRedisClient };
+// Delete the lock only if it still holds our token, so an expired lock taken over by another caller is left alone
+const RELEASE_LOCK_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0";
+
+// Run fn while holding a Redis lock shared by every API instance; the TTL frees it if the holder dies
+const withRedisLock = async (key, ttlMs, fn, waitMs = ttlMs) => {
+    const redisClient = getRedisClient();
+    const token = crypto.randomBytes(16).toString('hex');
+    const deadline = Date.now() + waitMs;
+
+    while (!(await redisClient.set(key, token, { NX: true, PX: ttlMs }))) {
+        if (Date.now() >= deadline) {
+            throw new Error('Lock not acquired');
+        }
+        await new Promise(resolve => setTimeout(resolve, 50));
+    }
+
+    try {
+        return await fn();
+    } finally {
+        await redisClient.eval(RELEASE_LOCK_SCRIPT, { keys: [key], arguments: [token] });
+    }
+};
+
+module.exports = { initRedis, getRedisClient, withRedisLock };
@@ -0,0 +1,53 @@
+// Mirrors populate/search_index.py so queries fold exactly like the indexed names
+
+const CJK_PATTERN = /[\u1100-\u11ff\u3040-\u30ff\u3130-\u318f\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]/;
+const WORD_PATTERN = /[\p{L}\p{N}]+/gu;
+
+const foldText = (text) => {
+    const folded = String(text)
+        .normalize('NFKD')
+        .replace(/[\u0300-\u036f]/g, '')
+        .normalize('NFC')
+        .toLowerCase();
+
+    return folded.replace(/[\u30a1-\u30f6]/g, (char) => String.fromCharCode(char.charCodeAt(0) - 0x60));
+};
+
+const isCjk = (char) => CJK_PATTERN.test(char);
+
+const splitRuns = (folded) => {
+    const runs = [];
+
+    for (const word of folded.match(WORD_PATTERN) || []) {
+        let current = '';
+        for (const char of word) {
+            if (current && isCjk(current[current.length - 1]) !== isCjk(char)) {
+                runs.push(current);
+                current = '';
+            }
+            current += char;
+        }
+        if (current) {
+            runs.push(current);
+        }
+    }
+
+    return runs;
+};
+
+const queryTerms = (run, maxPrefix) => {
+    if (!isCjk(run[0])) {
+        return [run.slice(0, maxPrefix)];
+    }
+    if (run.length === 1) {
+        return [run];
+    }
+
+    const bigrams = [];
+    for (let i = 0; i < run.length - 1; i++) {
+        bigrams.push(run.slice(i, i + 2));
+    }
+    return bigrams;
+};
+
+module.exports = { foldText, isCjk, splitRuns, queryTerms };
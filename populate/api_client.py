@@ -0,0 +1,366 @@
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import requests
+
+ENTITY_TYPES = ('villager', 'fish', 'bug', 'fossil')
+LIST_KEYS = {'villager': 'villagers', 'fish': 'fishes', 'bug': 'bugs', 'fossil': 'fossils'}
+DEFAULT_TIMEOUT = (10, 60)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RETRY_TOTAL = 3
+RETRY_BACKOFF = 0.5
+# POST /catalog/assets/missing accepts at most this many hashes per request
+ASSET_BATCH_SIZE = 1000
+DEFAULT_TOKEN_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'thibou', 'system-token.json')
+# Tokens are refreshed this many seconds before they expire
+TOKEN_REFRESH_MARGIN = 300
+# Request bodies at least this large are sent gzipped; base64 images shrink by about a quarter
+GZIP_MIN_BYTES = 16 * 1024
+GZIP_LEVEL = 1
+
+try:
+    import fcntl
+except ImportError:
+    # No cross-process lock (Windows): concurrent workers may each authenticate once
+    fcntl = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger('populate.api')
+
+
+def mount_retries(session: 'requests.Session') -> 'requests.Session':
+    """Retry idempotent requests on connection errors and 429/5xx responses with exponential backoff"""
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    adapter = HTTPAdapter(max_retries=Retry(
+        total=RETRY_TOTAL,
+        backoff_factor=RETRY_BACKOFF,
+        status_forcelist=RETRY_STATUSES,
+        raise_on_status=False
+    ))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def dumps(body: Any) -> bytes:
+    """Compact UTF-8 JSON, with orjson when it is installed"""
+    if orjson:
+        return orjson.dumps(body)
+    return json.dumps(body, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def encode_body(body: Any, gzip_min_bytes: Optional[int] = GZIP_MIN_BYTES) -> Tuple[Optional[bytes], Optional[str]]:
+    """Serialize a JSON request body once, gzipped when it reaches gzip_min_bytes; returns (data, Content-Encoding)"""
+    if body is None:
+        return None, None
+    data = dumps(body)
+    if gzip_min_bytes is not None and len(data) >= gzip_min_bytes:
+        return gzip.compress(data, compresslevel=GZIP_LEVEL), 'gzip'
+    return data, None
+
+
+def jwt_claims(token: str) -> Dict:
+    """Payload of a JWT, read without verifying the signature; empty when it cannot be decoded"""
+    try:
+        payload = token.split('.')[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+    except (AttributeError, IndexError, ValueError):
+        return {}
+    return claims if isinstance(claims, dict) else {}
+
+
+def jwt_expiry(token: str) -> Optional[float]:
+    """exp claim of a JWT in seconds since the epoch"""
+    try:
+        return float(jwt_claims(token)['exp'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def token_fresh(expires_at: Optional[float]) -> bool:
+    return expires_at is None or expires_at - time.time() > TOKEN_REFRESH_MARGIN
+
+
+class TokenCache:
+    """System tokens on disk by API URL and key, shared between worker processes through an exclusive file lock"""
+
+    def __init__(self, path: str = DEFAULT_TOKEN_CACHE_PATH):
+        self.path = path
+        self._lock_file = None
+
+    def acquire(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock_file = open(f"{self.path}.lock", 'a')
+        if fcntl:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+
+    def release(self) -> None:
+        if fcntl:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+        self._lock_file.close()
+        self._lock_file = None
+
+    @contextmanager
+    def locked(self):
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def _read(self) -> Dict[str, Dict]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def load(self, key: str, stale: str = None) -> Optional[Dict]:
+        """Cached {token, expires_at} unless it is the rejected token or expires within TOKEN_REFRESH_MARGIN"""
+        entry = self._read().get(key)
+        if not entry or entry.get('token') == stale or not token_fresh(entry.get('expires_at')):
+            return None
+        return entry
+
+    def store(self, key: str, token: str, expires_at: Optional[float]) -> None:
+        entries = {name: entry for name, entry in self._read().items() if token_fresh(entry.get('expires_at'))}
+        entries[key] = {'token': token, 'expires_at': expires_at}
+
+        # Written to a private temporary file and renamed so readers never see a partial file
+        temporary_path = f"{self.path}.{os.getpid()}.tmp"
+        fd = os.open(temporary_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(entries, f)
+        os.replace(temporary_path, self.path)
+
+
+class ApiCall:
+    """One API request: route, payload, accepted statuses and how to read the JSON result"""
+
+    def __init__(self, method: str, path: str, action: str, stage: str = 'fetch', body: Dict = None,
+                 params: Dict = None, auth: bool = True, ok: Tuple[int, ...] = (200, 201),
+                 result: Callable[[Dict], Any] = None, optional: bool = False):
+        self.method = method
+        self.path = path
+        self.action = action
+        self.stage = stage
+        self.body = body
+        self.params = params
+        self.auth = auth
+        self.ok = ok
+        self.result = result
+        self.optional = optional
+
+
+class ThibouApiClient:
+    """Typed methods for the API's routes, sent on a requests session with retries and one tracer span per call"""
+
+    def __init__(self, base_url: str, system_key: str = None, session: 'requests.Session' = None,
+                 timeout=DEFAULT_TIMEOUT, tracer=None, token_cache: TokenCache = None,
+                 gzip_min_bytes: Optional[int] = GZIP_MIN_BYTES):
+        import requests
+
+        self.base_url = base_url.rstrip('/')
+        self.system_key = system_key
+        self.session = session or mount_retries(requests.Session())
+        self.timeout = timeout
+        self.tracer = tracer
+        # None sends every body uncompressed
+        self.gzip_min_bytes = gzip_min_bytes
+        self.token_cache = token_cache
+        self.cache_key = hashlib.sha256(f"{self.base_url}\n{system_key}".encode('utf-8')).hexdigest()[:32]
+        self.token = None
+        self.token_expires_at = None
+        self._token_lock = threading.Lock()
+
+    def ensure_token(self, stale: str = None) -> str:
+        """A system token valid for at least TOKEN_REFRESH_MARGIN, from memory, the disk cache or POST /auth/system"""
+        with self._token_lock:
+            if self._token_usable(stale):
+                return self.token
+            if not self.token_cache:
+                return self.authenticate()
+
+            with self.token_cache.locked():
+                if not self._load_cached_token(stale):
+                    self.authenticate()
+                    self._cache_token()
+            return self.token
+
+    def _execute(self, call: ApiCall):
+        if self.tracer:
+            with self.tracer.span(call.stage):
+                return self._call(call)
+        return self._call(call)
+
+    def _call(self, call: ApiCall):
+        token = self.ensure_token() if call.auth else None
+        data, encoding = encode_body(call.body, self.gzip_min_bytes)
+        status, text = self._send(call, data, encoding)
+        if status == 401 and call.auth:
+            logger.info("System token rejected, authenticating again")
+            self.ensure_token(stale=token)
+            status, text = self._send(call, data, encoding)
+        return self._parse(call, status, text)
+
+    def _send(self, call: ApiCall, data: Optional[bytes], encoding: Optional[str]) -> Tuple[int, str]:
+        response = self.session.request(
+            call.method,
+            f"{self.base_url}{call.path}",
+            data=data,
+            params=call.params,
+            headers=self._headers(call, encoding),
+            timeout=self.timeout
+        )
+        return response.status_code, response.text
+
+    def _execute_batch(self, calls: List[ApiCall], combine: Callable[[List], Any]):
+        return combine([self._execute(call) for call in calls])
+
+    def _headers(self, call: ApiCall, content_encoding: str = None) -> Dict[str, str]:
+        headers = {'Content-Type': 'application/json'}
+        if content_encoding:
+            headers['Content-Encoding'] = content_encoding
+        if call.auth and self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        return headers
+
+    def _parse(self, call: ApiCall, status: int, text: str):
+        if status == 404 and call.optional:
+            return None
+        if status not in call.ok:
+            raise Exception(f"Failed to {call.action}: {text}")
+        body = json.loads(text) if text else {}
+        return call.result(body) if call.result else body
+
+    def _store_token(self, body: Dict) -> str:
+        self.token = body['token']
+        self.token_expires_at = jwt_expiry(self.token)
+        return self.token
+
+    def _token_usable(self, stale: Optional[str]) -> bool:
+        return self.token is not None and self.token != stale and token_fresh(self.token_expires_at)
+
+    def _load_cached_token(self, stale: Optional[str]) -> bool:
+        """Adopt a token another process cached; call with the cache locked"""
+        entry = self.token_cache.load(self.cache_key, stale)
+        if not entry:
+            return False
+        self.token = entry['token']
+        self.token_expires_at = entry.get('expires_at')
+        logger.debug("Reusing cached system token")
+        return True
+
+    def _cache_token(self) -> None:
+        self.token_cache.store(self.cache_key, self.token, self.token_expires_at)
+
+    # Auth
+
+    def authenticate(self):
+        """Exchange the system key for a token used by every following call"""
+        return self._execute(ApiCall('POST', '/auth/system', 'get system token', body={'key': self.system_key},
+                                     stage='token', auth=False, ok=(200,), result=self._store_token))
+
+    # Entities
+
+    def list_entities(self, entity_type: str):
+        return self._execute(ApiCall('GET', f'/{entity_type}', f'list {LIST_KEYS[entity_type]}',
+                                     result=lambda body: body.get(LIST_KEYS[entity_type], [])))
+
+    def get_entity(self, entity_type: str, entity_id: str):
+        return self._execute(ApiCall('GET', f'/{entity_type}/{entity_id}', f'get {entity_type} {entity_id}',
+                                     result=lambda body: body.get(entity_type), optional=True))
+
+    def create_entity(self, entity_type: str, entity: Dict):
+        name = entity.get('name', {}).get('en', 'unknown')
+        return self._execute(ApiCall('POST', f'/{entity_type}', f'create {entity_type} {name}', stage='create',
+                                     body=entity, result=lambda body: body.get(entity_type, {})))
+
+    def update_entity(self, entity_type: str, entity_id: str, fields: Dict):
+        return self._execute(ApiCall('PUT', f'/{entity_type}/{entity_id}', f"update {entity_type} {', '.join(fields)}",
+                                     stage='update', body=fields, result=lambda body: body.get(entity_type, {})))
+
+    def delete_entity(self, entity_type: str, entity_id: str):
+        return self._execute(ApiCall('DELETE', f'/{entity_type}/{entity_id}', f'delete {entity_type} {entity_id}',
+                                     stage='update'))
+
+    # Images
+
+    def get_image(self, entity_type: str, entity_id: str, image_type: str):
+        """Base64 data URI of an entity image, None when it has none"""
+        return self._execute(ApiCall('GET', f'/{entity_type}/{entity_id}/img/{image_type}',
+                                     f'get {entity_type} image {image_type}',
+                                     result=lambda body: body.get('image', {}).get('image_data'), optional=True))
+
+    def warm_image(self, entity_type: str, entity_id: str, image_type: str):
+        """Have the API load an image into its cache without downloading it; None when it has none"""
+        return self._execute(ApiCall('HEAD', f'/{entity_type}/{entity_id}/img/{image_type}/raw',
+                                     f'warm {entity_type} image {image_type}', stage='warm', auth=False,
+                                     ok=(200,), optional=True))
+
+    def upload_image(self, entity_type: str, entity_id: str, image_type: str, image: Dict):
+        """Attach an image ({hash, placeholder} or {image_data}) to an entity"""
+        return self._execute(ApiCall('POST', f'/{entity_type}/{entity_id}/img/{image_type}',
+                                     f'upload {entity_type} image {image_type}', stage='upload', body=image))
+
+    def delete_image(self, entity_type: str, entity_id: str, image_type: str):
+        return self._execute(ApiCall('DELETE', f'/{entity_type}/{entity_id}/img/{image_type}',
+                                     f'delete {entity_type} image {image_type}', stage='update'))
+
+    # Bulk
+
+    def get_image_hashes(self, entity_type: str):
+        """Content hashes of every stored image of an entity type, by entity ID and image type"""
+        return self._execute(ApiCall('GET', f'/{entity_type}/img/hashes', f'get {entity_type} image hashes',
+                                     result=lambda body: body.get('hashes', {})))
+
+    def find_missing_assets(self, hashes: List[str]):
+        """Hashes the shared asset store does not hold yet, checked in batches of ASSET_BATCH_SIZE"""
+        calls = [
+            ApiCall('POST', '/catalog/assets/missing', 'check image assets', stage='upload',
+                    body={'hashes': hashes[start:start + ASSET_BATCH_SIZE]}, ok=(200,),
+                    result=lambda body: body.get('missing', []))
+            for start in range(0, len(hashes), ASSET_BATCH_SIZE)
+        ]
+        return self._execute_batch(calls, lambda results: [image_hash for missing in results for image_hash in missing])
+
+    def put_asset(self, image_hash: str, image_data: str):
+        return self._execute(ApiCall('PUT', f'/catalog/assets/{image_hash}', 'upload image asset', stage='upload',
+                                     body={'image_data': image_data}, ok=(200,)))
+
+    # Catalog
+
+    def get_catalog_version(self):
+        return self._execute(ApiCall('GET', '/catalog/version', 'get catalog version', auth=False, ok=(200,),
+                                     result=lambda body: body.get('version', 0)))
+
+    def publish_catalog_changes(self, changes: List[Dict]):
+        """Bump the catalog version with changed entity and image entries and return the new version"""
+        return self._execute(ApiCall('POST', '/catalog/version', 'publish catalog changes', stage='publish',
+                                     body={'changes': changes}, result=lambda body: body.get('version')))
+
+    def get_catalog_demand(self, category: str):
+        return self._execute(ApiCall('GET', '/catalog/demand', 'get catalog demand', params={'category': category},
+                                     ok=(200,), result=lambda body: body.get('demand', {})))
+
+    def put_artifact(self, name: str, data: str, content_type: str, encoding: str = 'utf8', content_encoding: str = None):
+        return self._execute(ApiCall('PUT', f'/catalog/artifact/{name}', f'upload catalog artifact {name}',
+                                     stage='publish',
+                                     body={'content_type': content_type, 'content_encoding': content_encoding,
+                                           'encoding': encoding, 'data': data},
+                                     result=lambda body: body.get('artifact', {})))
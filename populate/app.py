@@ -6,15 +6,21 @@ Examples:
   python app.py villagers, fishes
   python app.py <> --avoid-enhancements
   python app.py <> --avoid-translations
+  python app.py <> --trace out.json
+  python app.py villagers --only "Ankha,Raymond" --stage names
 """
 
 import sys
 import argparse
 from typing import Dict, Any
 from dotenv import load_dotenv
+from selection import STAGES, Selection, parse_list, parse_timestamp
 
 load_dotenv()
 
+# Types that write catalog entities; only their runs publish changes and rebuild catalog artifacts
+CATALOG_TYPES = ('villagers', 'fishes', 'bugs', 'fossils')
+
 class GlobalPopulateApp:
     def __init__(self):
         self.available_types = {
@@ -22,6 +28,7 @@ class GlobalPopulateApp:
             'fishes': 'fishes',
             'bugs': 'bugs',
             'fossils': 'fossils',
+            'search': 'search',
         }
 
     def get_help(self) -> str:
@@ -33,6 +40,30 @@ class GlobalPopulateApp:
             fishes                       - Populate fishes from Nookipedia API
             bugs                         - Populate bugs from Nookipedia API
             fossils                      - Populate fossils from Nookipedia API
+            search                       - Rebuild the multilingual search index from the API and publish it
+                                           (entity runs refresh it whenever they change the catalog)
+
+            Common options:
+            --trace FILE                - Export stage spans to FILE in Chrome trace format
+            --metrics-port PORT         - Serve OpenMetrics on http://127.0.0.1:PORT/metrics during the run
+            --metrics-file FILE         - Write metrics to FILE (textfile collector format) at exit
+            --profile-memory            - Report peak and retained memory per stage (tracemalloc)
+            --log-file FILE             - Write per-item log lines to FILE as JSON
+            --log-level LEVEL           - Log file level: DEBUG, INFO, WARNING or ERROR (default: INFO)
+            --snapshot FILE             - After the run, export the catalog to FILE as a memory-mappable snapshot
+            --skip-bundle               - Do not republish the first-launch catalog bundle after a full run
+            --skip-sprites              - Do not rebuild the small icon sprite atlases after a full run
+            --warm-cache                - After the run, read back written lists and images to warm the API cache
+            --warm-concurrency N        - Reads in flight while warming the cache (default: 8)
+            --engine ENGINE             - sync (default, easiest to debug) or async (one event loop, aiohttp)
+            --concurrency N             - Items processed at once by the async engine (default: 16)
+            --hedge                     - Re-send image and wiki GETs slower than their host's p95 latency
+            --hedge-budget FRACTION     - Maximum share of GETs that may be hedged (default: 0.05)
+            --only NAMES                - Only process these items, by English name (e.g. "Ankha,Raymond")
+            --stage STAGES              - Only run these stages: create, images, house, names, ranks, bundle, sprites
+                                          (partial runs only rebuild the bundle and sprites when listed here)
+            --image-types TYPES         - Only upload these image types (e.g. small,exterior)
+            --changed-since DATE        - Only process items the API updated since DATE (ISO date)
 
             Options for villagers:
             --avoid-enhancements        - Skip house enhancements (only populate base data)
@@ -80,6 +111,129 @@ class GlobalPopulateApp:
             help='skip popularity rank enhancements'
         )
 
+        parser.add_argument(
+            '--trace',
+            metavar='FILE',
+            help='export stage spans in Chrome trace format'
+        )
+
+        parser.add_argument(
+            '--metrics-port',
+            type=int,
+            metavar='PORT',
+            help='serve OpenMetrics on a local /metrics endpoint during the run'
+        )
+
+        parser.add_argument(
+            '--metrics-file',
+            metavar='FILE',
+            help='write metrics for the textfile collector at exit'
+        )
+
+        parser.add_argument(
+            '--profile-memory',
+            action='store_true',
+            help='report peak and retained memory per stage'
+        )
+
+        parser.add_argument(
+            '--log-file',
+            metavar='FILE',
+            help='write per-item log lines as JSON'
+        )
+
+        parser.add_argument(
+            '--log-level',
+            default='INFO',
+            choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+            help='log file level (default: INFO)'
+        )
+
+        parser.add_argument(
+            '--snapshot',
+            metavar='FILE',
+            help='export the catalog as a memory-mappable snapshot after the run'
+        )
+
+        parser.add_argument(
+            '--skip-bundle',
+            action='store_true',
+            help='do not republish the catalog bundle after the run'
+        )
+
+        parser.add_argument(
+            '--skip-sprites',
+            action='store_true',
+            help='do not rebuild the sprite atlases after the run'
+        )
+
+        parser.add_argument(
+            '--warm-cache',
+            action='store_true',
+            help='read back the lists and images written during the run to warm the API cache'
+        )
+
+        parser.add_argument(
+            '--warm-concurrency',
+            type=int,
+            default=8,
+            metavar='N',
+            help='reads in flight while warming the cache (default: 8)'
+        )
+
+        parser.add_argument(
+            '--engine',
+            default='sync',
+            choices=['sync', 'async'],
+            help='execution engine (default: sync)'
+        )
+
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=16,
+            metavar='N',
+            help='items processed at once by the async engine (default: 16)'
+        )
+
+        parser.add_argument(
+            '--hedge',
+            action='store_true',
+            help='hedge slow image and wiki GETs with a second request'
+        )
+
+        parser.add_argument(
+            '--hedge-budget',
+            type=float,
+            default=0.05,
+            metavar='FRACTION',
+            help='maximum share of GETs that may be hedged (default: 0.05)'
+        )
+
+        parser.add_argument(
+            '--only',
+            metavar='NAMES',
+            help='comma-separated English names of the items to process'
+        )
+
+        parser.add_argument(
+            '--stage',
+            metavar='STAGES',
+            help=f"comma-separated stages to run ({', '.join(STAGES)})"
+        )
+
+        parser.add_argument(
+            '--image-types',
+            metavar='TYPES',
+            help='comma-separated image types to upload'
+        )
+
+        parser.add_argument(
+            '--changed-since',
+            metavar='DATE',
+            help='only process items the API updated since DATE'
+        )
+
         parser.add_argument(
             '--help-types',
             action='store_true',
@@ -98,35 +252,89 @@ class GlobalPopulateApp:
 
         data_type = self.available_types[parsed_args.type]
 
+        options = {
+            'trace_path': parsed_args.trace,
+            'metrics_port': parsed_args.metrics_port,
+            'metrics_file': parsed_args.metrics_file,
+            'profile_memory': parsed_args.profile_memory,
+            'log_file': parsed_args.log_file,
+            'log_level': parsed_args.log_level,
+            'hedge': parsed_args.hedge,
+            'hedge_budget': parsed_args.hedge_budget
+        }
+
         try:
+            options['selection'] = Selection(
+                only=parse_list(parsed_args.only),
+                stages=parse_list(parsed_args.stage),
+                image_types=parse_list(parsed_args.image_types),
+                changed_since=parse_timestamp(parsed_args.changed_since) if parsed_args.changed_since else None
+            )
+            if not options['selection'].is_full:
+                print(f"Selection: {options['selection'].describe()}")
+
             if data_type == 'villagers':
                 from villagers import VillagersGlobalPopulator
                 populator = VillagersGlobalPopulator(
                     avoid_enhancements=parsed_args.avoid_enhancements,
                     avoid_translations=parsed_args.avoid_translations,
-                    avoid_rank_enhancements=parsed_args.avoid_rank_enhancements
+                    avoid_rank_enhancements=parsed_args.avoid_rank_enhancements,
+                    **options
                 )
-                populator.run()
             elif data_type == 'fishes':
                 from fishes import FishPopulator
                 populator = FishPopulator(
-                    avoid_translations=parsed_args.avoid_translations
+                    avoid_translations=parsed_args.avoid_translations,
+                    **options
                 )
-                populator.run()
             elif data_type == 'bugs':
                 from bugs import BugPopulator
                 populator = BugPopulator(
-                    avoid_translations=parsed_args.avoid_translations
+                    avoid_translations=parsed_args.avoid_translations,
+                    **options
                 )
-                populator.run()
             elif data_type == 'fossils':
                 from fossils import FossilPopulator
-                populator = FossilPopulator()
-                populator.run()
+                populator = FossilPopulator(**options)
+            elif data_type == 'search':
+                from search import SearchIndexPopulator
+                populator = SearchIndexPopulator(**options)
             else:
                 print(f"Unknown type: {data_type}")
                 sys.exit(1)
 
+            def run_populator():
+                populator.run()
+                if data_type not in CATALOG_TYPES:
+                    return
+                if parsed_args.snapshot:
+                    populator.export_snapshot(parsed_args.snapshot)
+                # Names may have changed, so /search is refreshed whenever the run changed the catalog
+                if populator.publish_catalog_changes() is not None:
+                    populator.publish_search_index()
+                selection = options['selection']
+                if not parsed_args.skip_bundle:
+                    if selection.rebuilds('bundle'):
+                        populator.publish_catalog_bundle()
+                    else:
+                        print("Skipping catalog bundle for a partial run (add --stage bundle to rebuild it)")
+                if not parsed_args.skip_sprites:
+                    if selection.rebuilds('sprites'):
+                        populator.publish_sprite_atlases()
+                    else:
+                        print("Skipping sprite atlases for a partial run (add --stage sprites to rebuild them)")
+                if parsed_args.warm_cache:
+                    populator.warm_api_cache(parsed_args.warm_concurrency)
+
+            try:
+                if parsed_args.engine == 'async':
+                    from async_engine import AsyncEngine
+                    AsyncEngine(populator, concurrency=parsed_args.concurrency).run(run_populator)
+                else:
+                    run_populator()
+            finally:
+                populator.finish()
+
         except Exception as e:
             print(f"Error: {e}")
             sys.exit(1)
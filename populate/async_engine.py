@@ -0,0 +1,147 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+from urllib.parse import urlsplit
+
+from requests.adapters import BaseAdapter
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3.util.retry import Retry
+
+from api_client import RETRY_BACKOFF, RETRY_STATUSES, RETRY_TOTAL
+
+DEFAULT_CONCURRENCY = 16
+DEFAULT_PER_HOST = 8
+
+logger = logging.getLogger('populate.engine')
+
+
+class EngineAdapter(BaseAdapter):
+    """requests transport that hands every request to the engine's event loop"""
+
+    def __init__(self, engine: 'AsyncEngine'):
+        super().__init__()
+        self.engine = engine
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None) -> Response:
+        return self.engine.send(request, timeout)
+
+    def close(self) -> None:
+        pass
+
+
+class AsyncEngine:
+    """One event loop for all hosts: aiohttp with per-host semaphores, item work (transform, scrape, Pillow) on threads"""
+
+    def __init__(self, populator, concurrency: int = DEFAULT_CONCURRENCY, per_host: int = DEFAULT_PER_HOST):
+        self.populator = populator
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.loop: asyncio.AbstractEventLoop = None
+        self.client = None
+        self._aiohttp = None
+        self._item_slots: asyncio.Semaphore = None
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+
+    def run(self, work: Callable[[], Any]) -> Any:
+        """Run work() (e.g. populator.run) with the populator's sessions routed through the event loop"""
+        return asyncio.run(self._main(work))
+
+    async def _main(self, work: Callable[[], Any]) -> Any:
+        try:
+            import aiohttp
+        except ImportError:
+            raise Exception("The async engine requires aiohttp (pip install aiohttp)")
+
+        self._aiohttp = aiohttp
+        self.loop = asyncio.get_running_loop()
+        # Items may issue blocking calls while others wait on HTTP, so leave headroom over the item limit
+        self.loop.set_default_executor(ThreadPoolExecutor(max_workers=self.concurrency + 4, thread_name_prefix='populate'))
+        self._item_slots = asyncio.Semaphore(self.concurrency)
+
+        sessions = (self.populator.session, self.populator.image_session)
+        mounted = [session.adapters.copy() for session in sessions]
+        connector = aiohttp.TCPConnector(limit=0, limit_per_host=self.per_host)
+
+        async with aiohttp.ClientSession(connector=connector, auto_decompress=True) as client:
+            self.client = client
+            adapter = EngineAdapter(self)
+            for session in sessions:
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+            self.populator.engine = self
+
+            print(f"Async engine: {self.concurrency} concurrent items, {self.per_host} connections per host")
+            try:
+                return await asyncio.to_thread(work)
+            finally:
+                self.populator.engine = None
+                for session, adapters in zip(sessions, mounted):
+                    session.adapters = adapters
+                self.client = None
+
+    def map(self, process: Callable, items: List) -> List:
+        """Run process(item) for every item on worker threads and return the results in order"""
+        return asyncio.run_coroutine_threadsafe(self._map(process, items), self.loop).result()
+
+    async def _map(self, process: Callable, items: List) -> List:
+        async def run_item(item):
+            async with self._item_slots:
+                return await asyncio.to_thread(process, item)
+
+        return await asyncio.gather(*(run_item(item) for item in items))
+
+    def send(self, request, timeout=None) -> Response:
+        """Blocking send for the requests adapter, called from a worker thread"""
+        return asyncio.run_coroutine_threadsafe(self._send(request, timeout), self.loop).result()
+
+    async def _send(self, request, timeout) -> Response:
+        aiohttp = self._aiohttp
+        host = urlsplit(request.url).netloc
+        slots = self._host_slots.setdefault(host, asyncio.Semaphore(self.per_host))
+
+        if isinstance(timeout, tuple):
+            client_timeout = aiohttp.ClientTimeout(sock_connect=timeout[0], sock_read=timeout[1])
+        else:
+            client_timeout = aiohttp.ClientTimeout(total=timeout)
+
+        # Like urllib3: only idempotent methods are retried, other methods only when the connection was never made
+        idempotent = request.method.upper() in Retry.DEFAULT_ALLOWED_METHODS
+        attempt = 0
+        while True:
+            try:
+                async with slots:
+                    async with self.client.request(
+                        request.method,
+                        request.url,
+                        data=request.body,
+                        headers=dict(request.headers),
+                        allow_redirects=False,
+                        timeout=client_timeout
+                    ) as client_response:
+                        content = await client_response.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                retryable = idempotent or isinstance(e, aiohttp.ClientConnectorError)
+                if not retryable or attempt >= RETRY_TOTAL:
+                    raise RequestsConnectionError(e, request=request)
+            else:
+                if not idempotent or client_response.status not in RETRY_STATUSES or attempt >= RETRY_TOTAL:
+                    break
+
+            attempt += 1
+            self.populator.metrics.inc('http_retries', host=host)
+            logger.debug(f"Retrying {request.method} {request.url} (attempt {attempt}/{RETRY_TOTAL})")
+            await asyncio.sleep(RETRY_BACKOFF * (2 ** (attempt - 1)))
+
+        response = Response()
+        response.status_code = client_response.status
+        response.reason = client_response.reason
+        response.headers = CaseInsensitiveDict(client_response.headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response._content = content
+        return response
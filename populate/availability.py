@@ -0,0 +1,112 @@
+import re
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+HOURS = 24
+MONTHS = 12
+ALL_HOURS = (1 << HOURS) - 1
+MATRIX_HEX_DIGITS = MONTHS * HOURS // 4
+
+RANGE_SEPARATORS = re.compile(r'\s*[;&,]\s*')
+RANGE_DASHES = re.compile(r'\s*[–—-]\s*')
+HOUR_PATTERN = re.compile(r'^(\d{1,2})(?::\d{2})?\s*(AM|PM)?$', re.IGNORECASE)
+
+
+def parse_hour(hour_str: str) -> Optional[int]:
+    match = HOUR_PATTERN.match(hour_str.strip())
+    if not match:
+        return None
+
+    hour = int(match.group(1))
+    meridiem = (match.group(2) or '').upper()
+    if meridiem == 'AM':
+        hour = 0 if hour == 12 else hour
+    elif meridiem == 'PM':
+        hour = hour if hour == 12 else hour + 12
+
+    return hour if 0 <= hour < HOURS else None
+
+
+@lru_cache(maxsize=256)
+def parse_hours_mask(time_str: str) -> Optional[int]:
+    """24-bit mask of the hours in a time string (end exclusive, wraps midnight); 0 for NA, None if unparseable"""
+    if not time_str or time_str.strip().upper() == 'NA':
+        return 0
+    if time_str.strip().lower() == 'all day':
+        return ALL_HOURS
+
+    mask = 0
+    for segment in RANGE_SEPARATORS.split(time_str.strip()):
+        bounds = RANGE_DASHES.split(segment)
+        if len(bounds) != 2:
+            return None
+
+        begin = parse_hour(bounds[0])
+        end = parse_hour(bounds[1])
+        if begin is None or end is None:
+            return None
+        if begin == end:
+            return ALL_HOURS
+
+        hour = begin
+        while hour != end:
+            mask |= 1 << hour
+            hour = (hour + 1) % HOURS
+
+    return mask
+
+
+@lru_cache(maxsize=256)
+def _hours_bounds(time_str: str) -> Optional[Tuple[int, int]]:
+    mask = parse_hours_mask(time_str)
+    if not mask:
+        return None
+    if mask == ALL_HOURS:
+        return 0, HOURS
+
+    begins = [hour for hour in range(HOURS) if mask >> hour & 1 and not mask >> ((hour - 1) % HOURS) & 1]
+    if len(begins) != 1:
+        return None
+
+    end = begins[0]
+    while mask >> end & 1:
+        end = (end + 1) % HOURS
+    return begins[0], end
+
+
+def hours_range(time_str: str) -> Optional[Dict[str, int]]:
+    """Begin and end hour (exclusive, below begin across midnight, 0-24 all day); None for NA or split ranges"""
+    bounds = _hours_bounds(time_str)
+    return {'begin': bounds[0], 'end': bounds[1]} if bounds else None
+
+
+def availability_ranges(north_data: Dict, south_data: Dict) -> Dict[str, Dict]:
+    """Both hemispheres' times_by_month as hour ranges per month, as stored by the API"""
+    availability = {'north': {}, 'south': {}}
+    for hemisphere, hemisphere_data in (('north', north_data), ('south', south_data)):
+        for month, time_str in (hemisphere_data or {}).get('times_by_month', {}).items():
+            time_range = hours_range(time_str)
+            if time_range:
+                availability[hemisphere][month] = time_range
+    return availability
+
+
+def hemisphere_matrix(hemisphere_data: Dict) -> int:
+    """Pack a hemisphere's times_by_month into a 12x24 bit matrix (bit month_index * 24 + hour)"""
+    matrix = 0
+    for month, time_str in (hemisphere_data or {}).get('times_by_month', {}).items():
+        month_index = int(month) - 1
+        if not 0 <= month_index < MONTHS:
+            continue
+        mask = parse_hours_mask(time_str)
+        if mask:
+            matrix |= mask << (month_index * HOURS)
+    return matrix
+
+
+def availability_bits(north_data: Dict, south_data: Dict) -> Dict[str, str]:
+    """Both hemispheres' matrices as fixed-width hex strings, as stored by the API"""
+    return {
+        'north': format(hemisphere_matrix(north_data), f'0{MATRIX_HEX_DIGITS}x'),
+        'south': format(hemisphere_matrix(south_data), f'0{MATRIX_HEX_DIGITS}x')
+    }
@@ -1,14 +1,46 @@
 import os
-import requests
-from typing import Dict, List, Any
+from typing import TYPE_CHECKING, Dict, List, Any
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 import base64
-from PIL import Image
+import hashlib
 import io
+import logging
+import threading
+from tracing import Tracer, traced
+from api_client import DEFAULT_TOKEN_CACHE_PATH, ENTITY_TYPES, LIST_KEYS, ThibouApiClient, TokenCache, mount_retries
+from metrics import MetricsRegistry, route_template
+from progress import ProgressReporter, configure_logging
+from snapshot import write_snapshot
+from bundle import BUNDLE_ARTIFACT, build_bundle, make_thumbnail, thumbnail_image_type
+from changes import ChangeJournal
+from scheduling import DemandPriority, schedule
+from search_index import SEARCH_INDEX_ARTIFACT, SearchIndexBuilder
+from selection import Selection
+from sprites import SPRITE_IMAGE_TYPE, SPRITE_TYPES, pack_sprite_atlases, sprite_artifact_names, sprite_map_json
+
+if TYPE_CHECKING:
+    import requests
+
+IMAGE_CACHE_SIZE = 128
+PLACEHOLDER_SIZE = 16
+WARM_CONCURRENCY = 8
+
+logger = logging.getLogger('populate.base')
+
+
+def image_content_hash(image_data: str) -> str:
+    """Content hash of a base64 PNG data URI, as the API computes it for image URLs"""
+    return hashlib.sha256(base64.b64decode(image_data.split(',', 1)[1])).hexdigest()[:32]
+
 
 class BasePopulator(ABC):
 
-    def __init__(self):
+    def __init__(self, trace_path: str = None, metrics_port: int = None, metrics_file: str = None,
+                 profile_memory: bool = False, log_file: str = None, log_level: str = 'INFO',
+                 hedge: bool = False, hedge_budget: float = None, selection: Selection = None):
+        import requests
+
         self.nookipedia_api_key = os.getenv('NOOKIPEDIA_API_KEY')
         self.system_key = os.getenv('SYSTEM_KEY')
         self.api_base_url = os.getenv('API_BASE_URL', 'https://api.thibou.valentinp.fr')
@@ -26,68 +58,201 @@ class BasePopulator(ABC):
                 'X-API-KEY': self.nookipedia_api_key
             })
 
+        self.image_session = requests.Session()
+
         self.system_token = None
 
-    def get_system_token(self) -> str:
-        response = self.session.post(
-            f"{self.api_base_url}/auth/system",
-            json={"key": self.system_key}
-        )
+        self.tracer = Tracer()
+        self.trace_path = trace_path
 
-        if response.status_code != 200:
-            raise Exception(f"Failed to get system token: {response.text}")
+        self.progress = ProgressReporter()
+        configure_logging(self.progress, self.tracer, log_file, log_level)
 
-        data = response.json()
-        self.system_token = data['token']
-        print(f"System token obtained: {self.system_token[:50]}...")
-        return self.system_token
+        self.metrics = MetricsRegistry()
+        self.metrics_file = metrics_file
+        self._describe_metrics()
+        self.tracer.add_listener(self._record_span)
 
-    def get_villagers_from_api(self) -> List[Dict]:
-        headers = {
-            'Authorization': f'Bearer {self.system_token}',
-            'Content-Type': 'application/json'
-        }
+        for session in (self.session, self.image_session):
+            mount_retries(session)
+            session.hooks['response'].append(self._record_response)
 
-        response = self.session.get(
-            f"{self.api_base_url}/villager",
-            headers=headers
+        self.api = ThibouApiClient(
+            self.api_base_url,
+            self.system_key,
+            session=self.session,
+            tracer=self.tracer,
+            token_cache=TokenCache(os.getenv('TOKEN_CACHE_PATH') or DEFAULT_TOKEN_CACHE_PATH)
         )
 
-        if response.status_code != 200:
-            raise Exception(f"Failed to fetch villagers from API: {response.text}")
-
-        response_data = response.json()
-        villagers = response_data.get('villagers', [])
-        print(f"Fetched {len(villagers)} villagers from API")
-        return villagers
+        self._image_cache = OrderedDict()
+        self._image_cache_lock = threading.Lock()
+        self._image_placeholders: Dict[str, str] = {}
+        self._stored_assets = set()
+        self._asset_locks: Dict[str, threading.Lock] = {}
+        self._remote_image_hashes: Dict[str, Dict[str, Dict[str, str]]] = {}
+        self._image_hashes_lock = threading.Lock()
+        self.change_journal = ChangeJournal()
+        self.published_changes: List[Dict] = []
+        self.engine = None
+        self.selection = selection or Selection()
+        self._priorities: Dict[str, DemandPriority] = {}
+
+        self.hedger = None
+        if hedge:
+            from hedging import RequestHedger
+            self.hedger = RequestHedger(self.metrics, budget=hedge_budget)
+
+        self.memory_profiler = None
+        if profile_memory:
+            from memprofile import MemoryProfiler
+            self.memory_profiler = MemoryProfiler()
+            self.memory_profiler.start()
+            self.tracer.add_listener(self.memory_profiler.on_span)
+
+        if metrics_port:
+            self.metrics.serve(metrics_port)
+
+    def finish(self) -> None:
+        """Publish pending catalog changes, print summaries and export the trace and metrics if requested"""
+        if len(self.change_journal):
+            try:
+                self.publish_catalog_changes()
+            except Exception as e:
+                logger.error(f"✗ Failed to publish catalog changes: {str(e)}")
+
+        self.tracer.print_summary()
+
+        if self.hedger:
+            self.hedger.print_summary()
+            self.hedger.close()
+
+        if self.memory_profiler:
+            self.memory_profiler.print_report()
+            self.memory_profiler.stop()
+
+        if self.trace_path:
+            self.tracer.export_chrome_trace(self.trace_path)
+
+        if self.metrics_file:
+            self.metrics.write_textfile(self.metrics_file)
+
+        self.metrics.stop()
+
+    def for_each_item(self, process, items: List, priority=None) -> List:
+        """Return [process(item) for item in items], highest priority(item) first and concurrently under an async engine"""
+        order = schedule(items, priority)
+        ordered = [items[index] for index in order]
+        if self.engine:
+            results = self.engine.map(process, ordered)
+        else:
+            results = [process(item) for item in ordered]
+
+        by_index = dict(zip(order, results))
+        return [by_index[index] for index in range(len(items))]
+
+    def demand_priority(self, category: str, ranks: Dict[str, str] = None) -> DemandPriority:
+        """Priority by English name from popularity ranks and user demand, falling back to ranks if demand is unavailable"""
+        if category not in self._priorities:
+            demand = {}
+            try:
+                demand = self.api.get_catalog_demand(category)
+            except Exception as e:
+                logger.warning(f"⚠ Warning: Could not load {category} demand, scheduling by rank only: {str(e)}")
+            self._priorities[category] = DemandPriority(ranks, demand)
+        return self._priorities[category]
+
+    def existing_entities(self, entity_type: str) -> Dict[str, Dict]:
+        """API entities by normalized English name, fetched only when the selection needs their ids or timestamps"""
+        if self.selection.includes_stage('create') and self.selection.changed_since is None:
+            return {}
+        return self.selection.index_by_name(self.get_entities_from_api(entity_type))
+
+    def existing_entity_id(self, existing: Dict[str, Dict], name: str) -> str:
+        entity = existing.get(self.selection.normalize_name(name))
+        if not entity:
+            raise Exception(f"{name} not found in API, run the create stage first")
+        return entity['_id']
+
+    def hedged_get(self, session: 'requests.Session', url: str, **kwargs) -> 'requests.Response':
+        """GET an idempotent resource, hedged against slow responses when --hedge is enabled"""
+        if self.hedger:
+            return self.hedger.get(session, url, **kwargs)
+        return session.get(url, **kwargs)
+
+    def _describe_metrics(self) -> None:
+        self.metrics.describe('http_requests', 'HTTP requests by host, route, method and status')
+        self.metrics.describe('http_request_duration_seconds', 'HTTP request latency by host and route')
+        self.metrics.describe('http_request_bytes', 'Request body bytes sent by host and content encoding')
+        self.metrics.describe('http_response_bytes', 'Response body bytes received by host')
+        self.metrics.describe('http_retries', 'Retried HTTP attempts by host')
+        self.metrics.describe('hedged_requests', 'Hedged GETs by host and whether the hedge answered first')
+        self.metrics.describe('image_cache_requests', 'Processed image cache lookups by result')
+        self.metrics.describe('image_assets', 'Image uploads by whether the bytes were new or already stored')
+        self.metrics.describe('image_uploads', 'Entity image uploads by whether they were sent or skipped as unchanged')
+        self.metrics.describe('stage_items', 'Completed spans by stage')
+        self.metrics.describe('errors', 'Errors by stage and exception type')
+
+    def _record_response(self, response, *args, **kwargs):
+        """Session response hook feeding request latency, bytes and retry metrics"""
+        host, route = route_template(response.url)
+        request = response.request
+
+        self.metrics.inc('http_requests', host=host, route=route, method=request.method, status=response.status_code)
+        self.metrics.observe('http_request_duration_seconds', response.elapsed.total_seconds(), host=host, route=route)
+
+        if request.body:
+            encoding = request.headers.get('Content-Encoding', 'identity')
+            self.metrics.inc('http_request_bytes', len(request.body), host=host, encoding=encoding)
+        self.metrics.inc('http_response_bytes', len(response.content), host=host)
+        self.progress.add_bytes(len(response.content))
+        self.change_journal.record_response(response)
+
+        retries = getattr(getattr(response.raw, 'retries', None), 'history', None)
+        if retries:
+            self.metrics.inc('http_retries', len(retries), host=host)
+
+        return response
+
+    def _record_span(self, event: str, stage: str, tags: Dict, duration: float) -> None:
+        if event != 'end':
+            return
+        self.metrics.inc('stage_items', stage=stage)
+        if tags.get('error'):
+            self.metrics.inc('errors', stage=stage, exception=tags['error'])
 
-    def populate_single_item(self, item: Dict) -> Dict:
-        headers = {
-            'Authorization': f'Bearer {self.system_token}',
-            'Content-Type': 'application/json'
-        }
+    def get_system_token(self) -> str:
+        self.system_token = self.api.ensure_token()
+        print(f"System token obtained: {self.system_token[:50]}...")
+        return self.system_token
 
-        response = self.session.post(
-            f"{self.api_base_url}/villager",
-            json=item,
-            headers=headers
-        )
+    def get_entities_from_api(self, entity_type: str) -> List[Dict]:
+        entities = self.api.list_entities(entity_type)
+        print(f"Fetched {len(entities)} {LIST_KEYS[entity_type]} from API")
+        return entities
 
-        if response.status_code not in [200, 201]:
-            raise Exception(f"Failed to populate item {item.get('id', 'unknown')}: {response.text}")
+    def download_image_as_base64(self, image_url: str, max_size: int = 512, quality: int = 85) -> str:
+        from PIL import Image
 
-        return response.json()
+        cache_key = (image_url, max_size)
+        with self._image_cache_lock:
+            if cache_key in self._image_cache:
+                self._image_cache.move_to_end(cache_key)
+                self.metrics.inc('image_cache_requests', result='hit')
+                return self._image_cache[cache_key]
+        self.metrics.inc('image_cache_requests', result='miss')
 
-    def download_image_as_base64(self, image_url: str, max_size: int = 512, quality: int = 85) -> str:
         try:
 
-            response = requests.get(image_url, timeout=30)
-            response.raise_for_status()
+            with self.tracer.span('image.download'):
+                response = self.hedged_get(self.image_session, image_url, timeout=30)
+                response.raise_for_status()
 
-            image = Image.open(io.BytesIO(response.content))
+            with self.tracer.span('image.decode'):
+                image = Image.open(io.BytesIO(response.content))
 
-            if image.mode != 'RGBA':
-                image = image.convert('RGBA')
+                if image.mode != 'RGBA':
+                    image = image.convert('RGBA')
 
             width, height = image.size
             if max(width, height) > max_size:
@@ -98,217 +263,259 @@ class BasePopulator(ABC):
                    new_height = max_size
                    new_width = int((width * max_size) / height)
 
-                image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                print(f"✓ Resized image from {width}x{height} to {new_width}x{new_height}")
-
-            buffer = io.BytesIO()
-            image.save(buffer, format='PNG', optimize=True)
-            compressed_data = buffer.getvalue()
+                with self.tracer.span('image.resize'):
+                    image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+                logger.debug(f"✓ Resized image from {width}x{height} to {new_width}x{new_height}")
 
-            image_data = base64.b64encode(compressed_data).decode('utf-8')
+            with self.tracer.span('image.placeholder'):
+                placeholder_image = image.copy()
+                placeholder_image.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE), Image.Resampling.BILINEAR)
+                buffer = io.BytesIO()
+                placeholder_image.save(buffer, format='PNG', optimize=True)
+                placeholder = f"data:image/png;base64,{base64.b64encode(buffer.getvalue()).decode('utf-8')}"
 
-            base64_image = f"data:image/png;base64,{image_data}"
-
-            print(f"✓ Image processed and converted to base64 ({len(image_data)} chars, {len(compressed_data)} bytes)")
-            return base64_image
+            with self.tracer.span('image.encode'):
+                buffer = io.BytesIO()
+                image.save(buffer, format='PNG', optimize=True)
+                compressed_data = buffer.getvalue()
 
-        except Exception as e:
-            print(f"✗ Failed to download/process image {image_url}: {str(e)}")
-            raise Exception(f"Image processing failed: {str(e)}")
-
-    def upload_villager_image(self, villager_id: str, image_type: str, image_data: str) -> Dict:
-        try:
-            headers = {
-                'Authorization': f'Bearer {self.system_token}',
-                'Content-Type': 'application/json'
-            }
-
-            url = f"{self.api_base_url}/villager/{villager_id}/img/{image_type}"
-
-            response = self.session.post(
-                url,
-                json={"image_data": image_data},
-                headers=headers
-            )
-
-            if response.status_code not in [200, 201]:
-                raise Exception(f"Failed to upload image: {response.text}")
-
-            print(f"✓ Image uploaded successfully: {image_type}")
-            return response.json()
-
-        except Exception as e:
-            print(f"✗ Failed to upload image {image_type}: {str(e)}")
-            raise
+                image_data = base64.b64encode(compressed_data).decode('utf-8')
 
-    def update_villager_house_info(self, villager_id: str, house_data: Dict) -> Dict:
-        try:
-            headers = {
-                'Authorization': f'Bearer {self.system_token}',
-                'Content-Type': 'application/json'
-            }
-
-            url = f"{self.api_base_url}/villager/{villager_id}"
+            base64_image = f"data:image/png;base64,{image_data}"
 
-            response = self.session.put(
-                url,
-                json={"house": house_data},
-                headers=headers
-            )
+            logger.debug(f"✓ Image processed and converted to base64 ({len(image_data)} chars, {len(compressed_data)} bytes)")
 
-            if response.status_code not in [200, 201]:
-                raise Exception(f"Failed to update house info: {response.text}")
+            with self._image_cache_lock:
+                self._image_cache[cache_key] = base64_image
+                self._image_placeholders[base64_image] = placeholder
+                if len(self._image_cache) > IMAGE_CACHE_SIZE:
+                    _, evicted_image = self._image_cache.popitem(last=False)
+                    self._image_placeholders.pop(evicted_image, None)
 
-            print(f"✓ House info updated successfully")
-            return response.json()
+            return base64_image
 
         except Exception as e:
-            print(f"✗ Failed to update house info: {str(e)}")
-            raise
-
-    def update_villager_names(self, villager_id: str, names_data: Dict) -> Dict:
-        try:
-            headers = {
-                'Authorization': f'Bearer {self.system_token}',
-                'Content-Type': 'application/json'
-            }
-
-            url = f"{self.api_base_url}/villager/{villager_id}"
-
-            response = self.session.put(
-                url,
-                json={"name": names_data},
-                headers=headers
-            )
-
-            if response.status_code not in [200, 201]:
-                raise Exception(f"Failed to update names: {response.text}")
+            logger.error(f"✗ Failed to download/process image {image_url}: {str(e)}")
+            raise Exception(f"Image processing failed: {str(e)}")
 
-            print(f"✓ Names updated successfully")
-            return response.json()
+    def image_unchanged(self, entry_type: str, entry_id: str, image_type: str, image_data: str) -> bool:
+        """True when the API already stores these exact bytes for the image, so the upload can be skipped"""
+        with self._image_hashes_lock:
+            if entry_type not in self._remote_image_hashes:
+                try:
+                    self._remote_image_hashes[entry_type] = self.api.get_image_hashes(entry_type)
+                except Exception as e:
+                    logger.warning(f"⚠ Warning: Could not load {entry_type} image hashes, uploading every image: {str(e)}")
+                    self._remote_image_hashes[entry_type] = {}
+
+        stored_hash = self._remote_image_hashes[entry_type].get(entry_id, {}).get(image_type)
+        unchanged = stored_hash == image_content_hash(image_data)
+        self.metrics.inc('image_uploads', result='unchanged' if unchanged else 'uploaded')
+        return unchanged
+
+    def store_image_asset(self, image_data: str) -> str:
+        """Upload image bytes to the shared asset store unless they are already there and return their hash"""
+        image_hash = image_content_hash(image_data)
+        with self._image_cache_lock:
+            asset_lock = self._asset_locks.setdefault(image_hash, threading.Lock())
+
+        # Concurrent items often share an image; only the first one checks and uploads it
+        with asset_lock:
+            if image_hash in self._stored_assets:
+                self.metrics.inc('image_assets', result='shared')
+                return image_hash
+
+            if image_hash in self.api.find_missing_assets([image_hash]):
+                self.api.put_asset(image_hash, image_data)
+                self.metrics.inc('image_assets', result='uploaded')
+            else:
+                self.metrics.inc('image_assets', result='shared')
+
+            self._stored_assets.add(image_hash)
+            return image_hash
+
+    def image_upload_body(self, image_data: str) -> Dict:
+        """Upload payload referencing the shared asset of an image, with its inline placeholder when this run processed it"""
+        body = {"hash": self.store_image_asset(image_data)}
+        placeholder = self._image_placeholders.get(image_data)
+        if placeholder:
+            body["placeholder"] = placeholder
+        return body
+
+    def upload_entity_image(self, entry_type: str, entry_id: str, image_type: str, image_data: str) -> Dict:
+        """Attach an image to an entity through the asset store, skipped when the API already has these bytes"""
+        if self.image_unchanged(entry_type, entry_id, image_type, image_data):
+            logger.debug(f"✓ {entry_type.capitalize()} image unchanged, upload skipped: {image_type}")
+            return None
 
-        except Exception as e:
-            print(f"✗ Failed to update names: {str(e)}")
-            raise
-
-    def update_villager_popularity_rank(self, villager_id: str, popularity_rank: str) -> Dict:
         try:
-            headers = {
-                'Authorization': f'Bearer {self.system_token}',
-                'Content-Type': 'application/json'
-            }
-
-            url = f"{self.api_base_url}/villager/{villager_id}"
-
-            response = self.session.put(
-                url,
-                json={"popularity_rank": popularity_rank},
-                headers=headers
-            )
-
-            if response.status_code not in [200, 201]:
-                raise Exception(f"Failed to update popularity rank: {response.text}")
-
-            print(f"✓ Popularity rank updated successfully")
-            return response.json()
+            result = self.api.upload_image(entry_type, entry_id, image_type, self.image_upload_body(image_data))
+            logger.debug(f"✓ {entry_type.capitalize()} image uploaded successfully: {image_type}")
+            return result
 
         except Exception as e:
-            print(f"✗ Failed to update popularity rank: {str(e)}")
+            logger.error(f"✗ Failed to upload {entry_type} image {image_type}: {str(e)}")
             raise
 
-    def get_fishes_from_api(self) -> List[Dict]:
-        headers = {
-            'Authorization': f'Bearer {self.system_token}',
-            'Content-Type': 'application/json'
+    @traced('snapshot')
+    def export_snapshot(self, path: str) -> None:
+        """Write the API's villager, fish, bug and fossil lists to a memory-mappable snapshot file"""
+        tables = {
+            'villager': self.get_entities_from_api('villager'),
+            'fish': self.get_entities_from_api('fish'),
+            'bug': self.get_entities_from_api('bug'),
+            'fossil': self.get_entities_from_api('fossil')
         }
+        size = write_snapshot(path, tables)
+        print(f"Catalog snapshot with {sum(len(rows) for rows in tables.values())} records written to {path} ({size} bytes)")
 
-        response = self.session.get(
-            f"{self.api_base_url}/fish",
-            headers=headers
-        )
-
-        if response.status_code != 200:
-            raise Exception(f"Failed to fetch fishes from API: {response.text}")
-
-        response_data = response.json()
-        fishes = response_data.get('fishes', [])
-        print(f"Fetched {len(fishes)} fishes from API")
-        return fishes
+    def publish_catalog_changes(self) -> int:
+        """Bump the catalog version with the entities and images written during this run"""
+        changes = self.change_journal.drain()
+        if not changes:
+            return None
 
-    def update_fish_names(self, fish_id: str, names_data: Dict) -> Dict:
         try:
-            headers = {
-                'Authorization': f'Bearer {self.system_token}',
-                'Content-Type': 'application/json'
-            }
-
-            url = f"{self.api_base_url}/fish/{fish_id}"
-
-            response = self.session.put(
-                url,
-                json={"name": names_data},
-                headers=headers
-            )
-
-            if response.status_code not in [200, 201]:
-                raise Exception(f"Failed to update fish names: {response.text}")
-
-            print(f"✓ Fish names updated successfully")
-            return response.json()
-
-        except Exception as e:
-            print(f"✗ Failed to update fish names: {str(e)}")
+            version = self.api.publish_catalog_changes(changes)
+        except Exception:
+            self.change_journal.restore(changes)
             raise
 
-    def get_bugs_from_api(self) -> List[Dict]:
-        headers = {
-            'Authorization': f'Bearer {self.system_token}',
-            'Content-Type': 'application/json'
+        self.published_changes.extend(changes)
+        print(f"Catalog version {version}: {len(changes)} changed entries")
+        return version
+
+    @traced('run.index')
+    def publish_search_index(self) -> None:
+        """Index every villager, fish, bug and fossil name in all languages and publish it for /search"""
+        builder = SearchIndexBuilder()
+        for entry_type in ENTITY_TYPES:
+            entries = self.api.list_entities(entry_type)
+            for entry in entries:
+                aliases = [part['name'] for part in entry.get('parts', []) if part.get('name')]
+                builder.add(entry_type, entry['_id'], entry.get('name', {}), aliases)
+            print(f"Indexed {len(entries)} {entry_type} entries")
+
+        index_json = builder.to_json()
+        self.api.put_artifact(SEARCH_INDEX_ARTIFACT, index_json, 'application/json')
+        print(f"Search index published: {len(builder.docs)} documents, {len(builder.terms)} terms, "
+              f"{len(index_json.encode('utf-8'))} bytes")
+
+    @traced('run.bundle')
+    def publish_catalog_bundle(self) -> None:
+        """Publish display fields and inline thumbnails of the whole catalog as one gzip artifact"""
+        entries = {
+            'villager': self.get_entities_from_api('villager'),
+            'fish': self.get_entities_from_api('fish'),
+            'bug': self.get_entities_from_api('bug'),
+            'fossil': self.get_entities_from_api('fossil')
         }
 
-        response = self.session.get(
-            f"{self.api_base_url}/bug",
-            headers=headers
+        thumbnails = {}
+        progress = self.progress.stage('bundle', sum(len(items) for items in entries.values()))
+        for entry_type, items in entries.items():
+            for item in items:
+                image_type = thumbnail_image_type(entry_type, item)
+                try:
+                    with self.tracer.tags(entity=item['name']['en']):
+                        image_data = self.api.get_image(entry_type, item['_id'], image_type) if image_type else None
+                        if image_data:
+                            with self.tracer.span('image.thumbnail'):
+                                thumbnails[item['_id']] = make_thumbnail(image_data)
+                    progress.advance()
+                except Exception as e:
+                    progress.advance(error=True)
+                    logger.warning(f"⚠ Warning: No thumbnail for {item['name']['en']}: {str(e)}")
+        progress.close()
+
+        bundle = build_bundle(entries, thumbnails, self.api.get_catalog_version())
+        artifact = self.api.put_artifact(
+            BUNDLE_ARTIFACT,
+            base64.b64encode(bundle).decode('utf-8'),
+            'application/json',
+            encoding='base64',
+            content_encoding='gzip'
         )
+        print(f"Catalog bundle published: {sum(len(items) for items in entries.values())} entries, "
+              f"{len(thumbnails)} thumbnails, {len(bundle)} bytes gzipped (ETag {artifact.get('etag')})")
+
+    @traced('run.sprites')
+    def publish_sprite_atlases(self) -> None:
+        """Pack every small icon of each entity type into sprite atlases plus a coordinate map"""
+        for entry_type in SPRITE_TYPES:
+            items = self.get_entities_from_api(entry_type)
+            icons = []
+            progress = self.progress.stage(f"sprites.{entry_type}", len(items))
+            for item in items:
+                try:
+                    with self.tracer.tags(entity=item['name']['en']):
+                        image_data = self.api.get_image(entry_type, item['_id'], SPRITE_IMAGE_TYPE)
+                    if image_data:
+                        icons.append((item['_id'], image_data))
+                    progress.advance()
+                except Exception as e:
+                    progress.advance(error=True)
+                    logger.warning(f"⚠ Warning: No {SPRITE_IMAGE_TYPE} icon for {item['name']['en']}: {str(e)}")
+            progress.close()
+
+            if not icons:
+                continue
+
+            with self.tracer.span('sprites.pack', entity=entry_type):
+                atlases, sprite_map = pack_sprite_atlases(entry_type, icons)
+
+            map_name, atlas_names = sprite_artifact_names(entry_type, len(atlases))
+            for atlas_name, atlas in zip(atlas_names, atlases):
+                self.api.put_artifact(atlas_name, base64.b64encode(atlas).decode('utf-8'), 'image/png', encoding='base64')
+            self.api.put_artifact(map_name, sprite_map_json(sprite_map), 'application/json')
+
+            print(f"Sprite atlases for {entry_type}: {len(icons)} icons in {len(atlases)} atlas(es), "
+                  f"{sum(len(atlas) for atlas in atlases)} bytes")
+
+    @traced('run.warm')
+    def warm_api_cache(self, concurrency: int = WARM_CONCURRENCY) -> None:
+        """Read back the lists and images written during this run so the API's Redis cache is warm for users"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        entry_types = sorted({change['type'] for change in self.published_changes})
+        images = sorted({
+            (change['type'], change['id'], image_type)
+            for change in self.published_changes
+            for image_type in change['images']
+        })
+        if not entry_types:
+            print("Cache warm-up: nothing was written during this run")
+            return
 
-        if response.status_code not in [200, 201]:
-            raise Exception(f"Failed to get bugs from API: {response.text}")
-
-        data = response.json()
-        return data.get('bugs', [])
-
-    def update_bug_names(self, bug_id: str, names_data: Dict) -> Dict:
-        try:
-            headers = {
-                'Authorization': f'Bearer {self.system_token}',
-                'Content-Type': 'application/json'
-            }
-
-            url = f"{self.api_base_url}/bug/{bug_id}"
-
-            response = self.session.put(
-                url,
-                json={"name": names_data},
-                headers=headers
-            )
+        reads = [(self.api.list_entities, (entry_type,)) for entry_type in entry_types]
+        # Uploads deleted the <type>_image:<id>:<image> keys; reading an image back caches it and its asset again
+        reads += [(self.api.warm_image, image) for image in images]
 
-            if response.status_code not in [200, 201]:
-                raise Exception(f"Failed to update bug names: {response.text}")
+        progress = self.progress.stage('warm', len(reads))
 
-            print(f"✓ Bug names updated successfully")
-            return response.json()
+        def warm(read) -> bool:
+            method, args = read
+            try:
+                method(*args)
+                progress.advance()
+                return True
+            except Exception as e:
+                progress.advance(error=True)
+                logger.warning(f"⚠ Warning: Could not warm {' '.join(args)}: {str(e)}")
+                return False
 
-        except Exception as e:
-            print(f"✗ Failed to update bug names: {str(e)}")
-            raise
+        with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix='warm') as executor:
+            warmed = sum(executor.map(warm, reads))
+        progress.close()
 
+        print(f"Cache warm-up: {warmed}/{len(reads)} reads ({len(entry_types)} lists, {len(images)} images)")
 
 
 class BaseWebPopulator(BasePopulator):
     """Base class for web scraping populators"""
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, **options):
+        super().__init__(**options)
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the populators' pure CPU paths (transforms and parsers)
+Usage: python benchmarks/bench.py [options]
+Examples:
+  python benchmarks/bench.py                    # compare against baseline.json
+  python benchmarks/bench.py --save-baseline    # record a new baseline
+  python benchmarks/bench.py --filter parse     # only run matching benchmarks
+
+Timings are absolute, so baseline.json only means something on the machine that recorded it and is not
+committed. Record it on your machine before a change (e.g. `git stash`, --save-baseline, `git stash pop`),
+then compare; a baseline recorded on another host is reported but never fails the run. Each repetition
+also times a fixed reference workload, and changes are computed on benchmark/reference ratios so that
+the machine speeding up or slowing down between runs cancels out.
+"""
+
+import argparse
+import base64
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import timeit
+from typing import Callable, Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(BENCH_DIR, 'fixtures')
+BASELINE_FILE = os.path.join(BENCH_DIR, 'baseline.json')
+MACHINE_KEY = '_machine'
+
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from bs4 import BeautifulSoup
+import re
+
+from villagers import VillagersGlobalPopulator
+from fishes import FishPopulator
+from bugs import BugPopulator
+from fossils import FossilPopulator
+from api_client import encode_body
+from availability import availability_bits, hours_range
+from tracing import Tracer
+
+
+class FixtureResponse:
+    def __init__(self, content: bytes):
+        self.status_code = 200
+        self.content = content
+        self.text = content.decode('utf-8')
+
+
+class FixtureSession:
+    """Serve a fixed page for every GET so scrape methods run without network"""
+
+    def __init__(self, content: bytes):
+        self.response = FixtureResponse(content)
+
+    def get(self, url, **kwargs):
+        return self.response
+
+
+def load_json(name: str):
+    with open(os.path.join(FIXTURES_DIR, name), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_bytes(name: str) -> bytes:
+    with open(os.path.join(FIXTURES_DIR, name), 'rb') as f:
+        return f.read()
+
+
+def make_populator(populator_class, page: str = None):
+    """Build a populator without touching the environment or the network"""
+    populator = populator_class.__new__(populator_class)
+    populator.avoid_enhancements = False
+    populator.avoid_translations = False
+    populator.avoid_rank_enhancements = False
+    populator.tracer = Tracer()
+    populator.hedger = None
+    if page:
+        populator.session = FixtureSession(load_bytes(page))
+    return populator
+
+
+def house_rows() -> List:
+    soup = BeautifulSoup(load_bytes('villager_houses.html'), 'html.parser')
+    table = soup.find('table', {'style': re.compile(r'border-collapse:collapse.*background:#fff')})
+    rows = [row.find_all('td') for row in table.find_all('tr')[1:]]
+    return [cells for cells in rows if len(cells) >= 4]
+
+
+def names_rows() -> List:
+    soup = BeautifulSoup(load_bytes('villager_names.html'), 'html.parser')
+    table = soup.find('table', {'class': 'styled color-villager'})
+    rows = [row.find_all('td') for row in table.find_all('tr')[1:]]
+    return [cells for cells in rows if len(cells) >= 10]
+
+
+def time_strings(creatures: List[Dict]) -> List[str]:
+    strings = []
+    for creature in creatures:
+        for hemisphere in ('north', 'south'):
+            for time_str in creature.get(hemisphere, {}).get('times_by_month', {}).values():
+                if time_str and time_str != 'NA':
+                    strings.append(time_str)
+    return strings
+
+
+def image_body() -> Dict:
+    """Upload body holding a 512px PNG as base64, the size of a typical processed image"""
+    from PIL import Image
+
+    image = Image.effect_mandelbrot((512, 512), (-2, -1.5, 1, 1.5), 100).convert('RGBA')
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG', optimize=True)
+    return {'image_data': f"data:image/png;base64,{base64.b64encode(buffer.getvalue()).decode('utf-8')}"}
+
+
+def build_benchmarks() -> Dict[str, Callable[[], None]]:
+    """Return benchmark name -> callable running one batch over the fixtures"""
+    villager_populator = make_populator(VillagersGlobalPopulator)
+    fish_populator = make_populator(FishPopulator, 'fish_page.html')
+    bug_populator = make_populator(BugPopulator, 'bug_page.html')
+    fossil_populator = make_populator(FossilPopulator)
+
+    villagers = load_json('nookipedia_villagers.json')
+    fishes = load_json('nookipedia_fish.json')
+    bugs = load_json('nookipedia_bugs.json')
+    fossils = load_json('nookipedia_fossils.json')
+    fish_times = time_strings(fishes)
+    bug_times = time_strings(bugs)
+    houses = house_rows()
+    names = names_rows()
+    chinese_cells = [cells[7] for cells in names]
+    villager_bodies = [villager_populator.transform_villager_data(v) for v in villagers]
+    upload = image_body()
+
+    return {
+        'transform_villager_data': lambda: [villager_populator.transform_villager_data(v) for v in villagers],
+        'transform_fish_data': lambda: [fish_populator.transform_fish_data(f) for f in fishes],
+        'transform_bug_data': lambda: [bug_populator.transform_bug_data(b) for b in bugs],
+        'transform_fossil_data': lambda: [fossil_populator.transform_fossil_data(f) for f in fossils],
+        'hours_range': lambda: [hours_range(t) for t in fish_times + bug_times],
+        'availability_bits': lambda: [availability_bits(c.get('north', {}), c.get('south', {})) for c in fishes + bugs],
+        '_parse_house_row': lambda: [villager_populator._parse_house_row(cells) for cells in houses],
+        '_parse_names_row': lambda: [villager_populator._parse_names_row(cells) for cells in names],
+        '_extract_chinese_simplified': lambda: [villager_populator._extract_chinese_simplified(c) for c in chinese_cells],
+        '_scrape_individual_fish_page': lambda: fish_populator._scrape_individual_fish_page('https://nookipedia.com/wiki/Sea_bass'),
+        '_scrape_individual_bug_page': lambda: bug_populator._scrape_individual_bug_page('https://nookipedia.com/wiki/Tarantula'),
+        'encode_body.villagers': lambda: [encode_body(body) for body in villager_bodies],
+        'encode_body.image': lambda: encode_body(upload),
+    }
+
+
+def reference_workload() -> None:
+    """Fixed mix of interpreter work (dicts, strings, sorting, json) that results are normalised by"""
+    table = {str(i): i * 7 % 503 for i in range(400)}
+    json.dumps(sorted(table, key=table.get))
+
+
+def calibrated_loops(timer: timeit.Timer, min_time: float) -> int:
+    number, elapsed = timer.autorange()
+    while elapsed < min_time:
+        number *= 2
+        elapsed = timer.timeit(number)
+    return number
+
+
+def run_benchmark(func: Callable[[], None], repeat: int, min_time: float) -> Dict:
+    """Time a benchmark, interleaved with the reference workload, and return per-batch statistics in microseconds"""
+    timer = timeit.Timer(func)
+    reference = timeit.Timer(reference_workload)
+    number = calibrated_loops(timer, min_time)
+    reference_number = calibrated_loops(reference, min_time / 4)
+
+    samples = []
+    reference_samples = []
+    for _ in range(repeat):
+        reference_samples.append(reference.timeit(reference_number) / reference_number * 1e6)
+        samples.append(timer.timeit(number) / number * 1e6)
+
+    return {
+        'min_us': round(min(samples), 3),
+        'median_us': round(statistics.median(samples), 3),
+        'relative': round(min(samples) / min(reference_samples), 4),
+        'loops': number,
+        'repeat': repeat
+    }
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Return the names of benchmarks slower than baseline by more than threshold"""
+    regressions = []
+
+    print(f"\n{'benchmark':<32} {'baseline':>12} {'current':>12} {'change':>9}")
+    print('-' * 68)
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            print(f"{name:<32} {'-':>12} {result['min_us']:>10.1f}us {'new':>9}")
+            continue
+
+        if 'relative' in base:
+            change = (result['relative'] - base['relative']) / base['relative']
+        else:
+            change = (result['min_us'] - base['min_us']) / base['min_us']
+        flag = ''
+        if change > threshold:
+            flag = '  ✗ REGRESSION'
+            regressions.append(name)
+        elif change < -threshold:
+            flag = '  ✓ faster'
+
+        print(f"{name:<32} {base['min_us']:>10.1f}us {result['min_us']:>10.1f}us {change:>+8.1%}{flag}")
+
+    return regressions
+
+
+def machine() -> Dict[str, str]:
+    return {'host': platform.node(), 'cpu': platform.processor() or platform.machine(), 'python': platform.python_version()}
+
+
+def describe_machine(recorded: Dict) -> str:
+    return f"{recorded['host']} ({recorded['cpu']}, Python {recorded['python']})" if recorded else 'an unknown machine'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Microbenchmarks for populator transforms and parsers')
+    parser.add_argument('--save-baseline', action='store_true', help='write results to baseline.json')
+    parser.add_argument('--baseline', default=BASELINE_FILE, help='baseline file to compare against')
+    parser.add_argument('--filter', default=None, help='only run benchmarks whose name contains this string')
+    parser.add_argument('--repeat', type=int, default=5, help='timing repetitions per benchmark')
+    parser.add_argument('--min-time', type=float, default=0.2, help='minimum seconds per repetition')
+    parser.add_argument('--threshold', type=float, default=0.20, help='relative slowdown flagged as regression')
+    args = parser.parse_args()
+
+    benchmarks = build_benchmarks()
+    if args.filter:
+        benchmarks = {name: func for name, func in benchmarks.items() if args.filter in name}
+
+    results = {}
+    for name, func in benchmarks.items():
+        results[name] = run_benchmark(func, args.repeat, args.min_time)
+        print(f"{name:<32} {results[name]['min_us']:>10.1f}us (median {results[name]['median_us']:.1f}us, {results[name]['loops']} loops)")
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        baseline[MACHINE_KEY] = machine()
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\nBaseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline found at {args.baseline}, run with --save-baseline first")
+        return
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    regressions = compare(results, baseline, args.threshold)
+    recorded_on = baseline.get(MACHINE_KEY)
+    if regressions and recorded_on != machine():
+        print(f"\n⚠ Baseline was recorded on {describe_machine(recorded_on)}, not {describe_machine(machine())}; "
+              f"rerun with --save-baseline here before comparing")
+        return
+
+    if regressions:
+        print(f"\n✗ {len(regressions)} regression(s) above {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+    print(f"\n✓ No regressions above {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Import-time report for the CLI entry points, checked against a startup budget
+Usage: python benchmarks/importtime.py [options]
+Examples:
+  python benchmarks/importtime.py                  # report every entry point, fail when over budget
+  python benchmarks/importtime.py --entry fossils  # only one entry point
+  python benchmarks/importtime.py --top 25         # show more of the slowest imports
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+POPULATE_DIR = os.path.dirname(BENCH_DIR)
+
+# Cumulative import time budget (ms) and modules that must stay unloaded, per entry module
+BUDGETS = {
+    'app': {'budget_ms': 50, 'forbidden': ['requests', 'urllib3', 'PIL', 'bs4', 'asyncio', 'http.server']},
+    'fossils': {'budget_ms': 200, 'forbidden': ['requests', 'urllib3', 'PIL', 'bs4', 'asyncio', 'http.server', 'tracemalloc']},
+    'search': {'budget_ms': 200, 'forbidden': ['requests', 'urllib3', 'PIL', 'bs4', 'asyncio', 'http.server', 'tracemalloc']},
+    'villagers': {'budget_ms': 200, 'forbidden': ['requests', 'urllib3', 'PIL', 'bs4', 'asyncio', 'http.server']},
+    'fishes': {'budget_ms': 200, 'forbidden': ['requests', 'urllib3', 'PIL', 'bs4', 'asyncio', 'http.server']},
+    'bugs': {'budget_ms': 200, 'forbidden': ['requests', 'urllib3', 'PIL', 'bs4', 'asyncio', 'http.server']},
+}
+
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def measure(entry: str) -> List[Tuple[str, int, int, int]]:
+    """Run `python -X importtime -c "import entry"` and return (module, self_us, cumulative_us, depth) rows"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {entry}"],
+        cwd=POPULATE_DIR,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise Exception(f"Importing {entry} failed: {result.stderr.strip().splitlines()[-1]}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+
+def best_of(entry: str, repeat: int) -> List[Tuple[str, int, int, int]]:
+    """The fastest of several runs; a cold disk cache only slows the first one"""
+    runs = [measure(entry) for _ in range(repeat)]
+    return min(runs, key=lambda rows: entry_total(rows, entry))
+
+
+def entry_total(rows: List[Tuple[str, int, int, int]], entry: str) -> int:
+    return next((cumulative for module, _, cumulative, _ in rows if module == entry), 0)
+
+
+def loaded(rows: List[Tuple[str, int, int, int]], module: str) -> bool:
+    return any(name == module or name.startswith(f"{module}.") for name, _, _, _ in rows)
+
+
+def direct_imports(rows: List[Tuple[str, int, int, int]], entry: str) -> List[Tuple[str, int, int, int]]:
+    """Modules imported by the entry module itself; -X importtime lists them just before it, one level deeper"""
+    index = next((index for index, row in enumerate(rows) if row[0] == entry and row[3] == 0), None)
+    children = []
+    if index is None:
+        return children
+    for row in reversed(rows[:index]):
+        if row[3] == 0:
+            break
+        if row[3] == 1:
+            children.append(row)
+    return children
+
+
+def report(entry: str, rows: List[Tuple[str, int, int, int]], top: int) -> Dict:
+    budget = BUDGETS.get(entry, {})
+    total_ms = entry_total(rows, entry) / 1000
+    forbidden = [module for module in budget.get('forbidden', []) if loaded(rows, module)]
+    over_budget = 'budget_ms' in budget and total_ms > budget['budget_ms']
+
+    status = '✗' if over_budget or forbidden else '✓'
+    budget_text = f" (budget {budget['budget_ms']}ms)" if 'budget_ms' in budget else ''
+    print(f"\n{status} {entry}: {total_ms:.1f}ms, {len(rows)} modules{budget_text}")
+
+    slowest = sorted(direct_imports(rows, entry), key=lambda row: row[2], reverse=True)
+    for module, self_us, cumulative_us, _ in slowest[:top]:
+        print(f"    {module:<40} {cumulative_us / 1000:>8.1f}ms (self {self_us / 1000:.1f}ms)")
+
+    if forbidden:
+        print(f"    ✗ loads {', '.join(forbidden)} at import time")
+
+    return {'total_ms': total_ms, 'over_budget': over_budget, 'forbidden': forbidden}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import-time report for the populate entry points')
+    parser.add_argument('--entry', action='append', default=None, help='entry module to measure (repeatable, default: all)')
+    parser.add_argument('--repeat', type=int, default=3, help='import runs per entry, the fastest is reported')
+    parser.add_argument('--top', type=int, default=10, help='slowest imports listed per entry')
+    args = parser.parse_args()
+
+    failures = []
+    for entry in args.entry or list(BUDGETS):
+        result = report(entry, best_of(entry, args.repeat), args.top)
+        if result['over_budget'] or result['forbidden']:
+            failures.append(entry)
+
+    if failures:
+        print(f"\n✗ {len(failures)} entry point(s) over their startup budget: {', '.join(failures)}")
+        sys.exit(1)
+
+    print("\n✓ All entry points within their startup budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,27 @@
 #!/usr/bin/env python3
 
+import logging
 import json
 import os
 import sys
+from itertools import count
 from typing import Dict, List
 from base_populator import BasePopulator
-from bs4 import BeautifulSoup
+from availability import availability_bits, availability_ranges
+from tracing import timed, traced
 import re
 
+logger = logging.getLogger('populate.bugs')
+
 class BugPopulator(BasePopulator):
-    def __init__(self, avoid_translations: bool = False):
-        super().__init__()
+    def __init__(self, avoid_translations: bool = False, **options):
+        super().__init__(**options)
         self.avoid_translations = avoid_translations
 
         if not self.nookipedia_api_key:
             raise ValueError("NOOKIPEDIA_API_KEY not found in environment variables")
 
+    @traced('fetch')
     def fetch_bugs_from_nookipedia(self) -> List[Dict]:
         print("Fetching bugs from Nookipedia API...")
 
@@ -72,64 +78,10 @@ class BugPopulator(BasePopulator):
             return "common"
         return rarity.lower().replace(" ", "_")
 
-    def parse_time_range(self, time_str: str) -> Dict:
-        if not time_str or time_str.lower() == "all day" or time_str == "NA":
-            return None
-
-        dash_chars = ["–", "—", "-", "—"]
-        time_parts = None
-
-        for dash in dash_chars:
-            if dash in time_str:
-                time_parts = time_str.split(dash)
-                break
-
-        if not time_parts or len(time_parts) != 2:
-            return None
-
-        def parse_time(time_part):
-            time_part = time_part.strip()
-            if "AM" in time_part or "PM" in time_part:
-                time_match = re.search(r'(\d+)', time_part)
-                if time_match:
-                    hour = int(time_match.group(1))
-                    if "PM" in time_part and hour != 12:
-                        hour += 12
-                    elif "AM" in time_part and hour == 12:
-                        hour = 0
-                    return hour
-            return 0
-
-        begin_time = parse_time(time_parts[0])
-        end_time = parse_time(time_parts[1])
-
-        return {"begin": begin_time, "end": end_time}
-
-    def transform_availability(self, north_data: Dict, south_data: Dict) -> Dict:
-        availability = {
-            "north": {},
-            "south": {}
-        }
-
-        if north_data and "times_by_month" in north_data:
-            for month, time_str in north_data["times_by_month"].items():
-                if time_str and time_str != "NA":
-                    time_range = self.parse_time_range(time_str)
-                    if time_range:
-                        availability["north"][month] = time_range
-
-        if south_data and "times_by_month" in south_data:
-            for month, time_str in south_data["times_by_month"].items():
-                if time_str and time_str != "NA":
-                    time_range = self.parse_time_range(time_str)
-                    if time_range:
-                        availability["south"][month] = time_range
-
-        return availability
-
+    @timed('transform')
     def transform_bug_data(self, nookipedia_bug: Dict) -> Dict:
 
-        availability = self.transform_availability(
+        availability = availability_ranges(
             nookipedia_bug.get("north", {}),
             nookipedia_bug.get("south", {})
         )
@@ -154,93 +106,70 @@ class BugPopulator(BasePopulator):
                 "flick": nookipedia_bug.get('sell_flick', 0)
             },
             "rarity": self.normalize_rarity(nookipedia_bug.get('rarity', '')),
-            "availability": availability
+            "availability": availability,
+            "availability_bits": availability_bits(nookipedia_bug.get("north", {}), nookipedia_bug.get("south", {}))
         }
 
         return transformed_bug
 
-    def populate_single_bug(self, bug: Dict) -> Dict:
-        headers = {
-            'Authorization': f'Bearer {self.system_token}',
-            'Content-Type': 'application/json'
-        }
-
-        response = self.session.post(
-            f"{self.api_base_url}/bug",
-            json=bug,
-            headers=headers
-        )
-
-        if response.status_code not in [200, 201]:
-            raise Exception(f"Failed to create bug: {response.text}")
-
-        return response.json()
-
-    def upload_bug_image(self, bug_id: str, image_type: str, image_data: str) -> Dict:
-        try:
-            headers = {
-                'Authorization': f'Bearer {self.system_token}',
-                'Content-Type': 'application/json'
-            }
-
-            url = f"{self.api_base_url}/bug/{bug_id}/img/{image_type}"
-
-            response = self.session.post(
-                url,
-                json={"image_data": image_data},
-                headers=headers
-            )
-
-            if response.status_code not in [200, 201]:
-                raise Exception(f"Failed to upload bug image: {response.text}")
-
-            print(f"✓ Bug image uploaded successfully: {image_type}")
-            return response.json()
-
-        except Exception as e:
-            print(f"✗ Failed to upload bug image {image_type}: {str(e)}")
-            raise
-
+    @traced('run.populate')
     def populate_bugs_to_api(self, bugs: List[Dict]) -> List[str]:
+        existing_bugs = self.existing_entities('bug')
+        bugs = self.selection.filter_sources(bugs, existing_bugs)
         print(f"Populating database with {len(bugs)} bugs...")
 
-        success_count = 0
-        error_count = 0
-        created_bug_ids = []
-
-        for i, bug in enumerate(bugs, 1):
-            try:
-                print(f"\nProcessing bug {i}/{len(bugs)}: {bug['name']}")
-                transformed_bug = self.transform_bug_data(bug)
-
-                result = self.populate_single_bug(transformed_bug)
-                bug_id = result.get('bug', {}).get('_id')
+        progress = self.progress.stage('bugs', len(bugs))
 
-                if not bug_id:
-                    raise Exception("Failed to get bug ID from creation response")
+        # Items run in priority order, so log their position in that order rather than in the source list
+        position = count(1)
 
-                print(f"✓ Successfully created bug: {transformed_bug['name']['en']} ({bug_id})")
-                created_bug_ids.append(bug_id)
+        def populate_bug(bug) -> str:
+            try:
+                logger.info(f"Processing bug {next(position)}/{len(bugs)}: {bug['name']}")
+                with self.tracer.tags(entity=bug['name']):
+                    transformed_bug = self.transform_bug_data(bug)
+
+                    if self.selection.includes_stage('create'):
+                        bug_id = self.api.create_entity('bug', transformed_bug).get('_id')
+
+                        if not bug_id:
+                            raise Exception("Failed to get bug ID from creation response")
+
+                        logger.info(f"✓ Successfully created bug: {transformed_bug['name']['en']} ({bug_id})")
+                    else:
+                        bug_id = self.existing_entity_id(existing_bugs, bug['name'])
+
+                    if self.selection.includes_image('full') and 'image_url' in bug and bug['image_url']:
+                        try:
+                            with self.tracer.tags(image_type='full'):
+                                image_data = self.download_image_as_base64(bug['image_url'])
+                                self.upload_entity_image('bug', bug_id, 'full', image_data)
+                        except Exception as e:
+                            logger.error(f"✗ Failed to upload full image for {bug['name']}: {str(e)}")
+
+                    if self.selection.includes_image('small') and 'render_url' in bug and bug['render_url']:
+                        try:
+                            with self.tracer.tags(image_type='small'):
+                                image_data = self.download_image_as_base64(bug['render_url'])
+                                self.upload_entity_image('bug', bug_id, 'small', image_data)
+                        except Exception as e:
+                            logger.error(f"✗ Failed to upload small image for {bug['name']}: {str(e)}")
+
+                progress.advance()
+                return bug_id
 
-                if 'image_url' in bug and bug['image_url']:
-                    try:
-                        image_data = self.download_image_as_base64(bug['image_url'])
-                        self.upload_bug_image(bug_id, 'full', image_data)
-                    except Exception as e:
-                        print(f"✗ Failed to upload full image for {bug['name']}: {str(e)}")
+            except Exception as e:
+                progress.advance(error=True)
+                logger.error(f"✗ Failed to create {bug['name']} ({bug.get('number', 'unknown')}): {str(e)}")
+                return None
 
-                if 'render_url' in bug and bug['render_url']:
-                    try:
-                        image_data = self.download_image_as_base64(bug['render_url'])
-                        self.upload_bug_image(bug_id, 'small', image_data)
-                    except Exception as e:
-                        print(f"✗ Failed to upload small image for {bug['name']}: {str(e)}")
+        priority = self.demand_priority('bugs')
+        results = self.for_each_item(populate_bug, bugs, priority=lambda bug: priority(bug['name']))
+        progress.close()
 
-                success_count += 1
-
-            except Exception as e:
-                error_count += 1
-                print(f"✗ Failed to create {bug['name']} ({bug.get('number', 'unknown')}): {str(e)}")
+        created_bug_ids = [bug_id for bug_id in results if bug_id]
+        success_count = len(created_bug_ids)
+        error_count = len(bugs) - success_count
 
         print(f"\n{'='*50}")
         print(f"BUGS POPULATION SUMMARY:")
@@ -251,52 +180,63 @@ class BugPopulator(BasePopulator):
 
         return created_bug_ids
 
+    @traced('run.names')
     def enhance_with_name_translations(self) -> None:
         if self.avoid_translations:
             print("Skipping name translations (--avoid-translations flag)")
             return
+        if not self.selection.includes_stage('names'):
+            print("Skipping name translations (--stage)")
+            return
 
         print("\n" + "="*50)
         print("ENHANCING WITH NAME TRANSLATIONS")
         print("="*50)
 
         try:
-            bugs = self.get_bugs_from_api()
+            bugs = self.selection.filter_entities(self.get_entities_from_api('bug'))
+            if not bugs:
+                print("No selected bugs to enhance")
+                return
             bug_names = [bug['name']['en'] for bug in bugs if bug.get('name', {}).get('en')]
 
             names_data = self._scrape_bug_names_data(bug_names)
             self._apply_bug_name_enhancements(bugs, names_data)
 
         except Exception as e:
-            print(f"✗ Bug name enhancement failed: {e}")
+            logger.error(f"✗ Bug name enhancement failed: {e}")
 
     def _scrape_bug_names_data(self, bug_names: List[str]) -> Dict:
+        from bs4 import BeautifulSoup
+
         print("Scraping bug name translations from Nookipedia website...")
 
         nookipedia_url = "https://nookipedia.com/wiki/Bug"
-        response = self.session.get(nookipedia_url)
+        with self.tracer.span('scrape', page='bugs'):
+            response = self.hedged_get(self.session, nookipedia_url)
 
         if response.status_code != 200:
             raise Exception(f"Failed to fetch Nookipedia page: {response.status_code}")
 
-        soup = BeautifulSoup(response.content, 'html.parser')
-        table = soup.find('table', {'class': 'sortable'})
+        with self.tracer.span('parse', page='bugs'):
+            soup = BeautifulSoup(response.content, 'html.parser')
+            table = soup.find('table', {'class': 'sortable'})
 
-        if not table:
-            raise Exception("Could not find the sortable bug table on the page")
+            if not table:
+                raise Exception("Could not find the sortable bug table on the page")
 
-        bug_links = {}
-        rows = table.find_all('tr')[1:]
+            bug_links = {}
+            rows = table.find_all('tr')[1:]
 
-        for row in rows:
-            cells = row.find_all('td')
-            if len(cells) >= 1:
-                bug_cell = cells[0]
-                bug_link = bug_cell.find('a')
-                if bug_link and bug_link.get('href'):
-                    bug_name = bug_link.get_text(strip=True)
-                    bug_url = f"https://nookipedia.com{bug_link.get('href')}"
-                    bug_links[bug_name] = bug_url
+            for row in rows:
+                cells = row.find_all('td')
+                if len(cells) >= 1:
+                    bug_cell = cells[0]
+                    bug_link = bug_cell.find('a')
+                    if bug_link and bug_link.get('href'):
+                        bug_name = bug_link.get_text(strip=True)
+                        bug_url = f"https://nookipedia.com{bug_link.get('href')}"
+                        bug_links[bug_name] = bug_url
 
         print(f"Found {len(bug_links)} bug page links")
 
@@ -306,36 +246,55 @@ class BugPopulator(BasePopulator):
         api_names_normalized = {normalize_name(name): name for name in bug_names}
         table_names_normalized = {normalize_name(name): name for name in bug_links.keys()}
 
-        print(f"Debug: API has {len(api_names_normalized)} normalized names")
-        print(f"Debug: Table has {len(table_names_normalized)} normalized names")
+        logger.debug(f"Debug: API has {len(api_names_normalized)} normalized names")
+        logger.debug(f"Debug: Table has {len(table_names_normalized)} normalized names")
 
         bug_names_data = {}
-        matched_count = 0
+        matched_names = [
+            (normalized_table_name, original_table_name)
+            for normalized_table_name, original_table_name in table_names_normalized.items()
+            if normalized_table_name in api_names_normalized
+        ]
+        matched_count = len(matched_names)
+
+        progress = self.progress.stage('pages', matched_count)
 
-        for normalized_table_name, original_table_name in table_names_normalized.items():
-            if normalized_table_name in api_names_normalized:
-                matched_count += 1
-                api_name = api_names_normalized[normalized_table_name]
-                bug_url = bug_links[original_table_name]
+        def scrape_bug(matched_name) -> None:
+            normalized_table_name, original_table_name = matched_name
+            api_name = api_names_normalized[normalized_table_name]
+            bug_url = bug_links[original_table_name]
 
-                try:
-                    print(f"Scraping {original_table_name} from {bug_url}")
+            try:
+                logger.info(f"Scraping {original_table_name} from {bug_url}")
+                with self.tracer.tags(entity=api_name):
                     bug_data = self._scrape_individual_bug_page(bug_url)
-                    if bug_data:
-                        bug_names_data[api_name] = bug_data
-                except Exception as e:
-                    print(f"⚠ Warning: Failed to scrape {original_table_name}: {str(e)}")
+                if bug_data:
+                    bug_names_data[api_name] = bug_data
+                progress.advance()
+            except Exception as e:
+                progress.advance(error=True)
+                logger.warning(f"⚠ Warning: Failed to scrape {original_table_name}: {str(e)}")
+
+        self.for_each_item(scrape_bug, matched_names)
+        progress.close()
 
-        print(f"Debug: Matched {matched_count} bugs out of {len(bug_links)} table entries")
+        logger.debug(f"Debug: Matched {matched_count} bugs out of {len(bug_links)} table entries")
         print(f"Successfully parsed name data for {len(bug_names_data)} bugs")
         return bug_names_data
 
     def _scrape_individual_bug_page(self, bug_url: str) -> Dict:
-        response = self.session.get(bug_url)
+        with self.tracer.span('scrape'):
+            response = self.hedged_get(self.session, bug_url)
         if response.status_code != 200:
             return None
 
-        soup = BeautifulSoup(response.content, 'html.parser')
+        with self.tracer.span('parse'):
+            return self._parse_individual_bug_page(response.content)
+
+    def _parse_individual_bug_page(self, content: bytes) -> Dict:
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(content, 'html.parser')
 
         lang_section = soup.find('td', {'id': 'lang1'})
         if not lang_section:
@@ -383,28 +342,35 @@ class BugPopulator(BasePopulator):
     def _apply_bug_name_enhancements(self, bugs: List[Dict], names_data: Dict) -> None:
         print("Applying name enhancements...")
 
-        matched_count = 0
-        for bug in bugs:
+        matched_bugs = [bug for bug in bugs if names_data.get(bug['name']['en'])]
+        matched_count = len(matched_bugs)
+        progress = self.progress.stage('names', sum(1 for bug in bugs if bug['name']['en'] in names_data))
+
+        def apply_bug_names(bug) -> None:
             bug_name = bug['name']['en']
             bug_id = bug['_id']
-            name_info = names_data.get(bug_name)
+            name_info = names_data[bug_name]
 
-            if name_info:
-                matched_count += 1
-                try:
-                    updated_names = bug['name'].copy()
+            try:
+                updated_names = bug['name'].copy()
 
-                    languages = ['jp', 'es', 'fr', 'de', 'it', 'ko', 'zh', 'nl', 'ru']
-                    for lang in languages:
-                        if name_info['name'].get(lang):
-                            updated_names[lang] = name_info['name'][lang]
+                languages = ['jp', 'es', 'fr', 'de', 'it', 'ko', 'zh', 'nl', 'ru']
+                for lang in languages:
+                    if name_info['name'].get(lang):
+                        updated_names[lang] = name_info['name'][lang]
 
-                    if updated_names != bug['name']:
-                        self.update_bug_names(bug_id, updated_names)
-                        print(f"✓ Updated names for {bug_name}")
+                if updated_names != bug['name']:
+                    with self.tracer.tags(entity=bug_name):
+                        self.api.update_entity('bug', bug_id, {'name': updated_names})
+                    logger.info(f"✓ Updated names for {bug_name}")
+                progress.advance()
+
+            except Exception as e:
+                progress.advance(error=True)
+                logger.error(f"✗ Failed to update names for {bug_name}: {str(e)}")
 
-                except Exception as e:
-                    print(f"✗ Failed to update names for {bug_name}: {str(e)}")
+        self.for_each_item(apply_bug_names, matched_bugs)
+        progress.close()
 
         print(f"Enhanced {matched_count} bugs with translated names")
 
@@ -419,8 +385,11 @@ class BugPopulator(BasePopulator):
             self.get_system_token()
             print("")
 
-            bugs_data = self.fetch_bugs_from_nookipedia()
-            created_ids = self.populate_bugs_to_api(bugs_data)
+            if self.selection.includes_stage('create') or self.selection.includes_stage('images'):
+                bugs_data = self.fetch_bugs_from_nookipedia()
+                created_ids = self.populate_bugs_to_api(bugs_data)
+            else:
+                print("Skipping bug population (--stage)")
 
             self.enhance_with_name_translations()
 
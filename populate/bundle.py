@@ -0,0 +1,59 @@
+import base64
+import gzip
+import io
+import json
+from typing import Dict, List, Optional
+
+BUNDLE_VERSION = 1
+BUNDLE_ARTIFACT = 'catalog-bundle'
+THUMBNAIL_SIZE = 64
+
+DISPLAY_FIELDS = {
+    'villager': ['_id', 'name', 'title_color', 'text_color', 'species', 'gender', 'birthday_date', 'popularity_rank'],
+    'fish': ['_id', 'name', 'location', 'price', 'rarity'],
+    'bug': ['_id', 'name', 'location', 'weather', 'price', 'rarity'],
+    'fossil': ['_id', 'name', 'room', 'total_price', 'parts_count'],
+}
+
+THUMBNAIL_IMAGE_TYPES = {
+    'villager': 'small',
+    'fish': 'full',
+    'bug': 'full',
+}
+
+
+def thumbnail_image_type(entry_type: str, entry: Dict) -> Optional[str]:
+    """Image type (or fossil part name) used as the list icon of an entry"""
+    if entry_type == 'fossil':
+        parts = entry.get('parts') or []
+        return parts[0].get('name') if parts else None
+    return THUMBNAIL_IMAGE_TYPES.get(entry_type)
+
+
+def make_thumbnail(image_data: str, size: int = THUMBNAIL_SIZE) -> str:
+    """Shrink a base64 PNG data URI to a size x size bounded thumbnail data URI"""
+    from PIL import Image
+
+    encoded = image_data.split(',', 1)[1]
+    image = Image.open(io.BytesIO(base64.b64decode(encoded)))
+    if image.mode != 'RGBA':
+        image = image.convert('RGBA')
+    image.thumbnail((size, size), Image.Resampling.LANCZOS)
+
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG', optimize=True)
+    return f"data:image/png;base64,{base64.b64encode(buffer.getvalue()).decode('utf-8')}"
+
+
+def build_bundle(entries: Dict[str, List[Dict]], thumbnails: Dict[str, str], catalog_version: int) -> bytes:
+    """Gzip the display fields and thumbnails of every entry; identical input gives identical bytes"""
+    bundle = {'version': BUNDLE_VERSION, 'catalog_version': catalog_version}
+    for entry_type, items in entries.items():
+        fields = DISPLAY_FIELDS[entry_type]
+        bundle[entry_type] = [
+            dict({field: item[field] for field in fields if field in item}, thumbnail=thumbnails.get(item['_id']))
+            for item in items
+        ]
+
+    payload = json.dumps(bundle, ensure_ascii=False, separators=(',', ':'), sort_keys=True).encode('utf-8')
+    return gzip.compress(payload, compresslevel=9, mtime=0)
@@ -0,0 +1,63 @@
+import re
+import threading
+from typing import Dict, List
+from urllib.parse import unquote, urlsplit
+
+ENTITY_TYPES = ('villager', 'fish', 'bug', 'fossil')
+WRITE_METHODS = ('POST', 'PUT', 'DELETE')
+
+ENTITY_PATH = re.compile(rf'/(?P<type>{"|".join(ENTITY_TYPES)})(?:/(?P<id>[0-9a-fA-F]{{24}})(?:/img/(?P<image>[^/]+))?)?/?$')
+
+
+class ChangeJournal:
+    """Entity and image IDs written during a run, published as one catalog version"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._changes: Dict[tuple, set] = {}
+
+    def record(self, entry_type: str, entry_id: str, image_type: str = None) -> None:
+        with self._lock:
+            images = self._changes.setdefault((entry_type, entry_id), set())
+            if image_type:
+                images.add(image_type)
+
+    def record_response(self, response) -> None:
+        """Journal a successful API write from its method, path and (for creates) response body"""
+        request = response.request
+        if request.method not in WRITE_METHODS or not 200 <= response.status_code < 300:
+            return
+
+        match = ENTITY_PATH.search(urlsplit(response.url).path)
+        if not match:
+            return
+
+        entry_type, entry_id, image_type = match.group('type', 'id', 'image')
+        if not entry_id:
+            try:
+                entry_id = response.json().get(entry_type, {}).get('_id')
+            except ValueError:
+                entry_id = None
+        if entry_id:
+            # Fossil part names such as "T. rex skull" arrive percent-encoded in the URL
+            self.record(entry_type, entry_id, unquote(image_type) if image_type else None)
+
+    def __len__(self) -> int:
+        return len(self._changes)
+
+    def drain(self) -> List[Dict]:
+        """Return the journaled changes in API format and clear the journal"""
+        with self._lock:
+            changes = [
+                {'type': entry_type, 'id': entry_id, 'images': sorted(images)}
+                for (entry_type, entry_id), images in self._changes.items()
+            ]
+            self._changes = {}
+        return changes
+
+    def restore(self, changes: List[Dict]) -> None:
+        """Put drained changes back, e.g. after a failed publish"""
+        for change in changes:
+            self.record(change['type'], change['id'])
+            for image_type in change['images']:
+                self.record(change['type'], change['id'], image_type)
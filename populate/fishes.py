@@ -1,21 +1,27 @@
 #!/usr/bin/env python3
 
+import logging
 import json
 import os
 import sys
+from itertools import count
 from typing import Dict, List
 from base_populator import BasePopulator
-from bs4 import BeautifulSoup
+from availability import availability_bits, availability_ranges
+from tracing import timed, traced
 import re
 
+logger = logging.getLogger('populate.fishes')
+
 class FishPopulator(BasePopulator):
-    def __init__(self, avoid_translations: bool = False):
-        super().__init__()
+    def __init__(self, avoid_translations: bool = False, **options):
+        super().__init__(**options)
         self.avoid_translations = avoid_translations
 
         if not self.nookipedia_api_key:
             raise ValueError("NOOKIPEDIA_API_KEY not found in environment variables")
 
+    @traced('fetch')
     def fetch_fishes_from_nookipedia(self) -> List[Dict]:
         print("Fetching fishes from Nookipedia API...")
 
@@ -43,69 +49,10 @@ class FishPopulator(BasePopulator):
     def normalize_rarity(self, rarity: str) -> str:
         return rarity.lower()
 
-    def parse_time_range(self, time_str: str) -> Dict:
-        if not time_str or time_str.lower() == "all day":
-            return {"begin": 0, "end": 23}
-
-        dash_chars = ["–", "—", "-", "—"]
-        parts = None
-
-        for dash in dash_chars:
-            if dash in time_str:
-                parts = time_str.split(dash)
-                break
-
-        if parts and len(parts) == 2:
-            begin_str = parts[0].strip()
-            end_str = parts[1].strip()
-
-            begin_hour = self.parse_hour(begin_str)
-            end_hour = self.parse_hour(end_str)
-
-            if end_hour < begin_hour:
-                end_hour += 24
-
-            return {"begin": begin_hour, "end": end_hour}
-
-        return None
-
-    def parse_hour(self, hour_str: str) -> int:
-        hour_str = hour_str.strip().upper()
-
-        if "AM" in hour_str:
-            hour = int(hour_str.replace("AM", "").strip())
-            return 0 if hour == 12 else hour
-        elif "PM" in hour_str:
-            hour = int(hour_str.replace("PM", "").strip())
-            return hour if hour == 12 else hour + 12
-        else:
-            return int(hour_str)
-
-    def transform_availability(self, north_data: Dict, south_data: Dict) -> Dict:
-        availability = {
-            "north": {},
-            "south": {}
-        }
-
-        if north_data and "times_by_month" in north_data:
-            for month, time_str in north_data["times_by_month"].items():
-                if time_str:
-                    time_range = self.parse_time_range(time_str)
-                    if time_range:
-                        availability["north"][month] = time_range
-
-        if south_data and "times_by_month" in south_data:
-            for month, time_str in south_data["times_by_month"].items():
-                if time_str:
-                    time_range = self.parse_time_range(time_str)
-                    if time_range:
-                        availability["south"][month] = time_range
-
-        return availability
-
+    @timed('transform')
     def transform_fish_data(self, nookipedia_fish: Dict) -> Dict:
 
-        availability = self.transform_availability(
+        availability = availability_ranges(
             nookipedia_fish.get("north", {}),
             nookipedia_fish.get("south", {})
         )
@@ -129,94 +76,70 @@ class FishPopulator(BasePopulator):
                 "shop": nookipedia_fish.get("sell_nook", 0)
             },
             "availability": availability,
+            "availability_bits": availability_bits(nookipedia_fish.get("north", {}), nookipedia_fish.get("south", {})),
             "rarity": self.normalize_rarity(nookipedia_fish["rarity"])
         }
 
         return transformed_fish
 
-    def populate_single_fish(self, fish: Dict) -> Dict:
-        headers = {
-            'Authorization': f'Bearer {self.system_token}',
-            'Content-Type': 'application/json'
-        }
-
-        response = self.session.post(
-            f"{self.api_base_url}/fish",
-            json=fish,
-            headers=headers
-        )
-
-        if response.status_code not in [200, 201]:
-            raise Exception(f"Failed to populate fish {fish.get('name', {}).get('en', 'unknown')}: {response.text}")
-
-        return response.json()
-
-    def upload_fish_image(self, fish_id: str, image_type: str, image_data: str) -> Dict:
-        try:
-            headers = {
-                'Authorization': f'Bearer {self.system_token}',
-                'Content-Type': 'application/json'
-            }
-
-            url = f"{self.api_base_url}/fish/{fish_id}/img/{image_type}"
-
-            response = self.session.post(
-                url,
-                json={"image_data": image_data},
-                headers=headers
-            )
-
-            if response.status_code not in [200, 201]:
-                raise Exception(f"Failed to upload fish image: {response.text}")
-
-            print(f"✓ Fish image uploaded successfully: {image_type}")
-            return response.json()
-
-        except Exception as e:
-            print(f"✗ Failed to upload fish image {image_type}: {str(e)}")
-            raise
-
+    @traced('run.populate')
     def populate_fishes_to_api(self, fishes: List[Dict]) -> List[str]:
+        existing_fishes = self.existing_entities('fish')
+        fishes = self.selection.filter_sources(fishes, existing_fishes)
         print(f"Populating database with {len(fishes)} fishes...")
 
-        success_count = 0
-        error_count = 0
-        created_fish_ids = []
-
-        for i, fish in enumerate(fishes, 1):
-            try:
-                print(f"\nProcessing fish {i}/{len(fishes)}: {fish['name']}")
-                transformed_fish = self.transform_fish_data(fish)
-
-                result = self.populate_single_fish(transformed_fish)
-                fish_id = result.get('fish', {}).get('_id')
+        progress = self.progress.stage('fishes', len(fishes))
 
-                if not fish_id:
-                    raise Exception("Failed to get fish ID from creation response")
+        # Items run in priority order, so log their position in that order rather than in the source list
+        position = count(1)
 
-                print(f"✓ Successfully created fish: {transformed_fish['name']['en']} ({fish_id})")
-                created_fish_ids.append(fish_id)
+        def populate_fish(fish) -> str:
+            try:
+                logger.info(f"Processing fish {next(position)}/{len(fishes)}: {fish['name']}")
+                with self.tracer.tags(entity=fish['name']):
+                    transformed_fish = self.transform_fish_data(fish)
+
+                    if self.selection.includes_stage('create'):
+                        fish_id = self.api.create_entity('fish', transformed_fish).get('_id')
+
+                        if not fish_id:
+                            raise Exception("Failed to get fish ID from creation response")
+
+                        logger.info(f"✓ Successfully created fish: {transformed_fish['name']['en']} ({fish_id})")
+                    else:
+                        fish_id = self.existing_entity_id(existing_fishes, fish['name'])
+
+                    if self.selection.includes_image('full') and 'image_url' in fish and fish['image_url']:
+                        try:
+                            with self.tracer.tags(image_type='full'):
+                                image_data = self.download_image_as_base64(fish['image_url'])
+                                self.upload_entity_image('fish', fish_id, 'full', image_data)
+                        except Exception as e:
+                            logger.error(f"✗ Failed to upload full image for {fish['name']}: {str(e)}")
+
+                    if self.selection.includes_image('small') and 'render_url' in fish and fish['render_url']:
+                        try:
+                            with self.tracer.tags(image_type='small'):
+                                image_data = self.download_image_as_base64(fish['render_url'])
+                                self.upload_entity_image('fish', fish_id, 'small', image_data)
+                        except Exception as e:
+                            logger.error(f"✗ Failed to upload small image for {fish['name']}: {str(e)}")
+
+                progress.advance()
+                return fish_id
 
-                if 'image_url' in fish and fish['image_url']:
-                    try:
-                        image_data = self.download_image_as_base64(fish['image_url'])
-                        self.upload_fish_image(fish_id, 'full', image_data)
-                    except Exception as e:
-                        print(f"✗ Failed to upload full image for {fish['name']}: {str(e)}")
+            except Exception as e:
+                logger.error(f"✗ Error processing fish {fish.get('name', 'unknown')}: {str(e)}")
+                progress.advance(error=True)
+                return None
 
-                if 'render_url' in fish and fish['render_url']:
-                    try:
-                        image_data = self.download_image_as_base64(fish['render_url'])
-                        self.upload_fish_image(fish_id, 'small', image_data)
-                    except Exception as e:
-                        print(f"✗ Failed to upload small image for {fish['name']}: {str(e)}")
+        priority = self.demand_priority('fish')
+        results = self.for_each_item(populate_fish, fishes, priority=lambda fish: priority(fish['name']))
+        progress.close()
 
-                success_count += 1
-
-            except Exception as e:
-                print(f"✗ Error processing fish {fish.get('name', 'unknown')}: {str(e)}")
-                error_count += 1
-                continue
+        created_fish_ids = [fish_id for fish_id in results if fish_id]
+        success_count = len(created_fish_ids)
+        error_count = len(fishes) - success_count
 
         print(f"\n=== POPULATION SUMMARY ===")
         print(f"✓ Successfully processed: {success_count}")
@@ -225,52 +148,63 @@ class FishPopulator(BasePopulator):
 
         return created_fish_ids
 
+    @traced('run.names')
     def enhance_with_name_translations(self) -> None:
         if self.avoid_translations:
             print("Skipping name translations (--avoid-translations flag)")
             return
+        if not self.selection.includes_stage('names'):
+            print("Skipping name translations (--stage)")
+            return
 
         print("\n" + "="*50)
         print("ENHANCING WITH NAME TRANSLATIONS")
         print("="*50)
 
         try:
-            fishes = self.get_fishes_from_api()
+            fishes = self.selection.filter_entities(self.get_entities_from_api('fish'))
+            if not fishes:
+                print("No selected fishes to enhance")
+                return
             fish_names = [fish['name']['en'] for fish in fishes if fish.get('name', {}).get('en')]
 
             names_data = self._scrape_fish_names_data(fish_names)
             self._apply_fish_name_enhancements(fishes, names_data)
 
         except Exception as e:
-            print(f"✗ Fish name enhancement failed: {e}")
+            logger.error(f"✗ Fish name enhancement failed: {e}")
 
     def _scrape_fish_names_data(self, fish_names: List[str]) -> Dict:
+        from bs4 import BeautifulSoup
+
         print("Scraping fish name translations from Nookipedia website...")
 
         nookipedia_url = "https://nookipedia.com/wiki/Fish"
-        response = self.session.get(nookipedia_url)
+        with self.tracer.span('scrape', page='fishes'):
+            response = self.hedged_get(self.session, nookipedia_url)
 
         if response.status_code != 200:
             raise Exception(f"Failed to fetch Nookipedia page: {response.status_code}")
 
-        soup = BeautifulSoup(response.content, 'html.parser')
-        table = soup.find('table', {'class': 'sortable'})
+        with self.tracer.span('parse', page='fishes'):
+            soup = BeautifulSoup(response.content, 'html.parser')
+            table = soup.find('table', {'class': 'sortable'})
 
-        if not table:
-            raise Exception("Could not find the sortable fish table on the page")
+            if not table:
+                raise Exception("Could not find the sortable fish table on the page")
 
-        fish_links = {}
-        rows = table.find_all('tr')[1:]
+            fish_links = {}
+            rows = table.find_all('tr')[1:]
 
-        for row in rows:
-            cells = row.find_all('td')
-            if len(cells) >= 1:
-                fish_cell = cells[0]
-                fish_link = fish_cell.find('a')
-                if fish_link and fish_link.get('href'):
-                    fish_name = fish_link.get_text(strip=True)
-                    fish_url = f"https://nookipedia.com{fish_link.get('href')}"
-                    fish_links[fish_name] = fish_url
+            for row in rows:
+                cells = row.find_all('td')
+                if len(cells) >= 1:
+                    fish_cell = cells[0]
+                    fish_link = fish_cell.find('a')
+                    if fish_link and fish_link.get('href'):
+                        fish_name = fish_link.get_text(strip=True)
+                        fish_url = f"https://nookipedia.com{fish_link.get('href')}"
+                        fish_links[fish_name] = fish_url
 
         print(f"Found {len(fish_links)} fish page links")
 
@@ -280,36 +214,55 @@ class FishPopulator(BasePopulator):
         api_names_normalized = {normalize_name(name): name for name in fish_names}
         table_names_normalized = {normalize_name(name): name for name in fish_links.keys()}
 
-        print(f"Debug: API has {len(api_names_normalized)} normalized names")
-        print(f"Debug: Table has {len(table_names_normalized)} normalized names")
+        logger.debug(f"Debug: API has {len(api_names_normalized)} normalized names")
+        logger.debug(f"Debug: Table has {len(table_names_normalized)} normalized names")
 
         fish_names_data = {}
-        matched_count = 0
+        matched_names = [
+            (normalized_table_name, original_table_name)
+            for normalized_table_name, original_table_name in table_names_normalized.items()
+            if normalized_table_name in api_names_normalized
+        ]
+        matched_count = len(matched_names)
 
-        for normalized_table_name, original_table_name in table_names_normalized.items():
-            if normalized_table_name in api_names_normalized:
-                matched_count += 1
-                api_name = api_names_normalized[normalized_table_name]
-                fish_url = fish_links[original_table_name]
+        progress = self.progress.stage('pages', matched_count)
 
-                try:
-                    print(f"Scraping {original_table_name} from {fish_url}")
+        def scrape_fish(matched_name) -> None:
+            normalized_table_name, original_table_name = matched_name
+            api_name = api_names_normalized[normalized_table_name]
+            fish_url = fish_links[original_table_name]
+
+            try:
+                logger.info(f"Scraping {original_table_name} from {fish_url}")
+                with self.tracer.tags(entity=api_name):
                     fish_data = self._scrape_individual_fish_page(fish_url)
-                    if fish_data:
-                            fish_names_data[api_name] = fish_data
-                except Exception as e:
-                    print(f"⚠ Warning: Failed to scrape {original_table_name}: {str(e)}")
+                if fish_data:
+                    fish_names_data[api_name] = fish_data
+                progress.advance()
+            except Exception as e:
+                progress.advance(error=True)
+                logger.warning(f"⚠ Warning: Failed to scrape {original_table_name}: {str(e)}")
+
+        self.for_each_item(scrape_fish, matched_names)
+        progress.close()
 
-        print(f"Debug: Matched {matched_count} fish out of {len(fish_links)} table entries")
+        logger.debug(f"Debug: Matched {matched_count} fish out of {len(fish_links)} table entries")
         print(f"Successfully parsed name data for {len(fish_names_data)} fishes")
         return fish_names_data
 
     def _scrape_individual_fish_page(self, fish_url: str) -> Dict:
-        response = self.session.get(fish_url)
+        with self.tracer.span('scrape'):
+            response = self.hedged_get(self.session, fish_url)
         if response.status_code != 200:
             return None
 
-        soup = BeautifulSoup(response.content, 'html.parser')
+        with self.tracer.span('parse'):
+            return self._parse_individual_fish_page(response.content)
+
+    def _parse_individual_fish_page(self, content: bytes) -> Dict:
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(content, 'html.parser')
 
         lang_section = soup.find('td', {'id': 'lang1'})
         if not lang_section:
@@ -357,28 +310,35 @@ class FishPopulator(BasePopulator):
     def _apply_fish_name_enhancements(self, fishes: List[Dict], names_data: Dict) -> None:
         print("Applying fish name enhancements...")
 
-        matched_count = 0
-        for fish in fishes:
+        matched_fishes = [fish for fish in fishes if names_data.get(fish['name']['en'])]
+        matched_count = len(matched_fishes)
+        progress = self.progress.stage('names', sum(1 for fish in fishes if fish['name']['en'] in names_data))
+
+        def apply_fish_names(fish) -> None:
             fish_name = fish['name']['en']
             fish_id = fish['_id']
-            name_info = names_data.get(fish_name)
+            name_info = names_data[fish_name]
 
-            if name_info:
-                matched_count += 1
-                try:
-                    updated_names = fish['name'].copy()
+            try:
+                updated_names = fish['name'].copy()
+
+                languages = ['jp', 'es', 'fr', 'de', 'it', 'ko', 'zh', 'nl', 'ru']
+                for lang in languages:
+                    if name_info['name'].get(lang):
+                        updated_names[lang] = name_info['name'][lang]
 
-                    languages = ['jp', 'es', 'fr', 'de', 'it', 'ko', 'zh', 'nl', 'ru']
-                    for lang in languages:
-                        if name_info['name'].get(lang):
-                            updated_names[lang] = name_info['name'][lang]
+                if updated_names != fish['name']:
+                    with self.tracer.tags(entity=fish_name):
+                        self.api.update_entity('fish', fish_id, {'name': updated_names})
+                    logger.info(f"✓ Updated names for {fish_name}")
+                progress.advance()
 
-                    if updated_names != fish['name']:
-                        self.update_fish_names(fish_id, updated_names)
-                        print(f"✓ Updated names for {fish_name}")
+            except Exception as e:
+                progress.advance(error=True)
+                logger.error(f"✗ Failed to update names for {fish_name}: {str(e)}")
 
-                except Exception as e:
-                    print(f"✗ Failed to update names for {fish_name}: {str(e)}")
+        self.for_each_item(apply_fish_names, matched_fishes)
+        progress.close()
 
         print(f"Enhanced {matched_count} fishes with translated names")
 
@@ -387,9 +347,13 @@ class FishPopulator(BasePopulator):
 
         self.get_system_token()
 
-        fish_data = self.fetch_fishes_from_nookipedia()
+        created_fish_ids = []
+        if self.selection.includes_stage('create') or self.selection.includes_stage('images'):
+            fish_data = self.fetch_fishes_from_nookipedia()
 
-        created_fish_ids = self.populate_fishes_to_api(fish_data)
+            created_fish_ids = self.populate_fishes_to_api(fish_data)
+        else:
+            print("Skipping fish population (--stage)")
 
         self.enhance_with_name_translations()
 
@@ -399,7 +363,10 @@ class FishPopulator(BasePopulator):
 def main():
     try:
         populator = FishPopulator()
-        populator.run()
+        try:
+            populator.run()
+        finally:
+            populator.finish()
     except Exception as e:
         print(f"Population failed: {str(e)}")
         sys.exit(1)
@@ -1,18 +1,24 @@
 #!/usr/bin/env python3
 
+import logging
 import json
 import os
 import sys
+from itertools import count
 from typing import Dict, List
 from base_populator import BasePopulator
+from tracing import timed, traced
+
+logger = logging.getLogger('populate.fossils')
 
 class FossilPopulator(BasePopulator):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, **options):
+        super().__init__(**options)
 
         if not self.nookipedia_api_key:
             raise ValueError("NOOKIPEDIA_API_KEY not found in environment variables")
 
+    @traced('fetch')
     def fetch_fossils_from_nookipedia(self) -> List[Dict]:
         print("Fetching fossils from Nookipedia API...")
 
@@ -32,6 +38,7 @@ class FossilPopulator(BasePopulator):
         words = part_name.split()
         return ' '.join(word.capitalize() for word in words)
 
+    @timed('transform')
     def transform_fossil_data(self, nookipedia_fossil: Dict) -> Dict:
         parts = []
         total_price = 0
@@ -63,83 +70,58 @@ class FossilPopulator(BasePopulator):
 
         return transformed_fossil
 
-    def populate_single_fossil(self, fossil: Dict) -> Dict:
-        headers = {
-            'Authorization': f'Bearer {self.system_token}',
-            'Content-Type': 'application/json'
-        }
-
-        response = self.session.post(
-            f"{self.api_base_url}/fossil",
-            json=fossil,
-            headers=headers
-        )
-
-        if response.status_code not in [200, 201]:
-            raise Exception(f"Failed to create fossil: {response.text}")
-
-        return response.json()
-
-    def upload_fossil_part_image(self, fossil_id: str, part_name: str, image_data: str) -> Dict:
-        try:
-            headers = {
-                'Authorization': f'Bearer {self.system_token}',
-                'Content-Type': 'application/json'
-            }
-
-            url = f"{self.api_base_url}/fossil/{fossil_id}/img/{part_name}"
-
-            response = self.session.post(
-                url,
-                json={"image_data": image_data},
-                headers=headers
-            )
-
-            if response.status_code not in [200, 201]:
-                raise Exception(f"Failed to upload fossil part image: {response.text}")
-
-            print(f"✓ Fossil part image uploaded successfully: {part_name}")
-            return response.json()
-
-        except Exception as e:
-            print(f"✗ Failed to upload fossil part image {part_name}: {str(e)}")
-            raise
-
+    @traced('run.populate')
     def populate_fossils_to_api(self, fossils: List[Dict]) -> List[str]:
+        existing_fossils = self.existing_entities('fossil')
+        fossils = self.selection.filter_sources(fossils, existing_fossils)
         print(f"Populating database with {len(fossils)} fossils...")
 
-        success_count = 0
-        error_count = 0
-        created_fossil_ids = []
+        progress = self.progress.stage('fossils', len(fossils))
+
+        # Items run in priority order, so log their position in that order rather than in the source list
+        position = count(1)
 
-        for i, fossil in enumerate(fossils, 1):
+        def populate_fossil(fossil) -> str:
             try:
-                print(f"\nProcessing fossil {i}/{len(fossils)}: {fossil['name']}")
-                transformed_fossil = self.transform_fossil_data(fossil)
+                logger.info(f"Processing fossil {next(position)}/{len(fossils)}: {fossil['name']}")
+                with self.tracer.tags(entity=fossil['name']):
+                    transformed_fossil = self.transform_fossil_data(fossil)
 
-                result = self.populate_single_fossil(transformed_fossil)
-                fossil_id = result.get('fossil', {}).get('_id')
+                    if self.selection.includes_stage('create'):
+                        fossil_id = self.api.create_entity('fossil', transformed_fossil).get('_id')
 
-                if not fossil_id:
-                    raise Exception("Failed to get fossil ID from creation response")
+                        if not fossil_id:
+                            raise Exception("Failed to get fossil ID from creation response")
 
-                print(f"✓ Successfully created fossil: {transformed_fossil['name']['en']} ({fossil_id})")
-                created_fossil_ids.append(fossil_id)
+                        logger.info(f"✓ Successfully created fossil: {transformed_fossil['name']['en']} ({fossil_id})")
+                    else:
+                        fossil_id = self.existing_entity_id(existing_fossils, fossil['name'])
 
-                for part in fossil.get('fossils', []):
-                    if 'image_url' in part and part['image_url']:
-                        try:
-                            part_name_normalized = self.normalize_part_name(part['name'])
-                            image_data = self.download_image_as_base64(part['image_url'])
-                            self.upload_fossil_part_image(fossil_id, part_name_normalized, image_data)
-                        except Exception as e:
-                            print(f"✗ Failed to upload image for {part['name']}: {str(e)}")
+                    for part in fossil.get('fossils', []):
+                        part_name_normalized = self.normalize_part_name(part['name'])
+                        if self.selection.includes_image(part_name_normalized) and 'image_url' in part and part['image_url']:
+                            try:
+                                with self.tracer.tags(image_type=part_name_normalized):
+                                    image_data = self.download_image_as_base64(part['image_url'])
+                                    self.upload_entity_image('fossil', fossil_id, part_name_normalized, image_data)
+                            except Exception as e:
+                                logger.error(f"✗ Failed to upload image for {part['name']}: {str(e)}")
 
-                success_count += 1
+                progress.advance()
+                return fossil_id
 
             except Exception as e:
-                error_count += 1
-                print(f"✗ Failed to create {fossil['name']}: {str(e)}")
+                progress.advance(error=True)
+                logger.error(f"✗ Failed to create {fossil['name']}: {str(e)}")
+                return None
+
+        priority = self.demand_priority('fossils')
+        results = self.for_each_item(populate_fossil, fossils, priority=lambda fossil: priority(fossil['name']))
+        progress.close()
+
+        created_fossil_ids = [fossil_id for fossil_id in results if fossil_id]
+        success_count = len(created_fossil_ids)
+        error_count = len(fossils) - success_count
 
         print(f"\n{'='*50}")
         print(f"FOSSILS POPULATION SUMMARY:")
@@ -160,8 +142,11 @@ class FossilPopulator(BasePopulator):
             self.get_system_token()
             print("")
 
-            fossils_data = self.fetch_fossils_from_nookipedia()
-            created_ids = self.populate_fossils_to_api(fossils_data)
+            if self.selection.includes_stage('create') or self.selection.includes_stage('images'):
+                fossils_data = self.fetch_fossils_from_nookipedia()
+                created_ids = self.populate_fossils_to_api(fossils_data)
+            else:
+                print("Skipping fossil population (--stage)")
 
             print(f"\n{'='*50}")
             print("FOSSILS PROCESS COMPLETED SUCCESSFULLY!")
@@ -173,4 +158,7 @@ class FossilPopulator(BasePopulator):
 
 if __name__ == "__main__":
     populator = FossilPopulator()
-    populator.run()
+    try:
+        populator.run()
+    finally:
+        populator.finish()
@@ -0,0 +1,119 @@
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+DEFAULT_BUDGET = 0.05
+LATENCY_WINDOW = 200
+MIN_SAMPLES = 20
+HEDGE_PERCENTILE = 0.95
+
+
+class RequestHedger:
+    """Send a second copy of a slow idempotent GET once it passes its host's p95 latency; the first response wins"""
+
+    def __init__(self, metrics=None, budget: float = None, max_workers: int = 32):
+        self.metrics = metrics
+        self.budget = DEFAULT_BUDGET if budget is None else budget
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='hedge')
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._latencies: Dict[str, deque] = {}
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def threshold(self, host: str) -> Optional[float]:
+        """Observed p95 latency of a host, or None until enough requests completed"""
+        with self._lock:
+            samples = sorted(self._latencies.get(host, ()))
+        if len(samples) < MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, math.ceil(HEDGE_PERCENTILE * len(samples)) - 1)]
+
+    def get(self, session, url: str, **kwargs):
+        host = urlsplit(url).netloc
+        with self._lock:
+            self.requests += 1
+
+        threshold = self.threshold(host)
+        if threshold is None:
+            return self._timed_get(session, host, url, kwargs)
+
+        primary = self._executor.submit(self._pooled_get, session, host, url, kwargs)
+        try:
+            return primary.result(timeout=threshold)
+        except FutureTimeout:
+            pass
+
+        with self._lock:
+            # Hedges are capped at a fraction of all requests so a slow host does not get double the load
+            if self.hedges >= self.budget * self.requests:
+                return primary.result()
+            self.hedges += 1
+
+        hedge = self._executor.submit(self._pooled_get, session, host, url, kwargs)
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    # The losing attempt still holds a pooled connection until its response is closed
+                    for loser in pending:
+                        loser.add_done_callback(close_response)
+                    self._record_outcome(host, won=future is hedge)
+                    return future.result()
+
+        self._record_outcome(host, won=False)
+        return primary.result()
+
+    def _pooled_get(self, session, host: str, url: str, kwargs: Dict):
+        return self._timed_get(self._thread_session(session), host, url, kwargs)
+
+    def _thread_session(self, session):
+        """This pool thread's own copy of the caller's session; requests sessions are not thread-safe"""
+        sessions = self._local.__dict__.setdefault('sessions', {})
+        if id(session) not in sessions:
+            import requests
+
+            # Same headers and hooks (metrics); the adapters are shared since their urllib3 connection
+            # pools are thread-safe, so retries and connection reuse behave as on the caller's session
+            thread_session = requests.Session()
+            thread_session.headers.update(session.headers)
+            thread_session.hooks = {event: list(hooks) for event, hooks in session.hooks.items()}
+            for prefix, adapter in session.adapters.items():
+                thread_session.mount(prefix, adapter)
+            sessions[id(session)] = thread_session
+        return sessions[id(session)]
+
+    def _timed_get(self, session, host: str, url: str, kwargs: Dict):
+        started = time.perf_counter()
+        response = session.get(url, **kwargs)
+        with self._lock:
+            self._latencies.setdefault(host, deque(maxlen=LATENCY_WINDOW)).append(time.perf_counter() - started)
+        return response
+
+    def _record_outcome(self, host: str, won: bool) -> None:
+        if won:
+            with self._lock:
+                self.hedge_wins += 1
+        if self.metrics:
+            self.metrics.inc('hedged_requests', host=host, result='won' if won else 'lost')
+
+    def print_summary(self) -> None:
+        if not self.requests:
+            return
+        print(f"\nHedged requests: {self.hedges} of {self.requests} GETs hedged "
+              f"({self.hedges / self.requests:.1%}, budget {self.budget:.0%}), {self.hedge_wins} hedges won")
+
+    def close(self) -> None:
+        # Losing attempts may still be in flight; they finish in the background
+        self._executor.shutdown(wait=False)
+
+
+def close_response(future) -> None:
+    if future.exception() is None:
+        future.result().close()
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Load generator replaying iOS app sessions against the API, with latency percentiles per route
+Usage: python loadgen.py [options]
+Examples:
+  python loadgen.py --base-url http://localhost:3010 --duration 60
+  python loadgen.py --concurrency 64 --users 16 --requests 5000
+  python loadgen.py --mix browse=5,filter=3,detail=4,icons=3,like=1,residents=1 --report load.json
+
+The API must hold a populated catalog (run app.py with API_BASE_URL pointing at it first).
+Virtual users are registered once as loadgen-<n>@loadgen.test and their tokens cached like the
+system token; against a local API, a short RATE_LIMIT_WINDOW keeps /auth/register out of the way.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+from dotenv import load_dotenv
+
+from api_client import DEFAULT_TIMEOUT, DEFAULT_TOKEN_CACHE_PATH, LIST_KEYS, TokenCache, jwt_claims, jwt_expiry
+from metrics import route_template
+from tracing import percentile
+
+DEFAULT_BASE_URL = 'http://localhost:3010'
+DEFAULT_MIX = {'browse': 30, 'filter': 20, 'detail': 25, 'icons': 15, 'like': 6, 'residents': 4}
+PERSONALITIES = ('cranky', 'jock', 'lazy', 'normal', 'peppy', 'smug', 'snooty', 'uchi')
+LIKE_CATEGORIES = {'villager': 'villagers', 'fish': 'fish', 'bug': 'bugs', 'fossil': 'fossils'}
+ICON_IMAGE_TYPE = 'small'
+DETAIL_IMAGE_TYPE = 'full'
+# A list screen shows about this many icons before the user scrolls
+ICONS_PER_SCREEN = 12
+MAX_RESIDENTS = 10
+MAX_FAVORITES = 3
+USER_EMAIL = 'loadgen-{index}@loadgen.test'
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    """Parse "browse=5,like=1" into scenario weights"""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise Exception(f"Unknown scenario '{name}', expected one of: {', '.join(DEFAULT_MIX)}")
+        try:
+            mix[name] = int(weight)
+        except ValueError:
+            raise Exception(f"Invalid weight for scenario '{name}': '{weight}'")
+    if not any(mix.values()):
+        raise Exception("At least one scenario needs a positive weight")
+    return mix
+
+
+class LoadRecorder:
+    """Latencies, statuses and errors per route"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.statuses: Dict[str, Counter] = {}
+        self.errors: Counter = Counter()
+        self.total = 0
+
+    def record(self, route: str, status: Optional[int], seconds: float, error: bool) -> None:
+        self.total += 1
+        self.latencies.setdefault(route, []).append(seconds)
+        self.statuses.setdefault(route, Counter())[status or 'exception'] += 1
+        if error:
+            self.errors[route] += 1
+
+    def report(self, elapsed: float) -> Dict:
+        routes = {}
+        for route, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            routes[route] = {
+                'count': len(values),
+                'rps': len(values) / elapsed,
+                'p50': percentile(values, 50),
+                'p95': percentile(values, 95),
+                'p99': percentile(values, 99),
+                'max': values[-1],
+                'errors': self.errors[route],
+                'error_rate': self.errors[route] / len(values),
+                'statuses': {str(status): count for status, count in self.statuses[route].items()}
+            }
+        errors = sum(self.errors.values())
+        return {
+            'elapsed': elapsed,
+            'requests': self.total,
+            'throughput': self.total / elapsed,
+            'errors': errors,
+            'error_rate': errors / self.total if self.total else 0.0,
+            'routes': routes
+        }
+
+    def print_report(self, report: Dict) -> None:
+        print(f"\n{'route':<44} {'count':>7} {'rps':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'errors':>8}")
+        print('-' * 99)
+        for route, stats in report['routes'].items():
+            print(
+                f"{route:<44} {stats['count']:>7} {stats['rps']:>7.1f} {stats['p50'] * 1000:>7.1f}ms "
+                f"{stats['p95'] * 1000:>7.1f}ms {stats['p99'] * 1000:>7.1f}ms {stats['error_rate']:>8.1%}"
+            )
+        print(f"\nThroughput: {report['throughput']:.1f} requests/s ({report['requests']} requests in {report['elapsed']:.1f}s)")
+        print(f"Errors: {report['errors']} ({report['error_rate']:.2%})")
+
+
+class VirtualUser:
+    """App user whose likes and island are changed by the write scenarios"""
+
+    def __init__(self, user_id: str, token: str, likes: List[Dict]):
+        self.id = user_id
+        self.token = token
+        self.likes = {(like['category'], like['name']) for like in likes}
+        # Workers sharing a user must not interleave read-modify-write sessions
+        self.lock = asyncio.Lock()
+
+
+class LoadGenerator:
+    """Closed-loop workers, each replaying weighted app sessions until the duration or request budget runs out"""
+
+    def __init__(self, base_url: str, mix: Dict[str, int] = None, concurrency: int = 16, users: int = 4,
+                 duration: float = 30, max_requests: int = None, think_time: float = 0, token_cache: TokenCache = None):
+        self.base_url = base_url.rstrip('/')
+        self.mix = mix or DEFAULT_MIX
+        self.concurrency = concurrency
+        self.user_count = users
+        self.duration = duration
+        self.max_requests = max_requests
+        self.think_time = think_time
+        self.token_cache = token_cache
+        self.recorder = LoadRecorder()
+        self.client = None
+        self._aiohttp = None
+        self.catalog: Dict[str, List[Dict]] = {}
+        self.users: List[VirtualUser] = []
+        self._deadline = None
+
+    async def request(self, method: str, path: str, user: VirtualUser = None, body: Dict = None,
+                      params: Dict = None, ok: Tuple[int, ...] = (200,), record: bool = True, route: str = None):
+        """Send one request, record its latency under its route template and return (status, JSON body or None)"""
+        aiohttp = self._aiohttp
+        headers = {'Authorization': f'Bearer {user.token}'} if user else {}
+        route = f"{method} {route or route_template(path)[1]}"
+        if params:
+            route += f"?{'&'.join(sorted(params))}"
+
+        started = time.perf_counter()
+        status, content, content_type = None, b'', None
+        try:
+            async with self.client.request(method, f"{self.base_url}{path}", json=body, params=params,
+                                           headers=headers) as response:
+                content = await response.read()
+                status, content_type = response.status, response.content_type
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            pass
+
+        if record:
+            self.recorder.record(route, status, time.perf_counter() - started, error=status not in ok)
+        try:
+            payload = json.loads(content) if content_type == 'application/json' and content else None
+        except ValueError:
+            payload = None
+        return status, payload
+
+    async def load_catalog(self) -> None:
+        for entry_type, list_key in LIST_KEYS.items():
+            status, payload = await self.request('GET', f'/{entry_type}', record=False)
+            if status != 200:
+                raise Exception(f"Failed to list {list_key} from {self.base_url}: {f'HTTP {status}' if status else 'no response'}")
+            self.catalog[entry_type] = payload.get(list_key, [])
+
+        if not self.catalog['villager']:
+            raise Exception(f"No villagers in the API at {self.base_url}, populate it first "
+                            f"(API_BASE_URL={self.base_url} python app.py villagers)")
+        print("Catalog: " + ', '.join(f"{len(items)} {LIST_KEYS[entry_type]}" for entry_type, items in self.catalog.items()))
+
+    async def user_token(self, index: int) -> str:
+        """Cached token of a load test user, registering the user on first use"""
+        email = USER_EMAIL.format(index=index)
+        key = hashlib.sha256(f"{self.base_url}\n{email}".encode('utf-8')).hexdigest()[:32]
+        cached = self.token_cache.load(key) if self.token_cache else None
+        if cached:
+            return cached['token']
+
+        password = hashlib.sha256(f"loadgen\n{email}".encode('utf-8')).hexdigest()[:24]
+        status, payload = await self.request('POST', '/auth/register', record=False,
+                                             body={'name': f'Loadgen {index}', 'email': email, 'password': password})
+        if status == 400:
+            status, payload = await self.request('POST', '/auth/login', record=False,
+                                                 body={'email': email, 'password': password})
+        if status == 429:
+            raise Exception("Rate limited while signing in load test users, use fewer --users "
+                            "or a shorter RATE_LIMIT_WINDOW on the API")
+        if status not in (200, 201) or not payload or not payload.get('token'):
+            raise Exception(f"Failed to sign in {email}: HTTP {status}")
+
+        token = payload['token']
+        if self.token_cache:
+            self.token_cache.store(key, token, jwt_expiry(token))
+        return token
+
+    async def load_users(self) -> None:
+        for index in range(self.user_count):
+            token = await self.user_token(index)
+            user_id = jwt_claims(token).get('user', {}).get('id')
+            status, payload = await self.request('GET', f'/user/{user_id}/like', record=False,
+                                                 user=VirtualUser(user_id, token, []))
+            if status != 200:
+                raise Exception(f"Failed to read likes of load test user {index}: HTTP {status}")
+            self.users.append(VirtualUser(user_id, token, payload.get('likes', [])))
+        print(f"Users: {len(self.users)} signed in")
+
+    def pick(self, entry_type: str = None) -> Tuple[str, Dict]:
+        entry_type = entry_type or random.choice([name for name, items in self.catalog.items() if items])
+        return entry_type, random.choice(self.catalog[entry_type])
+
+    async def fetch_image(self, entry_type: str, entry: Dict, image_type: str) -> None:
+        """Fetch an image the way the app does: by content-hash URL when the list gave one"""
+        if entry_type == 'fossil':
+            parts = entry.get('parts') or []
+            if parts:
+                await self.request('GET', f"/fossil/{entry['_id']}/img/{quote(random.choice(parts)['name'])}/raw",
+                                   ok=(200, 404), route='/fossil/:id/img/:part/raw')
+            return
+
+        image_hash = (entry.get('image_hashes') or {}).get(image_type)
+        if image_hash:
+            await self.request('GET', f"/{entry_type}/{entry['_id']}/img/{image_type}/{image_hash}.png", ok=(200, 302))
+        else:
+            await self.request('GET', f"/{entry_type}/{entry['_id']}/img/{image_type}/raw", ok=(200, 404))
+
+    async def browse(self, user: VirtualUser) -> None:
+        """Open a list screen, then one entry"""
+        entry_type, entry = self.pick()
+        await self.request('GET', f'/{entry_type}')
+        await self.request('GET', f"/{entry_type}/{entry['_id']}")
+
+    async def filter(self, user: VirtualUser) -> None:
+        """Filter villagers by species and/or personality, or fish and bugs by location"""
+        if random.random() < 0.7:
+            _, villager = self.pick('villager')
+            params = random.choice([
+                {'species': villager.get('species')},
+                {'personality': random.choice(PERSONALITIES)},
+                {'species': villager.get('species'), 'personality': random.choice(PERSONALITIES)}
+            ])
+            await self.request('GET', '/villager', params={name: value for name, value in params.items() if value})
+            return
+
+        entry_type = random.choice([name for name in ('fish', 'bug') if self.catalog[name]] or ['villager'])
+        _, entry = self.pick(entry_type)
+        params = {'location': entry['location']} if entry.get('location') else None
+        await self.request('GET', f'/{entry_type}', params=params)
+
+    async def detail(self, user: VirtualUser) -> None:
+        """Detail view: the entry and its large image"""
+        entry_type, entry = self.pick()
+        await self.request('GET', f"/{entry_type}/{entry['_id']}")
+        await self.fetch_image(entry_type, entry, DETAIL_IMAGE_TYPE)
+
+    async def icons(self, user: VirtualUser) -> None:
+        """A screen of list icons loaded at once"""
+        entry_type, _ = self.pick()
+        entries = random.sample(self.catalog[entry_type], min(ICONS_PER_SCREEN, len(self.catalog[entry_type])))
+        await asyncio.gather(*(self.fetch_image(entry_type, entry, ICON_IMAGE_TYPE) for entry in entries))
+
+    async def like(self, user: VirtualUser) -> None:
+        """Toggle a like, then refresh the likes screen"""
+        entry_type, entry = self.pick()
+        like = (LIKE_CATEGORIES[entry_type], entry['name']['en'])
+        async with user.lock:
+            method = 'DELETE' if like in user.likes else 'POST'
+            status, _ = await self.request(method, f'/user/{user.id}/like', user=user,
+                                           body={'category': like[0], 'name': like[1]})
+            if status == 200:
+                user.likes.symmetric_difference_update({like})
+            await self.request('GET', f'/user/{user.id}/like', user=user, params={'category': like[0]})
+
+    async def residents(self, user: VirtualUser) -> None:
+        """Open the island screen and save a new resident list"""
+        villagers = random.sample(self.catalog['villager'], min(random.randint(1, MAX_RESIDENTS), len(self.catalog['villager'])))
+        favorites = set(random.sample(range(len(villagers)), min(MAX_FAVORITES, len(villagers))))
+        residents = [
+            {'name': villager['name']['en'], 'favorite': index in favorites}
+            for index, villager in enumerate(villagers)
+        ]
+        async with user.lock:
+            await self.request('GET', f'/user/{user.id}/island/residents', user=user)
+            await self.request('PUT', f'/user/{user.id}/island/residents', user=user, body={'residents': residents})
+
+    def running(self) -> bool:
+        if self.max_requests is not None and self.recorder.total >= self.max_requests:
+            return False
+        return self.max_requests is not None or time.monotonic() < self._deadline
+
+    async def worker(self, index: int) -> None:
+        user = self.users[index % len(self.users)]
+        names = list(self.mix)
+        weights = [self.mix[name] for name in names]
+        while self.running():
+            scenario = random.choices(names, weights)[0]
+            await getattr(self, scenario)(user)
+            if self.think_time:
+                await asyncio.sleep(random.uniform(0, self.think_time))
+
+    async def run(self) -> Dict:
+        try:
+            import aiohttp
+        except ImportError:
+            raise Exception("The load generator requires aiohttp (pip install aiohttp)")
+
+        self._aiohttp = aiohttp
+        async with aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.concurrency * 2),
+            timeout=aiohttp.ClientTimeout(sock_connect=DEFAULT_TIMEOUT[0], sock_read=DEFAULT_TIMEOUT[1])
+        ) as client:
+            self.client = client
+            await self.load_catalog()
+            await self.load_users()
+
+            mix = ', '.join(f"{name}={weight}" for name, weight in self.mix.items() if weight)
+            limit = f"{self.max_requests} requests" if self.max_requests is not None else f"{self.duration:g}s"
+            print(f"Replaying {mix} with {self.concurrency} workers for {limit}...")
+
+            started = time.monotonic()
+            self._deadline = started + self.duration
+            await asyncio.gather(*(self.worker(index) for index in range(self.concurrency)))
+            elapsed = time.monotonic() - started
+            self.client = None
+
+        report = self.recorder.report(elapsed)
+        self.recorder.print_report(report)
+        return report
+
+
+def main():
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description='Replay app-like traffic against the API and report latency per route')
+    parser.add_argument('--base-url', default=os.getenv('LOADGEN_BASE_URL', DEFAULT_BASE_URL),
+                        help=f'API to load (default: LOADGEN_BASE_URL or {DEFAULT_BASE_URL})')
+    parser.add_argument('--duration', type=float, default=30, help='seconds to run (default: 30)')
+    parser.add_argument('--requests', type=int, default=None, metavar='N', help='stop after N requests instead of --duration')
+    parser.add_argument('--concurrency', type=int, default=16, metavar='N', help='concurrent app sessions (default: 16)')
+    parser.add_argument('--users', type=int, default=4, metavar='N', help='load test user accounts (default: 4)')
+    parser.add_argument('--mix', default=None, help=f"scenario weights (default: {','.join(f'{k}={v}' for k, v in DEFAULT_MIX.items())})")
+    parser.add_argument('--think', type=float, default=0, metavar='SECONDS', help='maximum random pause between sessions (default: 0)')
+    parser.add_argument('--seed', type=int, default=None, help='random seed for a repeatable scenario sequence')
+    parser.add_argument('--report', metavar='FILE', help='write the report to FILE as JSON')
+    parser.add_argument('--max-error-rate', type=float, default=None, metavar='FRACTION',
+                        help='exit with status 1 when the error rate is above FRACTION')
+    args = parser.parse_args()
+
+    try:
+        if args.concurrency < 1 or args.users < 1:
+            raise Exception("--concurrency and --users must be at least 1")
+        random.seed(args.seed)
+
+        generator = LoadGenerator(
+            args.base_url,
+            mix=parse_mix(args.mix) if args.mix else None,
+            concurrency=args.concurrency,
+            users=args.users,
+            duration=args.duration,
+            max_requests=args.requests,
+            think_time=args.think,
+            token_cache=TokenCache(os.getenv('TOKEN_CACHE_PATH') or DEFAULT_TOKEN_CACHE_PATH)
+        )
+        report = asyncio.run(generator.run())
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.report}")
+
+    if args.max_error_rate is not None and report['error_rate'] > args.max_error_rate:
+        print(f"\n✗ Error rate {report['error_rate']:.2%} is above {args.max_error_rate:.2%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
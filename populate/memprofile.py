@@ -0,0 +1,114 @@
+import linecache
+import os
+import threading
+import tracemalloc
+from typing import Dict, List
+
+PHASE_PREFIX = 'run.'
+
+SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+)
+
+
+class MemoryProfiler:
+    """Attribute tracemalloc peak and retained memory to tracer stages"""
+
+    def __init__(self, top_sites: int = 10):
+        self.top_sites = top_sites
+        self.stages: Dict[str, Dict] = {}
+        self.phase_sites: Dict[str, List] = {}
+        # Open spans per thread; peaks are process-wide, so every thread's open spans see them.
+        # A thread is registered in _stacks only while it has open spans
+        self._local = threading.local()
+        self._stacks: Dict[int, List[Dict]] = {}
+        self._lock = threading.Lock()
+        self._phase_snapshots: Dict[str, tracemalloc.Snapshot] = {}
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stop(self) -> None:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def on_span(self, event: str, stage: str, tags: Dict, duration: float) -> None:
+        """Tracer listener: track memory between the start and end of every span"""
+        if not tracemalloc.is_tracing():
+            return
+
+        if event == 'start':
+            with self._lock:
+                current, peak = tracemalloc.get_traced_memory()
+                self._raise_peaks(peak)
+                tracemalloc.reset_peak()
+                if not getattr(self._local, 'stack', None):
+                    self._local.stack = self._stacks[threading.get_ident()] = []
+                self._local.stack.append({'stage': stage, 'start': current, 'peak': current})
+
+            if stage.startswith(PHASE_PREFIX):
+                self._phase_snapshots[stage] = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+            return
+
+        stack = getattr(self._local, 'stack', None)
+        if not stack:
+            return
+
+        with self._lock:
+            current, peak = tracemalloc.get_traced_memory()
+            frame = stack.pop()
+            if not stack:
+                del self._stacks[threading.get_ident()]
+                self._local.stack = None
+            frame['peak'] = max(frame['peak'], peak)
+            self._raise_peaks(frame['peak'])
+
+            stats = self.stages.setdefault(stage, {'count': 0, 'peak': 0, 'retained': 0})
+            stats['count'] += 1
+            stats['peak'] = max(stats['peak'], frame['peak'] - frame['start'])
+            stats['retained'] += current - frame['start']
+
+        if stage.startswith(PHASE_PREFIX) and stage in self._phase_snapshots:
+            before = self._phase_snapshots.pop(stage)
+            after = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+            self.phase_sites[stage] = after.compare_to(before, 'lineno')[:self.top_sites]
+
+    def _raise_peaks(self, peak: int) -> None:
+        for stack in self._stacks.values():
+            for frame in stack:
+                frame['peak'] = max(frame['peak'], peak)
+
+    def print_report(self) -> None:
+        if not self.stages:
+            return
+
+        current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+
+        print(f"\n{'='*50}")
+        print("MEMORY PROFILE:")
+        print(f"{'='*50}")
+        print(f"Traced memory now: {format_size(current)}")
+        print(f"{'stage':<16} {'count':>7} {'peak':>11} {'retained':>11}")
+        for stage, stats in sorted(self.stages.items(), key=lambda item: item[1]['peak'], reverse=True):
+            print(f"{stage:<16} {stats['count']:>7} {format_size(stats['peak']):>11} {format_size(stats['retained']):>11}")
+
+        for stage, sites in self.phase_sites.items():
+            print(f"\nTop allocation sites retained by {stage}:")
+            for stat in sites:
+                frame = stat.traceback[0]
+                location = f"{os.path.basename(frame.filename)}:{frame.lineno}"
+                line = linecache.getline(frame.filename, frame.lineno).strip()
+                print(f"  {format_size(stat.size_diff):>11} {stat.count_diff:>+8} blocks  {location:<28} {line[:60]}")
+
+
+def format_size(size: float) -> str:
+    sign = '-' if size < 0 else ''
+    size = abs(size)
+    for unit in ('B', 'KiB', 'MiB'):
+        if size < 1024:
+            return f"{sign}{size:.1f}{unit}" if unit != 'B' else f"{sign}{int(size)}B"
+        size /= 1024
+    return f"{sign}{size:.1f}GiB"
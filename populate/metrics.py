@@ -0,0 +1,156 @@
+import os
+import re
+import threading
+from typing import Dict, Tuple
+from urllib.parse import urlsplit
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+OBJECT_ID_SEGMENT = re.compile(r'/[0-9a-fA-F]{24}(?=/|$)')
+CONTENT_HASH_SEGMENT = re.compile(r'/[0-9a-f]{32}(?=/|\.png$|$)')
+
+
+class MetricsRegistry:
+    """In-process counters and histograms rendered in OpenMetrics text format"""
+
+    def __init__(self, prefix: str = 'populate'):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Tuple, float]] = {}
+        self._histograms: Dict[str, Dict[Tuple, Dict]] = {}
+        self._help: Dict[str, str] = {}
+        self._buckets: Dict[str, Tuple[float, ...]] = {}
+        self._server = None
+
+    def describe(self, name: str, help_text: str, buckets: Tuple[float, ...] = None) -> None:
+        self._help[name] = help_text
+        if buckets:
+            self._buckets[name] = buckets
+
+    def inc(self, name: str, value: float = 1.0, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        buckets = self._buckets.get(name, DEFAULT_BUCKETS)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = {'buckets': [0] * len(buckets), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram['buckets'][index] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    def counter_value(self, name: str, **labels) -> float:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            return self._counters.get(name, {}).get(key, 0.0)
+
+    def render(self, openmetrics: bool = True) -> str:
+        """Render all series; openmetrics=False gives Prometheus text format for textfile collectors"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                full_name = f"{self.prefix}_{name}"
+                family = full_name if openmetrics else f"{full_name}_total"
+                if name in self._help:
+                    lines.append(f"# HELP {family} {self._help[name]}")
+                lines.append(f"# TYPE {family} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{full_name}_total{format_labels(key)} {format_value(value)}")
+
+            for name, series in sorted(self._histograms.items()):
+                full_name = f"{self.prefix}_{name}"
+                buckets = self._buckets.get(name, DEFAULT_BUCKETS)
+                if name in self._help:
+                    lines.append(f"# HELP {full_name} {self._help[name]}")
+                lines.append(f"# TYPE {full_name} histogram")
+                for key, histogram in sorted(series.items()):
+                    for bound, count in zip(buckets, histogram['buckets']):
+                        lines.append(f"{full_name}_bucket{format_labels(key + (('le', format_value(bound)),))} {count}")
+                    lines.append(f"{full_name}_bucket{format_labels(key + (('le', '+Inf'),))} {histogram['count']}")
+                    lines.append(f"{full_name}_sum{format_labels(key)} {format_value(histogram['sum'])}")
+                    lines.append(f"{full_name}_count{format_labels(key)} {histogram['count']}")
+
+        if openmetrics:
+            lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port: int, host: str = '127.0.0.1') -> None:
+        """Expose /metrics on a background HTTP server until stop() is called"""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/openmetrics-text; version=1.0.0; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        thread = threading.Thread(target=self._server.serve_forever, name='metrics-server', daemon=True)
+        thread.start()
+        print(f"Metrics available at http://{host}:{port}/metrics")
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def write_textfile(self, path: str) -> None:
+        """Atomically write metrics for the node_exporter textfile collector"""
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render(openmetrics=False))
+        os.replace(temp_path, path)
+        print(f"Metrics written to {path}")
+
+
+def format_labels(key: Tuple) -> str:
+    if not key:
+        return ''
+    pairs = ','.join(f'{name}="{escape_label(value)}"' for name, value in key)
+    return '{' + pairs + '}'
+
+
+def escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def format_value(value: float) -> str:
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def route_template(url: str) -> Tuple[str, str]:
+    """Return (host, route) with IDs, wiki pages and CDN files collapsed into placeholders"""
+    parts = urlsplit(url)
+    path = parts.path or '/'
+
+    if path.startswith('/wiki/'):
+        path = '/wiki/:page'
+    elif path.startswith('/np/'):
+        path = '/np/:image'
+    else:
+        path = CONTENT_HASH_SEGMENT.sub('/:hash', OBJECT_ID_SEGMENT.sub('/:id', path))
+
+    return parts.netloc, path
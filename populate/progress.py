@@ -0,0 +1,192 @@
+import json
+import logging
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+LOGGER_NAME = 'populate'
+
+
+class StageProgress:
+    """Done/total counter for one stage, rendered as a single status line"""
+
+    def __init__(self, reporter: 'ProgressReporter', name: str, total: int):
+        self.reporter = reporter
+        self.name = name
+        self.total = total
+        self.done = 0
+        self.errors = 0
+        self.bytes = 0
+        self.started = time.monotonic()
+        self._last_render = self.started
+
+    def __enter__(self) -> 'StageProgress':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def advance(self, count: int = 1, error: bool = False) -> None:
+        with self.reporter.lock:
+            self.done += count
+            if error:
+                self.errors += 1
+            self._maybe_render()
+
+    def add_bytes(self, count: int) -> None:
+        with self.reporter.lock:
+            self.bytes += count
+            self._maybe_render()
+
+    def close(self) -> None:
+        with self.reporter.lock:
+            self.reporter.render(self, final=True)
+            if self.reporter.active is self:
+                self.reporter.active = None
+
+    def status_line(self) -> str:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        rate = self.done / elapsed
+        percent = f" {self.done / self.total:>4.0%}" if self.total else ''
+        line = (
+            f"[{self.name}] {self.done}/{self.total}{percent} | {rate:.1f} items/s"
+            f" | {format_bytes(self.bytes / elapsed)}/s"
+        )
+        if self.errors:
+            line += f" | {self.errors} errors"
+        if self.total and self.done < self.total and rate > 0:
+            line += f" | ETA {format_duration((self.total - self.done) / rate)}"
+        else:
+            line += f" | {format_duration(elapsed)}"
+        return line
+
+    def _maybe_render(self) -> None:
+        now = time.monotonic()
+        if now - self._last_render >= self.reporter.interval:
+            self._last_render = now
+            self.reporter.render(self)
+
+
+class ProgressReporter:
+    """Aggregated per-stage progress on stderr: redrawn in place on a TTY, periodic lines otherwise"""
+
+    def __init__(self, stream=None, interval: float = None):
+        self.stream = stream or sys.stderr
+        self.is_tty = hasattr(self.stream, 'isatty') and self.stream.isatty()
+        self.interval = interval if interval is not None else (0.2 if self.is_tty else 10.0)
+        self.lock = threading.RLock()
+        self.active: StageProgress = None
+        self._line_visible = False
+
+    def stage(self, name: str, total: int) -> StageProgress:
+        with self.lock:
+            self.active = StageProgress(self, name, total)
+            return self.active
+
+    def add_bytes(self, count: int) -> None:
+        active = self.active
+        if active:
+            active.add_bytes(count)
+
+    def render(self, stage: StageProgress, final: bool = False) -> None:
+        line = stage.status_line()
+        if self.is_tty:
+            self.stream.write('\r\033[K' + line + ('\n' if final else ''))
+            self._line_visible = not final
+        else:
+            self.stream.write(line + '\n')
+        self.stream.flush()
+
+    def write_line(self, text: str) -> None:
+        """Print a message above the status line without corrupting it"""
+        with self.lock:
+            if self._line_visible:
+                self.stream.write('\r\033[K')
+            self.stream.write(text + '\n')
+            if self._line_visible and self.active:
+                self.stream.write(self.active.status_line())
+            self.stream.flush()
+
+
+class ProgressConsoleHandler(logging.Handler):
+    """Console log handler that cooperates with the progress status line"""
+
+    def __init__(self, reporter: ProgressReporter, level=logging.WARNING):
+        super().__init__(level)
+        self.reporter = reporter
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self.reporter.write_line(self.format(record))
+        except Exception:
+            self.handleError(record)
+
+
+class JsonLogFormatter(logging.Formatter):
+    """One JSON object per line, including tracer tags such as entity and image_type"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        entry.update(getattr(record, 'tags', {}))
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class TracerTagsFilter(logging.Filter):
+    """Attach the current tracer tags to every log record"""
+
+    def __init__(self, tracer):
+        super().__init__()
+        self.tracer = tracer
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.tags = self.tracer.current_tags()
+        return True
+
+
+def configure_logging(reporter: ProgressReporter, tracer, log_file: str = None, log_level: str = 'INFO') -> logging.Logger:
+    """Send warnings to the console and detailed lines to a JSON log file"""
+    logger = logging.getLogger(LOGGER_NAME)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+
+    console = ProgressConsoleHandler(reporter)
+    console.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(console)
+
+    if log_file:
+        file_handler = logging.FileHandler(log_file, encoding='utf-8')
+        file_handler.setLevel(getattr(logging, log_level.upper()))
+        file_handler.setFormatter(JsonLogFormatter())
+        file_handler.addFilter(TracerTagsFilter(tracer))
+        logger.addHandler(file_handler)
+
+    return logger
+
+
+def format_bytes(size: float) -> str:
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1000:
+            return f"{size:.0f}{unit}" if unit == 'B' else f"{size:.1f}{unit}"
+        size /= 1000
+    return f"{size:.1f}GB"
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
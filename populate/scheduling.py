@@ -0,0 +1,42 @@
+from typing import Callable, Dict, List
+
+# Best tier first; unranked villagers get no rank points
+RANK_TIERS = ('S+', 'S', 'A', 'B', 'C', 'D', 'E', 'F', 'G')
+FAVORITE_WEIGHT = 2
+
+
+class DemandPriority:
+    """Priority of an entity by English name: popularity rank tier plus user demand (likes, island residents)"""
+
+    def __init__(self, ranks: Dict[str, str] = None, demand: Dict[str, Dict[str, int]] = None):
+        self.ranks = ranks or {}
+        self.demand = {name: self.demand_count(counts) for name, counts in (demand or {}).items()}
+        self.max_demand = max(self.demand.values(), default=0)
+
+    @staticmethod
+    def demand_count(counts: Dict[str, int]) -> int:
+        return counts.get('likes', 0) + counts.get('residents', 0) + FAVORITE_WEIGHT * counts.get('favorites', 0)
+
+    def rank_points(self, name: str) -> int:
+        rank = self.ranks.get(name)
+        return len(RANK_TIERS) - RANK_TIERS.index(rank) if rank in RANK_TIERS else 0
+
+    def demand_points(self, name: str) -> float:
+        # Scaled to the rank range so the most wanted entity weighs as much as an S+ rank
+        if not self.max_demand:
+            return 0
+        return len(RANK_TIERS) * self.demand.get(name, 0) / self.max_demand
+
+    def __call__(self, name: str) -> float:
+        return self.rank_points(name) + self.demand_points(name)
+
+    def __len__(self) -> int:
+        return len(self.ranks) + len(self.demand)
+
+
+def schedule(items: List, priority: Callable = None) -> List[int]:
+    """Indexes of items, highest priority first; ties keep their original order"""
+    order = list(range(len(items)))
+    if priority:
+        order.sort(key=lambda index: priority(items[index]), reverse=True)
+    return order
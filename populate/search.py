@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+
+from base_populator import BasePopulator
+
+
+class SearchIndexPopulator(BasePopulator):
+
+    def run(self):
+        try:
+            print("=== SEARCH INDEX BUILD STARTED ===")
+
+            self.get_system_token()
+            self.publish_search_index()
+
+            print(f"\n=== SEARCH INDEX PUBLISHED ===")
+
+        except Exception as e:
+            print(f"Search index build failed: {str(e)}")
+            raise
+
+
+if __name__ == "__main__":
+    populator = SearchIndexPopulator()
+    try:
+        populator.run()
+    finally:
+        populator.finish()
@@ -0,0 +1,97 @@
+import json
+import unicodedata
+from datetime import datetime, timezone
+from typing import Dict, List
+
+INDEX_VERSION = 1
+SEARCH_INDEX_ARTIFACT = 'search-index'
+MAX_PREFIX = 12
+
+CJK_RANGES = (
+    (0x1100, 0x11FF),
+    (0x3040, 0x30FF),
+    (0x3130, 0x318F),
+    (0x3400, 0x4DBF),
+    (0x4E00, 0x9FFF),
+    (0xAC00, 0xD7AF),
+    (0xF900, 0xFAFF),
+)
+
+
+def fold_text(text: str) -> str:
+    """Lowercase, strip Latin diacritics and map katakana to hiragana (mirrored by api/utils/search.util.js)"""
+    decomposed = unicodedata.normalize('NFKD', text)
+    stripped = ''.join(char for char in decomposed if not 0x0300 <= ord(char) <= 0x036F)
+    folded = unicodedata.normalize('NFC', stripped).lower()
+    return ''.join(chr(ord(char) - 0x60) if 0x30A1 <= ord(char) <= 0x30F6 else char for char in folded)
+
+
+def is_cjk(char: str) -> bool:
+    code = ord(char)
+    return any(start <= code <= end for start, end in CJK_RANGES)
+
+
+def split_runs(folded: str) -> List[str]:
+    """Split folded text into letter/digit runs, breaking again wherever CJK and other scripts meet"""
+    runs = []
+    current = ''
+    for char in folded:
+        if unicodedata.category(char)[0] not in ('L', 'N'):
+            if current:
+                runs.append(current)
+            current = ''
+            continue
+        if current and is_cjk(current[-1]) != is_cjk(char):
+            runs.append(current)
+            current = ''
+        current += char
+    if current:
+        runs.append(current)
+    return runs
+
+
+def index_terms(text: str) -> set:
+    """Prefixes of every word, plus unigrams and bigrams of CJK runs"""
+    terms = set()
+    for run in split_runs(fold_text(text)):
+        if is_cjk(run[0]):
+            terms.update(run)
+            terms.update(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            terms.update(run[:length] for length in range(1, min(len(run), MAX_PREFIX) + 1))
+    return terms
+
+
+class SearchIndexBuilder:
+    """Collect multilingual names per catalog entry and build an inverted prefix/n-gram index"""
+
+    def __init__(self):
+        self.docs: List[Dict] = []
+        self.terms: Dict[str, set] = {}
+
+    def add(self, entry_type: str, entry_id: str, names: Dict[str, str], aliases: List[str] = None) -> None:
+        names = {lang: name for lang, name in (names or {}).items() if isinstance(name, str) and name.strip()}
+        if not names:
+            return
+
+        doc_index = len(self.docs)
+        doc = {'type': entry_type, '_id': entry_id, 'name': names}
+        if aliases:
+            doc['aliases'] = aliases
+        self.docs.append(doc)
+
+        for text in list(names.values()) + (aliases or []):
+            for term in index_terms(text):
+                self.terms.setdefault(term, set()).add(doc_index)
+
+    def build(self) -> Dict:
+        return {
+            'version': INDEX_VERSION,
+            'generated_at': datetime.now(timezone.utc).isoformat(),
+            'max_prefix': MAX_PREFIX,
+            'docs': self.docs,
+            'terms': {term: sorted(postings) for term, postings in sorted(self.terms.items())}
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.build(), ensure_ascii=False, separators=(',', ':'))
@@ -0,0 +1,97 @@
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+STAGES = ('create', 'images', 'house', 'names', 'ranks', 'bundle', 'sprites')
+
+
+def parse_list(value: Optional[str]) -> Optional[List[str]]:
+    """Split a comma-separated option value, None when the option was not given"""
+    if value is None:
+        return None
+    return [part.strip() for part in value.split(',') if part.strip()]
+
+
+def parse_timestamp(value: str) -> datetime:
+    """Parse an ISO date or date-time (e.g. 2024-05-01 or 2024-05-01T12:00:00Z) as an aware UTC datetime"""
+    try:
+        timestamp = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise Exception(f"Invalid timestamp '{value}', expected an ISO date such as 2024-05-01")
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp
+
+
+class Selection:
+    """Which items, stages and image types a run touches; the default selects everything"""
+
+    def __init__(self, only: List[str] = None, stages: List[str] = None, image_types: List[str] = None,
+                 changed_since: datetime = None):
+        unknown = sorted(set(stages or ()) - set(STAGES))
+        if unknown:
+            raise Exception(f"Unknown stage(s) {', '.join(unknown)}, expected one of: {', '.join(STAGES)}")
+
+        self.only = {self.normalize_name(name) for name in only} if only else None
+        self.stages = set(stages) if stages else None
+        self.image_types = set(image_types) if image_types else None
+        self.changed_since = changed_since
+
+    @staticmethod
+    def normalize_name(name: str) -> str:
+        return name.lower().strip().replace("’", "'")
+
+    @property
+    def is_full(self) -> bool:
+        return self.only is None and self.stages is None and self.image_types is None and self.changed_since is None
+
+    def includes_stage(self, stage: str) -> bool:
+        return self.stages is None or stage in self.stages
+
+    def rebuilds(self, artifact_stage: str) -> bool:
+        """Whole-catalog artifacts are rebuilt after full runs, or after partial runs that name their stage"""
+        return self.is_full or (self.stages is not None and artifact_stage in self.stages)
+
+    def includes_image(self, image_type: str) -> bool:
+        return self.includes_stage('images') and (self.image_types is None or image_type in self.image_types)
+
+    def includes_name(self, name: str) -> bool:
+        return self.only is None or self.normalize_name(name or '') in self.only
+
+    def changed(self, entity: Dict) -> bool:
+        """Whether an API entity was updated at or after --changed-since"""
+        if self.changed_since is None:
+            return True
+        updated_at = entity.get('updatedAt') or entity.get('createdAt')
+        return bool(updated_at) and parse_timestamp(updated_at) >= self.changed_since
+
+    def filter_sources(self, items: List[Dict], existing: Dict[str, Dict] = None) -> List[Dict]:
+        """Nookipedia items to process; with --changed-since, items missing from the API always count as changed"""
+        selected = [item for item in items if self.includes_name(item.get('name'))]
+        if self.changed_since is None or existing is None:
+            return selected
+        return [
+            item for item in selected
+            if self.normalize_name(item['name']) not in existing or self.changed(existing[self.normalize_name(item['name'])])
+        ]
+
+    def filter_entities(self, entities: List[Dict]) -> List[Dict]:
+        """API entities to enhance"""
+        return [
+            entity for entity in entities
+            if self.includes_name(entity.get('name', {}).get('en')) and self.changed(entity)
+        ]
+
+    def index_by_name(self, entities: List[Dict]) -> Dict[str, Dict]:
+        return {self.normalize_name(entity['name']['en']): entity for entity in entities if entity.get('name', {}).get('en')}
+
+    def describe(self) -> str:
+        parts = []
+        if self.only is not None:
+            parts.append(f"only {len(self.only)} item(s)")
+        if self.stages is not None:
+            parts.append(f"stages {','.join(stage for stage in STAGES if stage in self.stages)}")
+        if self.image_types is not None:
+            parts.append(f"image types {','.join(sorted(self.image_types))}")
+        if self.changed_since is not None:
+            parts.append(f"changed since {self.changed_since.isoformat()}")
+        return '; '.join(parts) if parts else 'everything'
@@ -0,0 +1,262 @@
+import json
+import mmap
+import os
+import struct
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List
+
+MAGIC = b'THIBOUCS'
+SNAPSHOT_VERSION = 1
+HEADER = struct.Struct('<8sII')
+ALIGNMENT = 8
+
+ENUM_COLUMNS = {'species', 'personality', 'gender', 'sign', 'popularity_rank', 'rarity', 'location', 'weather', 'debut'}
+JSON_COLUMNS = {'availability', 'parts'}
+NUMERIC_FORMATS = {int: 'q', float: 'd', bool: '?'}
+
+
+class JsonValue(str):
+    """Marks a flattened value that was serialized to JSON"""
+
+
+def flatten_record(record: Dict, prefix: str = '') -> Dict:
+    """Flatten nested dicts into dotted column names, keeping JSON_COLUMNS and lists as JSON values"""
+    columns = {}
+    for key, value in record.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict) and key not in JSON_COLUMNS:
+            columns.update(flatten_record(value, f"{name}."))
+        elif isinstance(value, (dict, list)):
+            columns[name] = JsonValue(json.dumps(value, ensure_ascii=False, separators=(',', ':')))
+        else:
+            columns[name] = value
+    return columns
+
+
+def column_kind(name: str, values: List) -> str:
+    """enum for ENUM_COLUMNS, a struct format for complete numeric columns, str for text, json otherwise"""
+    present = [value for value in values if value is not None]
+    if name in ENUM_COLUMNS:
+        return 'enum'
+    if all(type(value) is str for value in present):
+        return 'str'
+    if present and len(present) == len(values):
+        value_type = type(present[0])
+        if value_type in NUMERIC_FORMATS and all(type(value) is value_type for value in present):
+            return NUMERIC_FORMATS[value_type]
+    return 'json'
+
+
+def encode_column(kind: str, values: List):
+    """Return (block bytes, extra metadata) for one column"""
+    if kind == 'enum':
+        dictionary = []
+        codes = {}
+        for value in values:
+            if value not in codes:
+                codes[value] = len(dictionary)
+                dictionary.append(value)
+        code_format = 'B' if len(dictionary) <= 256 else 'H'
+        return struct.pack(f'<{len(values)}{code_format}', *(codes[value] for value in values)), {
+            'format': code_format, 'values': dictionary
+        }
+
+    if kind in ('str', 'json'):
+        blob = bytearray()
+        offsets = [0]
+        nulls = []
+        for index, value in enumerate(values):
+            if value is None:
+                nulls.append(index)
+            else:
+                text = value if kind == 'str' or isinstance(value, JsonValue) else json.dumps(value)
+                blob.extend(text.encode('utf-8'))
+            offsets.append(len(blob))
+        return struct.pack(f'<{len(offsets)}I', *offsets) + bytes(blob), {'nulls': nulls}
+
+    return struct.pack(f'<{len(values)}{kind}', *values), {}
+
+
+def write_snapshot(path: str, tables: Dict[str, List[Dict]]) -> int:
+    """Write tables of API records as a columnar snapshot and return its size in bytes"""
+    blocks = []
+    metadata = {
+        'version': SNAPSHOT_VERSION,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'tables': {}
+    }
+
+    position = 0
+    for table_name, records in tables.items():
+        rows = [flatten_record(record) for record in records]
+        names = []
+        for row in rows:
+            names.extend(name for name in row if name not in names)
+
+        columns = {}
+        for name in names:
+            values = [row.get(name) for row in rows]
+            kind = column_kind(name, values)
+            block, extra = encode_column(kind, values)
+            columns[name] = dict(kind=kind, offset=position, length=len(block), **extra)
+            padding = -len(block) % ALIGNMENT
+            blocks.append(block + b'\0' * padding)
+            position += len(block) + padding
+
+        metadata['tables'][table_name] = {'rows': len(rows), 'columns': columns}
+
+    metadata_bytes = json.dumps(metadata, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    metadata_bytes += b' ' * (-(HEADER.size + len(metadata_bytes)) % ALIGNMENT)
+
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, SNAPSHOT_VERSION, len(metadata_bytes)))
+        f.write(metadata_bytes)
+        for block in blocks:
+            f.write(block)
+    os.replace(temp_path, path)
+
+    return HEADER.size + len(metadata_bytes) + position
+
+
+class SnapshotColumn:
+    """Random access to one memory-mapped column"""
+
+    __slots__ = ('kind', 'values', 'nulls', '_data', '_offsets')
+
+    def __init__(self, buffer: memoryview, rows: int, spec: Dict):
+        self.kind = spec['kind']
+        self.values = spec.get('values')
+        self.nulls = set(spec.get('nulls', ()))
+        block = buffer[spec['offset']:spec['offset'] + spec['length']]
+
+        if self.kind in ('str', 'json'):
+            offsets_size = (rows + 1) * 4
+            self._offsets = block[:offsets_size].cast('I')
+            self._data = block[offsets_size:]
+        else:
+            self._offsets = None
+            self._data = block.cast(spec['format'] if self.kind == 'enum' else self.kind)
+
+    def __getitem__(self, index: int):
+        if self.kind == 'enum':
+            return self.values[self._data[index]]
+        if self._offsets is None:
+            return self._data[index]
+        if index in self.nulls:
+            return None
+
+        text = str(self._data[self._offsets[index]:self._offsets[index + 1]], 'utf-8')
+        return json.loads(text) if self.kind == 'json' else text
+
+    def release(self) -> None:
+        if self._offsets is not None:
+            self._offsets.release()
+        self._data.release()
+
+
+class RecordView:
+    """Lazy view of one snapshot row; nested groups such as name or house come back as dicts"""
+
+    __slots__ = ('_table', '_index')
+
+    def __init__(self, table: 'SnapshotTable', index: int):
+        self._table = table
+        self._index = index
+
+    def __getitem__(self, column: str):
+        return self._table.columns[column][self._index]
+
+    def __getattr__(self, name: str):
+        table = self._table
+        if name in table.columns:
+            return table.columns[name][self._index]
+        if name in table.groups:
+            return {column[len(name) + 1:]: table.columns[column][self._index] for column in table.groups[name]}
+        raise AttributeError(name)
+
+    def get(self, column: str, default=None):
+        column_data = self._table.columns.get(column)
+        return column_data[self._index] if column_data else default
+
+    def to_dict(self) -> Dict:
+        record = {}
+        for column, column_data in self._table.columns.items():
+            target = record
+            *parents, leaf = column.split('.')
+            for parent in parents:
+                target = target.setdefault(parent, {})
+            target[leaf] = column_data[self._index]
+        return record
+
+    def __repr__(self) -> str:
+        return f"<{self._table.name} #{self._index} {self.get('name.en')}>"
+
+
+class SnapshotTable:
+    def __init__(self, name: str, buffer: memoryview, spec: Dict):
+        self.name = name
+        self.rows = spec['rows']
+        self.columns = {column: SnapshotColumn(buffer, self.rows, column_spec) for column, column_spec in spec['columns'].items()}
+        self.groups: Dict[str, List[str]] = {}
+        for column in self.columns:
+            if '.' in column:
+                self.groups.setdefault(column.split('.', 1)[0], []).append(column)
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __getitem__(self, index: int) -> RecordView:
+        if not -self.rows <= index < self.rows:
+            raise IndexError(index)
+        return RecordView(self, index % self.rows)
+
+    def __iter__(self) -> Iterator[RecordView]:
+        return (RecordView(self, index) for index in range(self.rows))
+
+    def find(self, column: str, value) -> List[RecordView]:
+        column_data = self.columns[column]
+        if column_data.kind == 'enum':
+            if value not in column_data.values:
+                return []
+            code = column_data.values.index(value)
+            return [RecordView(self, index) for index, row_code in enumerate(column_data._data) if row_code == code]
+        return [RecordView(self, index) for index in range(self.rows) if column_data[index] == value]
+
+
+class CatalogSnapshot:
+    """Memory-mapped catalog snapshot written by write_snapshot"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, metadata_length = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise Exception(f"Not a catalog snapshot: {path}")
+        if version != SNAPSHOT_VERSION:
+            raise Exception(f"Unsupported snapshot version {version} in {path}")
+
+        metadata_end = HEADER.size + metadata_length
+        self.metadata = json.loads(self._mmap[HEADER.size:metadata_end])
+        self._buffer = memoryview(self._mmap)[metadata_end:]
+        self.tables = {name: SnapshotTable(name, self._buffer, spec) for name, spec in self.metadata['tables'].items()}
+
+    def __getitem__(self, table: str) -> SnapshotTable:
+        return self.tables[table]
+
+    def __enter__(self) -> 'CatalogSnapshot':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for table in self.tables.values():
+            for column in table.columns.values():
+                column.release()
+        self.tables = {}
+        self._buffer.release()
+        self._mmap.close()
+        self._file.close()
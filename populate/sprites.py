@@ -0,0 +1,74 @@
+import base64
+import hashlib
+import io
+import json
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+SPRITE_TYPES = ('villager', 'fish', 'bug')
+SPRITE_IMAGE_TYPE = 'small'
+CELL_SIZE = 64
+ATLAS_COLUMNS = 32
+ATLAS_ROWS = 32
+
+
+def sprite_artifact_names(entry_type: str, count: int) -> Tuple[str, List[str]]:
+    """Artifact names of the coordinate map and the atlas PNGs of one entity type"""
+    return f"sprites-{entry_type}.json", [f"sprites-{entry_type}-{index}.png" for index in range(count)]
+
+
+def load_icon(image_data: str, cell_size: int) -> 'Image.Image':
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(base64.b64decode(image_data.split(',', 1)[1])))
+    if image.mode != 'RGBA':
+        image = image.convert('RGBA')
+    image.thumbnail((cell_size, cell_size), Image.Resampling.LANCZOS)
+    return image
+
+
+def pack_sprite_atlases(entry_type: str, icons: List[Tuple[str, str]], cell_size: int = CELL_SIZE) -> Tuple[List[bytes], Dict]:
+    """Pack (id, base64 PNG) icons into fixed-cell atlases and return the PNGs and their coordinate map"""
+    from PIL import Image
+
+    per_atlas = ATLAS_COLUMNS * ATLAS_ROWS
+    atlases = []
+    atlas_entries = []
+    sprites = {}
+
+    for start in range(0, len(icons), per_atlas):
+        chunk = icons[start:start + per_atlas]
+        rows = (len(chunk) + ATLAS_COLUMNS - 1) // ATLAS_COLUMNS
+        columns = min(len(chunk), ATLAS_COLUMNS)
+        atlas = Image.new('RGBA', (columns * cell_size, rows * cell_size), (0, 0, 0, 0))
+        atlas_index = len(atlases)
+
+        for position, (entry_id, image_data) in enumerate(chunk):
+            icon = load_icon(image_data, cell_size)
+            x = position % ATLAS_COLUMNS * cell_size + (cell_size - icon.width) // 2
+            y = position // ATLAS_COLUMNS * cell_size + (cell_size - icon.height) // 2
+            atlas.paste(icon, (x, y))
+            sprites[entry_id] = {'atlas': atlas_index, 'x': x, 'y': y, 'w': icon.width, 'h': icon.height}
+
+        buffer = io.BytesIO()
+        atlas.save(buffer, format='PNG', optimize=True)
+        atlases.append(buffer.getvalue())
+        atlas_entries.append({
+            'url': f"/catalog/sprites/{entry_type}/{atlas_index}.png?v={hashlib.sha256(atlases[-1]).hexdigest()[:32]}",
+            'width': atlas.width,
+            'height': atlas.height
+        })
+
+    sprite_map = {
+        'type': entry_type,
+        'cell_size': cell_size,
+        'atlases': atlas_entries,
+        'sprites': sprites
+    }
+    return atlases, sprite_map
+
+
+def sprite_map_json(sprite_map: Dict) -> str:
+    return json.dumps(sprite_map, separators=(',', ':'), sort_keys=True)
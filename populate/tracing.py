@@ -0,0 +1,169 @@
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, List
+
+
+class Tracer:
+    """Collect timed spans for populate stages and report per-stage latency"""
+
+    def __init__(self):
+        self.spans: List[Dict] = []
+        # Durations of hot per-item calls, summarized like spans but without span events
+        self.timings: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._origin = time.perf_counter()
+        self._listeners = []
+
+    def add_listener(self, listener) -> None:
+        """Register a callable(event, stage, tags, duration) notified on span start and end"""
+        self._listeners.append(listener)
+
+    def current_tags(self) -> Dict:
+        stack = getattr(self._local, 'tags', None)
+        return stack[-1] if stack else {}
+
+    @contextmanager
+    def tags(self, **tags):
+        """Attach tags to every span opened inside this block on the current thread"""
+        if not hasattr(self._local, 'tags'):
+            self._local.tags = []
+        merged = dict(self.current_tags())
+        merged.update({key: value for key, value in tags.items() if value is not None})
+        self._local.tags.append(merged)
+        try:
+            yield
+        finally:
+            self._local.tags.pop()
+
+    @contextmanager
+    def span(self, stage: str, **tags):
+        """Time the enclosed block as one occurrence of a stage"""
+        span_tags = dict(self.current_tags())
+        span_tags.update({key: value for key, value in tags.items() if value is not None})
+
+        for listener in self._listeners:
+            listener('start', stage, span_tags, 0.0)
+
+        start = time.perf_counter()
+        error = None
+        try:
+            yield span_tags
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            if error:
+                span_tags['error'] = error
+
+            with self._lock:
+                self.spans.append({
+                    'stage': stage,
+                    'start': start - self._origin,
+                    'duration': duration,
+                    'tid': threading.get_ident(),
+                    'tags': span_tags
+                })
+
+            for listener in self._listeners:
+                listener('end', stage, span_tags, duration)
+
+    def add_timing(self, stage: str, duration: float) -> None:
+        """Count one occurrence of a stage in the summary without recording a span"""
+        with self._lock:
+            self.timings.setdefault(stage, []).append(duration)
+
+    def summary(self) -> Dict[str, Dict]:
+        """Return count, total, p50, p95 and max duration (seconds) per stage"""
+        durations: Dict[str, List[float]] = {}
+        with self._lock:
+            for span in self.spans:
+                durations.setdefault(span['stage'], []).append(span['duration'])
+            for stage, values in self.timings.items():
+                durations.setdefault(stage, []).extend(values)
+
+        summary = {}
+        for stage, values in durations.items():
+            values.sort()
+            summary[stage] = {
+                'count': len(values),
+                'total': sum(values),
+                'p50': percentile(values, 50),
+                'p95': percentile(values, 95),
+                'max': values[-1]
+            }
+        return summary
+
+    def print_summary(self) -> None:
+        summary = self.summary()
+        if not summary:
+            return
+
+        print(f"\n{'='*50}")
+        print("STAGE TIMINGS:")
+        print(f"{'='*50}")
+        print(f"{'stage':<16} {'count':>7} {'total':>10} {'p50':>9} {'p95':>9} {'max':>9}")
+        for stage, stats in sorted(summary.items(), key=lambda item: item[1]['total'], reverse=True):
+            print(
+                f"{stage:<16} {stats['count']:>7} {stats['total']:>9.2f}s "
+                f"{stats['p50'] * 1000:>7.1f}ms {stats['p95'] * 1000:>7.1f}ms {stats['max'] * 1000:>7.1f}ms"
+            )
+
+    def export_chrome_trace(self, path: str) -> None:
+        """Write spans in Chrome trace event format (chrome://tracing, Perfetto)"""
+        pid = os.getpid()
+        with self._lock:
+            events = [{
+                'name': span['stage'],
+                'cat': 'populate',
+                'ph': 'X',
+                'ts': round(span['start'] * 1e6, 3),
+                'dur': round(span['duration'] * 1e6, 3),
+                'pid': pid,
+                'tid': span['tid'],
+                'args': {key: str(value) for key, value in span['tags'].items()}
+            } for span in self.spans]
+
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+        print(f"Trace with {len(events)} spans written to {path}")
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def traced(stage: str):
+    """Decorator timing a populator method as a span of the given stage"""
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.tracer.span(stage):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def timed(stage: str):
+    """Decorator adding a populator method's duration to the stage summary, for calls too cheap to trace as spans"""
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self.tracer.add_timing(stage, time.perf_counter() - start)
+        return wrapper
+    return decorator
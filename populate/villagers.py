@@ -6,24 +6,30 @@ Global villagers populator that handles the complete workflow:
 3. Enhance with translated names from web scraping
 """
 
-import requests
+import logging
 import json
+from itertools import count
 from typing import Dict, List
 import sys
-from bs4 import BeautifulSoup
 import re
 from base_populator import BasePopulator, BaseWebPopulator
+from scheduling import DemandPriority
+from tracing import timed, traced
+
+logger = logging.getLogger('populate.villagers')
 
 class VillagersGlobalPopulator(BasePopulator):
-    def __init__(self, avoid_enhancements: bool = False, avoid_translations: bool = False, avoid_rank_enhancements: bool = False):
-        super().__init__()
+    def __init__(self, avoid_enhancements: bool = False, avoid_translations: bool = False, avoid_rank_enhancements: bool = False, **options):
+        super().__init__(**options)
         self.avoid_enhancements = avoid_enhancements
         self.avoid_translations = avoid_translations
         self.avoid_rank_enhancements = avoid_rank_enhancements
+        self._popularity_ranks = None
 
         if not self.nookipedia_api_key:
             raise ValueError("NOOKIPEDIA_API_KEY not found in environment variables")
 
+    @traced('fetch')
     def fetch_villagers_from_nookipedia(self) -> List[Dict]:
         """Fetch villagers from Nookipedia API"""
         print("Fetching villagers from Nookipedia API...")
@@ -37,6 +43,7 @@ class VillagersGlobalPopulator(BasePopulator):
         print(f"Fetched {len(villagers)} villagers from Nookipedia")
         return villagers
 
+    @timed('transform')
     def transform_villager_data(self, nookipedia_villager: Dict) -> Dict:
         """Transform Nookipedia data to API format"""
 
@@ -90,42 +97,69 @@ class VillagersGlobalPopulator(BasePopulator):
 
         return transformed_villager
 
+    def villager_priority(self) -> DemandPriority:
+        """Popular and in-demand villagers are processed first"""
+        if self._popularity_ranks is None:
+            try:
+                self._popularity_ranks = self._load_popularity_ranks()
+            except Exception as e:
+                logger.warning(f"⚠ Warning: {e}, scheduling villagers by demand only")
+                self._popularity_ranks = {}
+        return self.demand_priority('villagers', self._popularity_ranks)
+
+    @traced('run.populate')
     def populate_villagers_to_api(self, villagers: List[Dict]) -> List[str]:
         """Populate villagers to API and return list of created villager IDs"""
+        existing_villagers = self.existing_entities('villager')
+        villagers = self.selection.filter_sources(villagers, existing_villagers)
         print(f"Populating database with {len(villagers)} villagers...")
 
-        success_count = 0
-        error_count = 0
-        created_villager_ids = []
+        progress = self.progress.stage('villagers', len(villagers))
+
+        # Items run in priority order, so log their position in that order rather than in the source list
+        position = count(1)
 
-        for i, villager in enumerate(villagers, 1):
+        def populate_villager(villager) -> str:
             try:
-                print(f"\nProcessing villager {i}/{len(villagers)}: {villager['name']}")
-                transformed_villager = self.transform_villager_data(villager)
+                logger.info(f"Processing villager {next(position)}/{len(villagers)}: {villager['name']}")
+                with self.tracer.tags(entity=villager['name']):
+                    transformed_villager = self.transform_villager_data(villager)
 
-                result = self.populate_single_item(transformed_villager)
-                villager_id = result.get('villager', {}).get('_id')
+                    if self.selection.includes_stage('create'):
+                        villager_id = self.api.create_entity('villager', transformed_villager).get('_id')
 
-                if not villager_id:
-                    raise Exception("Failed to get villager ID from creation response")
+                        if not villager_id:
+                            raise Exception("Failed to get villager ID from creation response")
 
-                print(f"✓ Successfully created villager: {transformed_villager['name']['en']} ({villager_id})")
-                created_villager_ids.append(villager_id)
+                        logger.info(f"✓ Successfully created villager: {transformed_villager['name']['en']} ({villager_id})")
+                    else:
+                        villager_id = self.existing_entity_id(existing_villagers, villager['name'])
 
-                if 'image_url' in villager and villager['image_url']:
-                    try:
-                        print(f"Downloading and uploading image for {transformed_villager['name']['en']}...")
-                        image_data = self.download_image_as_base64(villager['image_url'])
-                        self.upload_villager_image(villager_id, 'full', image_data)
-                        print(f"✓ Image successfully uploaded for {transformed_villager['name']['en']}")
-                    except Exception as img_error:
-                        print(f"⚠ Warning: Failed to process image for {transformed_villager['name']['en']}: {str(img_error)}")
+                    if self.selection.includes_image('full') and 'image_url' in villager and villager['image_url']:
+                        try:
+                            logger.debug(f"Downloading and uploading image for {transformed_villager['name']['en']}...")
+                            with self.tracer.tags(image_type='full'):
+                                image_data = self.download_image_as_base64(villager['image_url'])
+                                self.upload_entity_image('villager', villager_id, 'full', image_data)
+                            logger.debug(f"✓ Image successfully uploaded for {transformed_villager['name']['en']}")
+                        except Exception as img_error:
+                            logger.warning(f"⚠ Warning: Failed to process image for {transformed_villager['name']['en']}: {str(img_error)}")
 
-                success_count += 1
+                progress.advance()
+                return villager_id
 
             except Exception as e:
-                error_count += 1
-                print(f"✗ Failed to create {villager['name']} ({villager.get('id', 'unknown')}): {str(e)}")
+                progress.advance(error=True)
+                logger.error(f"✗ Failed to create {villager['name']} ({villager.get('id', 'unknown')}): {str(e)}")
+                return None
+
+        priority = self.villager_priority()
+        results = self.for_each_item(populate_villager, villagers, priority=lambda villager: priority(villager['name']))
+        progress.close()
+
+        created_villager_ids = [villager_id for villager_id in results if villager_id]
+        success_count = len(created_villager_ids)
+        error_count = len(villagers) - success_count
 
         print(f"\n{'='*50}")
         print(f"VILLAGERS POPULATION SUMMARY:")
@@ -136,71 +170,89 @@ class VillagersGlobalPopulator(BasePopulator):
 
         return created_villager_ids
 
+    @traced('run.house')
     def enhance_with_house_data(self) -> None:
         """Enhance villagers with house data from web scraping"""
         if self.avoid_enhancements:
             print("Skipping house enhancements (--avoid-enhancements flag)")
             return
+        if not (self.selection.includes_stage('house') or self.selection.includes_stage('images')):
+            print("Skipping house enhancements (--stage)")
+            return
 
         print("\n" + "="*50)
         print("ENHANCING WITH HOUSE DATA")
         print("="*50)
 
         try:
-            villagers = self.get_villagers_from_api()
+            villagers = self.selection.filter_entities(self.get_entities_from_api('villager'))
+            if not villagers:
+                print("No selected villagers to enhance")
+                return
             villager_names = [villager['name']['en'] for villager in villagers if villager.get('name', {}).get('en')]
 
             house_data = self._scrape_house_data(villager_names)
             self._apply_house_enhancements(villagers, house_data)
 
         except Exception as e:
-            print(f"✗ House enhancement failed: {e}")
+            logger.error(f"✗ House enhancement failed: {e}")
 
+    @traced('run.names')
     def enhance_with_name_translations(self) -> None:
         """Enhance villagers with translated names from web scraping"""
         if self.avoid_translations:
             print("Skipping name translations (--avoid-translations flag)")
             return
+        if not self.selection.includes_stage('names'):
+            print("Skipping name translations (--stage)")
+            return
 
         print("\n" + "="*50)
         print("ENHANCING WITH NAME TRANSLATIONS")
         print("="*50)
 
         try:
-            villagers = self.get_villagers_from_api()
+            villagers = self.selection.filter_entities(self.get_entities_from_api('villager'))
+            if not villagers:
+                print("No selected villagers to enhance")
+                return
             villager_names = [villager['name']['en'] for villager in villagers if villager.get('name', {}).get('en')]
 
             names_data = self._scrape_names_data(villager_names)
             self._apply_name_enhancements(villagers, names_data)
 
         except Exception as e:
-            print(f"✗ Name enhancement failed: {e}")
+            logger.error(f"✗ Name enhancement failed: {e}")
 
     def _scrape_house_data(self, villager_names: List[str]) -> Dict:
         """Scrape house data from Nookipedia website"""
+        from bs4 import BeautifulSoup
+
         print("Scraping villager house data from Nookipedia website...")
 
         nookipedia_url = "https://nookipedia.com/wiki/Villager_house/New_Horizons"
-        response = self.session.get(nookipedia_url)
+        with self.tracer.span('scrape', page='houses'):
+            response = self.hedged_get(self.session, nookipedia_url)
 
         if response.status_code != 200:
             raise Exception(f"Failed to fetch Nookipedia page: {response.status_code}")
 
-        soup = BeautifulSoup(response.content, 'html.parser')
-        table = soup.find('table', {'style': re.compile(r'border-collapse:collapse.*background:#fff')})
+        with self.tracer.span('parse', page='houses'):
+            soup = BeautifulSoup(response.content, 'html.parser')
+            table = soup.find('table', {'style': re.compile(r'border-collapse:collapse.*background:#fff')})
 
-        if not table:
-            raise Exception("Could not find the villager houses table on the page")
+            if not table:
+                raise Exception("Could not find the villager houses table on the page")
 
-        villager_house_data = {}
-        rows = table.find_all('tr')[1:]
+            villager_house_data = {}
+            rows = table.find_all('tr')[1:]
 
-        for row in rows:
-            cells = row.find_all('td')
-            if len(cells) >= 4:
-                villager_data = self._parse_house_row(cells)
-                if villager_data:
-                    villager_house_data[villager_data['name']] = villager_data
+            for row in rows:
+                cells = row.find_all('td')
+                if len(cells) >= 4:
+                    villager_data = self._parse_house_row(cells)
+                    if villager_data:
+                        villager_house_data[villager_data['name']] = villager_data
 
         print(f"Successfully parsed house data for {len(villager_house_data)} villagers")
         return villager_house_data
@@ -238,7 +290,7 @@ class VillagersGlobalPopulator(BasePopulator):
             }
 
         except Exception as e:
-            print(f"Error parsing villager row: {e}")
+            logger.warning(f"Error parsing villager row: {e}")
             return None
 
     def _parse_exterior_parts(self, parts_cell) -> Dict:
@@ -271,29 +323,33 @@ class VillagersGlobalPopulator(BasePopulator):
 
     def _scrape_names_data(self, villager_names: List[str]) -> Dict:
         """Scrape name translations from Nookipedia website"""
+        from bs4 import BeautifulSoup
+
         print("Scraping villager name translations from Nookipedia website...")
 
         nookipedia_url = "https://nookipedia.com/wiki/List_of_villager_names_in_other_languages"
-        response = self.session.get(nookipedia_url)
+        with self.tracer.span('scrape', page='names'):
+            response = self.hedged_get(self.session, nookipedia_url)
 
         if response.status_code != 200:
             raise Exception(f"Failed to fetch Nookipedia page: {response.status_code}")
 
-        soup = BeautifulSoup(response.content, 'html.parser')
-        table = soup.find('table', {'class': 'styled color-villager'})
+        with self.tracer.span('parse', page='names'):
+            soup = BeautifulSoup(response.content, 'html.parser')
+            table = soup.find('table', {'class': 'styled color-villager'})
 
-        if not table:
-            raise Exception("Could not find the villager names table on the page")
+            if not table:
+                raise Exception("Could not find the villager names table on the page")
 
-        villager_names_data = {}
-        rows = table.find_all('tr')[1:]
+            villager_names_data = {}
+            rows = table.find_all('tr')[1:]
 
-        for row in rows:
-            cells = row.find_all('td')
-            if len(cells) >= 10:
-                villager_data = self._parse_names_row(cells)
-                if villager_data:
-                    villager_names_data[villager_data['name']['en']] = villager_data
+            for row in rows:
+                cells = row.find_all('td')
+                if len(cells) >= 10:
+                    villager_data = self._parse_names_row(cells)
+                    if villager_data:
+                        villager_names_data[villager_data['name']['en']] = villager_data
 
         print(f"Successfully parsed name data for {len(villager_names_data)} villagers")
         return villager_names_data
@@ -342,7 +398,7 @@ class VillagersGlobalPopulator(BasePopulator):
             return {'name': names}
 
         except Exception as e:
-            print(f"Error parsing villager name row: {e}")
+            logger.warning(f"Error parsing villager name row: {e}")
             return None
 
     def _extract_name_from_cell(self, cell) -> str:
@@ -393,17 +449,19 @@ class VillagersGlobalPopulator(BasePopulator):
         """Apply house enhancements to villagers"""
         print("Applying house enhancements...")
 
-        matched_count = 0
-        for villager in villagers:
+        matched_villagers = [villager for villager in villagers if house_data.get(villager['name']['en'])]
+        matched_count = len(matched_villagers)
+        progress = self.progress.stage('houses', sum(1 for villager in villagers if villager['name']['en'] in house_data))
+
+        def apply_house(villager) -> None:
             villager_name = villager['name']['en']
             villager_id = villager['_id']
-            house_info_data = house_data.get(villager_name)
+            house_info_data = house_data[villager_name]
 
-            if house_info_data:
-                matched_count += 1
-                try:
-                    print(f"\nProcessing house data for {villager_name}...")
+            try:
+                logger.info(f"Processing house data for {villager_name}...")
 
+                with self.tracer.tags(entity=villager_name):
                     house_info = {}
                     exterior_parts = house_info_data.get('exterior_parts', {})
 
@@ -414,8 +472,8 @@ class VillagersGlobalPopulator(BasePopulator):
                     if exterior_parts.get('door', {}).get('name'):
                         house_info['door'] = exterior_parts['door']['name']
 
-                    if house_info:
-                        self.update_villager_house_info(villager_id, house_info)
+                    if house_info and self.selection.includes_stage('house'):
+                        self.api.update_entity('villager', villager_id, {'house': house_info})
 
                     image_types = []
                     if house_info_data.get('small_icon_image_url'):
@@ -430,67 +488,88 @@ class VillagersGlobalPopulator(BasePopulator):
                             image_types.append((part_type, part_data['image_url']))
 
                     for image_type, image_url in image_types:
+                        if not self.selection.includes_image(image_type):
+                            continue
                         try:
-                            image_data = self.download_image_as_base64(image_url)
-                            self.upload_villager_image(villager_id, image_type, image_data)
+                            with self.tracer.tags(image_type=image_type):
+                                image_data = self.download_image_as_base64(image_url)
+                                self.upload_entity_image('villager', villager_id, image_type, image_data)
                         except Exception as img_error:
-                            print(f"⚠ Warning: Failed to process {image_type} image: {str(img_error)}")
+                            logger.warning(f"⚠ Warning: Failed to process {image_type} image: {str(img_error)}")
 
-                    print(f"✓ Successfully enhanced {villager_name}")
+                logger.info(f"✓ Successfully enhanced {villager_name}")
+                progress.advance()
 
-                except Exception as e:
-                    print(f"✗ Failed to enhance {villager_name}: {str(e)}")
+            except Exception as e:
+                progress.advance(error=True)
+                logger.error(f"✗ Failed to enhance {villager_name}: {str(e)}")
 
+        priority = self.villager_priority()
+        self.for_each_item(apply_house, matched_villagers, priority=lambda villager: priority(villager['name']['en']))
+        progress.close()
         print(f"Enhanced {matched_count} villagers with house data")
 
     def _apply_name_enhancements(self, villagers: List[Dict], names_data: Dict) -> None:
         """Apply name enhancements to villagers"""
         print("Applying name enhancements...")
 
-        matched_count = 0
-        for villager in villagers:
+        matched_villagers = [villager for villager in villagers if names_data.get(villager['name']['en'])]
+        matched_count = len(matched_villagers)
+        progress = self.progress.stage('names', sum(1 for villager in villagers if villager['name']['en'] in names_data))
+
+        def apply_names(villager) -> None:
             villager_name = villager['name']['en']
             villager_id = villager['_id']
-            name_info = names_data.get(villager_name)
+            name_info = names_data[villager_name]
 
-            if name_info:
-                matched_count += 1
-                try:
-                    updated_names = villager['name'].copy()
+            try:
+                updated_names = villager['name'].copy()
 
-                    languages = ['jp', 'es', 'fr', 'de', 'it', 'ko', 'zh', 'nl', 'ru']
-                    for lang in languages:
-                        if name_info['name'].get(lang):
-                            updated_names[lang] = name_info['name'][lang]
+                languages = ['jp', 'es', 'fr', 'de', 'it', 'ko', 'zh', 'nl', 'ru']
+                for lang in languages:
+                    if name_info['name'].get(lang):
+                        updated_names[lang] = name_info['name'][lang]
 
-                    if updated_names != villager['name']:
-                        self.update_villager_names(villager_id, updated_names)
-                        print(f"✓ Updated names for {villager_name}")
+                if updated_names != villager['name']:
+                    with self.tracer.tags(entity=villager_name):
+                        self.api.update_entity('villager', villager_id, {'name': updated_names})
+                    logger.info(f"✓ Updated names for {villager_name}")
+                progress.advance()
 
-                except Exception as e:
-                    print(f"✗ Failed to update names for {villager_name}: {str(e)}")
+            except Exception as e:
+                progress.advance(error=True)
+                logger.error(f"✗ Failed to update names for {villager_name}: {str(e)}")
 
+        priority = self.villager_priority()
+        self.for_each_item(apply_names, matched_villagers, priority=lambda villager: priority(villager['name']['en']))
+        progress.close()
         print(f"Enhanced {matched_count} villagers with translated names")
 
+    @traced('run.ranks')
     def enhance_with_popularity_ranks(self) -> None:
         """Enhance villagers with popularity ranks from villagerRanks.json"""
         if self.avoid_rank_enhancements:
             print("Skipping popularity rank enhancements (--avoid-rank-enhancements flag)")
             return
+        if not self.selection.includes_stage('ranks'):
+            print("Skipping popularity rank enhancements (--stage)")
+            return
 
         print("\n" + "="*50)
         print("ENHANCING WITH POPULARITY RANKS")
         print("="*50)
 
         try:
-            villagers = self.get_villagers_from_api()
-            villager_names = [villager['name']['en'] for villager in villagers if villager.get('name', {}).get('en')]
+            villagers = self.selection.filter_entities(self.get_entities_from_api('villager'))
+            if not villagers:
+                print("No selected villagers to enhance")
+                return
 
             ranks_data = self._load_popularity_ranks()
             self._apply_popularity_rank_enhancements(villagers, ranks_data)
 
         except Exception as e:
-            print(f"✗ Popularity rank enhancement failed: {e}")
+            logger.error(f"✗ Popularity rank enhancement failed: {e}")
 
     def _load_popularity_ranks(self) -> Dict:
         """Load popularity ranks from villagerRanks.json"""
@@ -516,27 +595,36 @@ class VillagersGlobalPopulator(BasePopulator):
         """Apply popularity rank enhancements to villagers"""
         print("Applying popularity rank enhancements...")
 
-        matched_count = 0
-        updated_count = 0
+        matched_villagers = [villager for villager in villagers if villager['name']['en'] in ranks_data]
+        matched_count = len(matched_villagers)
 
-        for villager in villagers:
+        progress = self.progress.stage('ranks', matched_count)
+
+        def apply_rank(villager) -> bool:
             villager_name = villager['name']['en']
             villager_id = villager['_id']
             current_rank = villager.get('popularity_rank', 'unranked')
-            new_rank = ranks_data.get(villager_name, 'unranked')
-
-            if villager_name in ranks_data:
-                matched_count += 1
-
-                if current_rank != new_rank:
-                    try:
-                        self.update_villager_popularity_rank(villager_id, new_rank)
-                        updated_count += 1
-                        print(f"✓ Updated {villager_name}: {current_rank} → {new_rank}")
-                    except Exception as e:
-                        print(f"✗ Failed to update popularity rank for {villager_name}: {str(e)}")
-                else:
-                    print(f"- {villager_name}: already has rank {current_rank}")
+            new_rank = ranks_data[villager_name]
+
+            if current_rank == new_rank:
+                logger.debug(f"- {villager_name}: already has rank {current_rank}")
+                progress.advance()
+                return False
+
+            try:
+                with self.tracer.tags(entity=villager_name):
+                    self.api.update_entity('villager', villager_id, {'popularity_rank': new_rank})
+                logger.info(f"✓ Updated {villager_name}: {current_rank} → {new_rank}")
+                progress.advance()
+                return True
+            except Exception as e:
+                progress.advance(error=True)
+                logger.error(f"✗ Failed to update popularity rank for {villager_name}: {str(e)}")
+                return False
+
+        priority = self.villager_priority()
+        updated_count = sum(self.for_each_item(apply_rank, matched_villagers, priority=lambda villager: priority(villager['name']['en'])))
+        progress.close()
 
         print(f"Matched {matched_count} villagers with popularity ranks")
         print(f"Updated {updated_count} villagers with new popularity ranks")
@@ -555,8 +643,11 @@ class VillagersGlobalPopulator(BasePopulator):
             self.get_system_token()
             print("")
 
-            villagers_data = self.fetch_villagers_from_nookipedia()
-            self.populate_villagers_to_api(villagers_data)
+            if self.selection.includes_stage('create') or self.selection.includes_stage('images'):
+                villagers_data = self.fetch_villagers_from_nookipedia()
+                self.populate_villagers_to_api(villagers_data)
+            else:
+                print("Skipping villager population (--stage)")
 
             self.enhance_with_house_data()
 